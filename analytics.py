@@ -0,0 +1,121 @@
+# 관리자 대시보드용 사전 집계(stats) 관리.
+#
+# Firebase의 stats/ 아래에 다음 카운터를 유지합니다.
+#   stats/totals/{messages,users}      전체 대화 수 / 사용자 수
+#   stats/daily/{YYYY-MM-DD}           일자별 대화 수
+#   stats/keywords/{키워드}            사용자 질문 키워드 빈도
+#   stats/interests/{관심사}           관심사 선택 인원
+#   stats/users/{uid}/messages         사용자별 대화 수
+#
+# 채팅 로그를 저장할 때 같은 멀티 경로 PATCH에 서버 측 증가값({".sv": {"increment": n}})을 함께 넣어
+# 카운터를 갱신하고, 기존 기록은 `python analytics.py --backfill` 로 한 번에 채웁니다.
+import argparse
+import re
+import time
+from collections import Counter
+
+from firebase_client import FirebaseClient
+from keywords import extract_keywords
+
+# Firebase 키에 쓸 수 없는 문자
+_INVALID_KEY_CHARS = re.compile(r'[.$#\[\]/\x00-\x1f\x7f]')
+
+
+def safe_key(key):
+    return _INVALID_KEY_CHARS.sub('_', str(key)).strip() or '_'
+
+
+def increment(n=1):
+    return {".sv": {"increment": n}}
+
+
+def date_of(timestamp_ms):
+    return time.strftime('%Y-%m-%d', time.localtime(int(timestamp_ms) / 1000))
+
+
+def extract_chat_keywords(message):
+    """사용자 질문에서 집계용 키워드를 뽑습니다. (대시보드 키워드 색인과 같은 토크나이저)"""
+    return extract_keywords(message)
+
+
+def message_counters(uid, messages):
+    """메시지 목록({"role", "content", "timestamp"})으로 늘려야 할 카운터 {경로: 증가량}을 계산합니다."""
+    counters = Counter()
+    for msg in messages:
+        counters["stats/totals/messages"] += 1
+        counters[f"stats/daily/{date_of(msg['timestamp'])}"] += 1
+        counters[f"stats/users/{safe_key(uid)}/messages"] += 1
+        if msg.get("role") == "user":
+            for kw in extract_chat_keywords(msg.get("content", "")):
+                counters[f"stats/keywords/{safe_key(kw)}"] += 1
+    return counters
+
+
+def message_increments(uid, messages):
+    """채팅 로그 PATCH에 합칠 서버 측 증가 연산 {경로: {".sv": ...}}."""
+    return {path: increment(n) for path, n in message_counters(uid, messages).items()}
+
+
+def interest_increments(old_interests, new_interests):
+    """관심사 변경 시 늘리고 줄일 카운터."""
+    old_set, new_set = set(old_interests or []), set(new_interests or [])
+    updates = {}
+    for interest in new_set - old_set:
+        updates[f"stats/interests/{safe_key(interest)}"] = increment(1)
+    for interest in old_set - new_set:
+        updates[f"stats/interests/{safe_key(interest)}"] = increment(-1)
+    return updates
+
+
+def new_user_increments():
+    return {"stats/totals/users": increment(1)}
+
+
+def build_stats(users_data, chats_data):
+    """전체 기록으로 stats 트리를 처음부터 계산합니다. (백필용)"""
+    counters = Counter()
+    for uid, timestamp_dict in (chats_data or {}).items():
+        if not timestamp_dict: continue
+        messages = []
+        for ts, msg_info in timestamp_dict.items():
+            if not isinstance(msg_info, dict): continue
+            messages.append({"role": msg_info.get('role'), "content": msg_info.get('content', ''),
+                             "timestamp": msg_info.get('timestamp', ts)})
+        counters.update(message_counters(uid, messages))
+    for info in (users_data or {}).values():
+        for interest in (info or {}).get('interests') or []:
+            counters[f"stats/interests/{safe_key(interest)}"] += 1
+    counters["stats/totals/users"] = len(users_data or {})
+
+    stats = {}
+    for path, value in counters.items():
+        node = stats
+        parts = path.split('/')[1:]
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return stats
+
+
+def backfill(db_url, token, timeout=120):
+    """기존 users / chat_history 전체를 읽어 stats 트리를 다시 만듭니다."""
+    client = FirebaseClient(db_url, timeout=timeout)
+    users_data = client.db_get("users", token).json() or {}
+    chats_data = client.db_get("chat_history", token).json() or {}
+    stats = build_stats(users_data, chats_data)
+    client.db_put("stats", token, stats).raise_for_status()
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="기존 채팅 기록으로 관리자 대시보드 집계(stats)를 만듭니다.")
+    parser.add_argument("--backfill", action="store_true", help="users / chat_history 전체를 읽어 stats를 다시 계산합니다.")
+    parser.add_argument("--db-url", required=True, help="Firebase Realtime Database URL")
+    parser.add_argument("--token", required=True, help="전체 데이터를 읽고 쓸 수 있는 관리자 토큰 (ID 토큰 또는 DB secret)")
+    args = parser.parse_args()
+    if args.backfill:
+        result = backfill(args.db_url, args.token)
+        print(f"🎉 백필 완료: 대화 {result.get('totals', {}).get('messages', 0)}건, "
+              f"사용자 {result.get('totals', {}).get('users', 0)}명, 키워드 {len(result.get('keywords', {}))}개")
+    else:
+        parser.print_help()
@@ -0,0 +1,149 @@
+import hashlib
+import math
+import threading
+import time
+
+# 주제별 답변 캐시 유효 시간(초). 공지는 자주 바뀌고 시설 정보는 거의 바뀌지 않습니다.
+TOPIC_TTLS = {
+    "학사공지": 60 * 60,
+    "공지사항": 60 * 60,
+    "행사안내": 6 * 60 * 60,
+    "홍보사항": 6 * 60 * 60,
+    "학교소식": 6 * 60 * 60,
+    "서일대학교": 24 * 60 * 60,
+    "셔틀버스": 7 * 24 * 60 * 60,
+    "찾아오시는길": 7 * 24 * 60 * 60,
+    "스터디공간": 7 * 24 * 60 * 60,
+    "PC이용, VR실": 7 * 24 * 60 * 60,
+    "편의점, 카페": 7 * 24 * 60 * 60,
+    "학생식당": 7 * 24 * 60 * 60,
+    "휴게공간": 7 * 24 * 60 * 60,
+    "편의시설": 7 * 24 * 60 * 60,
+    "체육시설": 7 * 24 * 60 * 60,
+    "대학생활메뉴얼": 7 * 24 * 60 * 60,
+    "도서관": 7 * 24 * 60 * 60,
+}
+DEFAULT_TTL = 24 * 60 * 60
+
+
+def context_key(documents, prompt=""):
+    """
+    검색된 참고 정보 묶음 + 프롬프트의 나머지(시스템 지시, 이전 대화 등)를 구분하는 키.
+    같은 참고 정보라도 대화 맥락이나 사용자 관심사가 다르면 다른 답변이므로 함께 해시합니다.
+    """
+    h = hashlib.sha256()
+    for doc in documents:
+        h.update(doc.encode('utf-8'))
+        h.update(b'\0')
+    h.update(b'\1')
+    h.update(prompt.encode('utf-8'))
+    return h.hexdigest()
+
+
+def ttl_for_topics(topics, ttls=TOPIC_TTLS, default=DEFAULT_TTL):
+    """참고 정보에 섞인 주제 중 가장 짧은 TTL을 사용합니다."""
+    values = [ttls.get(t, default) for t in topics if t]
+    return min(values) if values else default
+
+
+def _normalize(vec):
+    norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+    return [v / norm for v in vec]
+
+
+class SemanticAnswerCache:
+    """
+    질문 임베딩이 비슷하고(코사인 유사도 >= threshold) 검색된 참고 정보와 프롬프트 맥락(prompt)이 같으면
+    저장해 둔 답변을 재사용하는 캐시.
+
+    - 항목은 참고 정보 + prompt 키별로 묶여 있어, 같은 참고 정보와 같은 대화 맥락을 받은 질문끼리만 비교합니다.
+    - 각 항목은 참고 정보 주제에 맞는 TTL이 지나면 만료됩니다.
+    - index_version_fn()의 값이 바뀌면(재색인) 전체를 비웁니다.
+    """
+
+    def __init__(self, threshold=0.95, max_entries=512, index_version_fn=None):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.index_version_fn = index_version_fn
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}  # context_key -> [entry, ...]
+        self._count = 0
+        self._index_version = None
+        self._lock = threading.Lock()
+
+    def _check_version(self):
+        if self.index_version_fn is None:
+            return
+        version = self.index_version_fn()
+        if version != self._index_version:
+            self._entries.clear()
+            self._count = 0
+            self._index_version = version
+
+    def lookup(self, query_embedding, documents, prompt=""):
+        if not documents:
+            return None
+        query = _normalize(query_embedding)
+        key = context_key(documents, prompt)
+        now = time.time()
+        with self._lock:
+            self._check_version()
+            bucket = self._entries.get(key, [])
+            alive = [e for e in bucket if e["expires_at"] > now]
+            if len(alive) != len(bucket):
+                self._count -= len(bucket) - len(alive)
+                self._entries[key] = alive
+            best, best_score = None, self.threshold
+            for entry in alive:
+                score = sum(a * b for a, b in zip(query, entry["embedding"]))
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            best["last_used"] = now
+            return best["answer"]
+
+    def store(self, query_embedding, documents, answer, topics=(), prompt=""):
+        if not documents or not answer:
+            return
+        now = time.time()
+        entry = {
+            "embedding": _normalize(query_embedding),
+            "answer": answer,
+            "expires_at": now + ttl_for_topics(topics),
+            "last_used": now,
+        }
+        with self._lock:
+            self._check_version()
+            self._entries.setdefault(context_key(documents, prompt), []).append(entry)
+            self._count += 1
+            if self._count > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        # 가장 오래 쓰이지 않은 항목부터 버립니다.
+        all_entries = [(e["last_used"], key, e) for key, bucket in self._entries.items() for e in bucket]
+        all_entries.sort(key=lambda x: x[0])
+        for _, key, entry in all_entries[:self._count - self.max_entries]:
+            self._entries[key].remove(entry)
+            if not self._entries[key]:
+                del self._entries[key]
+            self._count -= 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._count = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": self._count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
@@ -7,9 +7,30 @@ import time
 import base64
 import pandas as pd
 import plotly.express as px
-from PIL import Image, ImageDraw
+from PIL import Image
 from collections import Counter
 
+import metrics
+from analytics import date_of, interest_increments, message_increments, new_user_increments
+from answer_cache import SemanticAnswerCache
+from bm25_index import BM25Index, hybrid_search
+from campus_facts import FactMatcher, render_facts
+from chat_frame import LOCAL_TZ, build_chat_frame
+from chat_logger import ChatLogWriter
+from context_builder import build_context
+from conversation_memory import ConversationMemory, gemini_summarizer
+from firebase_client import FirebaseClient
+from firebase_db import FirebaseDB, window_start_ms
+from index_manifest import ManifestWatcher
+from keyword_worker import KeywordAnalyzer
+from keywords import KeywordIndex
+from location_matcher import LOCATION_INTENTS, LocationMatcher
+from map_render import MapRenderer
+from query_cache import QueryEmbeddingCache
+from query_router import RAG, ROUTE_KINDS, QueryRouter, default_classifier
+from topic_router import TopicRouter
+from vector_index import load_vector_index
+
 # [관리자 이메일 설정]
 try:
     ADMIN_EMAILS = [email.strip() for email in st.secrets.get("ADMIN_EMAILS", "").split(',') if email.strip()]
@@ -53,20 +74,48 @@ SEOIL_LOCATIONS = {
     "누리관": {"x": 835, "y": 160, "desc": "6번 건물: 종합정보관", "keywords": ["누리관", "정보관"]},
     "도서관": {"x": 775, "y": 65, "desc": "7번 건물: 도서관", "keywords": ["도서관", "열람실", "책"]},
     "배양관": {"x": 865, "y": 95, "desc": "8번 건물: 실습강의실", "keywords": ["배양관", "실습실", "편의점", "매점"]},
-    "동아리관": {"x": 660, "y": 260, "desc": "9번 건물: 학생식당, 학식", "keywords": ["동아리관, 학생식당, 학식"]},
+    "동아리관": {"x": 660, "y": 260, "desc": "9번 건물: 학생식당, 학식", "keywords": ["동아리관", "학생식당", "학식"]},
     "정문": {"x": 615, "y": 325, "desc": "10번: 정문", "keywords": ["정문", "입구"]},
 }
 
-# --- 이미지 위에 위치 표시하는 함수 ---
-def highlight_building_on_image(target_name, x, y):
-    try:
-        base_image = Image.open("seoil_map.png")
-        draw = ImageDraw.Draw(base_image)
-        radius = 30
-        draw.ellipse((x - radius, y - radius, x + radius, y + radius), outline="red", width=5)
-        return base_image
-    except FileNotFoundError:
-        return None
+# --- 건물/위치 의도 단어 매칭 (이름, 키워드, 의도 단어를 한 번의 순회로 찾습니다) ---
+@st.cache_resource
+def get_location_matcher():
+    return LocationMatcher(SEOIL_LOCATIONS, LOCATION_INTENTS)
+
+# --- 채팅 메시지 화면 정보 ---
+def make_message(role, content, question=None):
+    """
+    세션 기록에 넣을 메시지. 모델 답변은 만들 때 한 번만 위치를 판별해 지도 키와 안내 문구를 같이 저장합니다.
+    지도 표시 조건: A) 답변에 정확한 '건물 이름'이 있거나, B) 질문이 '위치'를 묻고 건물명/관련 키워드가 있는 경우
+    """
+    msg = {"role": role, "content": content, "location": None}
+    if role == "model":
+        location = get_location_matcher().detect(content, question)
+        if location:
+            msg.update(location=location,
+                       map_key=MapRenderer.key_of([location]),
+                       map_caption=f"{location} ({SEOIL_LOCATIONS[location]['desc']})")
+    return msg
+
+def render_location_map(msg):
+    """메시지에 저장된 지도 정보를 그립니다. 지도 PNG는 렌더러의 LRU에서 바로 꺼냅니다."""
+    if "location" not in msg:
+        # 화면 정보 없이 저장된 이전 형식 메시지는 한 번만 계산해 채워 둡니다.
+        msg.update(make_message(msg["role"], msg["content"]))
+    if not msg["location"]: return
+    map_image = get_map_renderer().render(msg["map_key"])
+    if map_image:
+        st.divider()
+        st.caption(f"📍 **{msg['location']}** 위치 안내")
+        st.image(map_image, caption=msg["map_caption"], use_container_width=True)
+
+# --- 건물 위치 지도 (기본 지도는 한 번만 디코딩하고, 표시한 PNG는 LRU에 보관) ---
+@st.cache_resource
+def get_map_renderer():
+    renderer = MapRenderer("seoil_map.png", SEOIL_LOCATIONS)
+    renderer.prerender()
+    return renderer
 
 # --- 설정 로드 ---
 try:
@@ -80,10 +129,6 @@ try:
     AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
     TOKEN_URL = "https://oauth2.googleapis.com/token"
 
-    SIGNUP_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:signUp?key={FIREBASE_API_KEY}"
-    LOGIN_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithPassword?key={FIREBASE_API_KEY}"
-    GOOGLE_LOGIN_URL = f"https://identitytoolkit.googleapis.com/v1/accounts:signInWithIdp?key={FIREBASE_API_KEY}"
-
 except KeyError as e:
     st.error(f"Firebase 설정(.streamlit/secrets.toml)에 '{e.args[0]}' 키가 누락되었습니다.")
     st.stop()
@@ -98,8 +143,6 @@ if 'user_info' not in st.session_state:
     st.session_state.user_info = None 
 if 'page' not in st.session_state:
     st.session_state.page = 'login'
-if 'user_msg_count' not in st.session_state:
-    st.session_state.user_msg_count = 0
 
 # --- Gemini API ---
 try:
@@ -120,22 +163,218 @@ def load_chroma_collection():
     except Exception as e:
         st.error(f"ChromaDB 컬렉션을 불러오는 데 실패했습니다: {e}")
         return None
+
+# --- NumPy 벡터 색인 (memory-map + 정확한 top-k, 재색인 시 다시 불러옵니다) ---
+@st.cache_resource(max_entries=1, show_spinner="AI 지식 베이스를 로딩 중입니다...")
+def load_numpy_index(index_version):
+    try:
+        return load_vector_index()
+    except Exception as e:
+        st.error(f"벡터 행렬을 불러오는 데 실패했습니다: {e}")
+        return None
+
+def load_retriever_backend():
+    """
+    secrets의 RETRIEVER_BACKEND로 벡터 검색 백엔드를 고릅니다. ("chroma"(기본) 또는 "numpy")
+    둘 다 query(query_embeddings, n_results)로 같은 모양의 결과를 돌려줍니다.
+    numpy 행렬이 아직 없으면 Chroma를 씁니다.
+    """
+    if st.secrets.get("RETRIEVER_BACKEND", "chroma") == "numpy":
+        index = load_numpy_index(get_manifest_watcher().index_version())
+        if index is not None: return index
+    return load_chroma_collection()
     
+# --- 질문 임베딩 캐시 (추천 버튼 / 채팅 입력 공용) ---
+@st.cache_resource
+def get_query_cache():
+    return QueryEmbeddingCache(
+        max_size=int(st.secrets.get("QUERY_CACHE_SIZE", 512)),
+        persist_path=st.secrets.get("QUERY_CACHE_PATH", "./cache/query_embeddings.json") or None,
+    )
+
+def embed_query(query):
+    return genai.embed_content(model="models/embedding-001",
+                               content=query,
+                               task_type="RETRIEVAL_QUERY")['embedding']
+
 # --- 관련 정보 검색 함수 ---
-def find_relevant_info(query, collection, top_k=5):
-    if collection is None: return ""
+@st.cache_resource(max_entries=1)
+def get_bm25_index(index_version):
+    """prepare_data.py가 만든 어휘(BM25) 색인. 재색인(index_version 변경) 시 다시 불러옵니다."""
+    return BM25Index.load()
+
+@st.cache_resource
+def get_topic_router():
+    return TopicRouter()
+
+# --- 고정 정보(시설 위치/운영시간, 교통) 즉답 ---
+@st.cache_resource
+def get_fact_matcher():
+    return FactMatcher()
+
+# --- 질문 라우터 (잡담 / 위치 / 고정 정보는 검색과 LLM 없이 답합니다) ---
+@st.cache_resource
+def get_query_router():
+    classifier = default_classifier() if st.secrets.get("QUERY_ROUTER_CLASSIFIER", False) else None
+    return QueryRouter(SEOIL_LOCATIONS, get_location_matcher(), get_fact_matcher(), classifier=classifier)
+
+# 컨텍스트 조립 전에 넓게 가져올 검색 후보 수
+CONTEXT_CANDIDATES = 12
+
+def retrieve(query, collection, top_k=3, where=None):
+    """
+    어휘(BM25) + 벡터 하이브리드 검색. 질문 임베딩과 검색된 청크(id/본문)를 함께 돌려줍니다.
+    어휘 점수만으로 결정적이면 원격 질문 임베딩을 건너뜁니다.
+    where(주제 등 메타데이터 조건)가 있으면 해당 청크만 검색하고, 하나도 없으면 전체에서 다시 찾습니다.
+    """
+    result = {"embedding": None, "ids": [], "documents": [], "scores": [], "metadatas": []}
+    bm25 = get_bm25_index(get_manifest_watcher().index_version())
+    if collection is None and bm25 is None: return result
+
+    def vector_search(q, n, where=None):
+        result["embedding"] = get_query_cache().get_or_compute(q, embed_query)
+        results = collection.query(query_embeddings=[result["embedding"]], n_results=n, where=where)
+        return results['ids'][0], results['documents'][0]
+
+    # 각 검색기(어휘/벡터)가 최소 top_k개는 돌려줘야 RRF 뒤에도 후보가 top_k개 남습니다.
+    depth = max(top_k, 10)
     try:
-        query_embedding = genai.embed_content(model="models/embedding-001",
-                                              content=query,
-                                              task_type="RETRIEVAL_QUERY")['embedding']
-        
-        results = collection.query(query_embeddings=[query_embedding], n_results=top_k)
-        
-        if results['documents'] and results['documents'][0]:
-            return "\n\n".join(results['documents'][0])
+        with metrics.timer("retrieval.ms"):
+            search = vector_search if collection is not None else None
+            hits = hybrid_search(query, bm25, search, top_k=top_k, candidates=depth, where=where)
+            if where and not hits["ids"]:
+                metrics.incr("retrieval.filter_fallback")
+                hits = hybrid_search(query, bm25, search, top_k=top_k, candidates=depth)
+            elif where:
+                metrics.incr("retrieval.filtered")
+        for key in ("ids", "documents", "scores", "metadatas"):
+            result[key] = hits[key]
+        if hits["decisive"]:
+            metrics.incr("retrieval.lexical_only")
+            # 이미 계산해 둔 임베딩이 있으면 답변 캐시 조회에만 씁니다. (원격 호출 없음, 캐시 적중률에는 세지 않음)
+            result["embedding"] = result["embedding"] or get_query_cache().peek(query)
+        else:
+            metrics.incr("retrieval.hybrid")
     except:
         pass
-    return ""
+    return result
+
+def assemble_context(retrieved):
+    """
+    넓게 가져온 검색 후보에서 중복을 빼고(MMR + shingle 겹침) 토큰 예산 안에 출처 꼬리표와 함께 담습니다.
+    예산/청크 수는 secrets의 CONTEXT_TOKEN_BUDGET / CONTEXT_MAX_CHUNKS로 바꿀 수 있습니다.
+    """
+    candidates = [{"id": cid, "document": doc, "score": score, "metadata": meta}
+                  for cid, doc, score, meta in zip(retrieved["ids"], retrieved["documents"],
+                                                   retrieved["scores"], retrieved["metadatas"]) if doc]
+    context = build_context(candidates,
+                            token_budget=int(st.secrets.get("CONTEXT_TOKEN_BUDGET", 900)),
+                            max_chunks=int(st.secrets.get("CONTEXT_MAX_CHUNKS", 5)))
+    metrics.observe("chat.context_tokens", context["tokens"])
+    return context
+
+def find_relevant_info(query, collection, top_k=CONTEXT_CANDIDATES, where=None):
+    return assemble_context(retrieve(query, collection, top_k, where))["text"]
+
+# --- 답변 캐시 (재색인 시 자동 무효화) ---
+@st.cache_resource
+def get_manifest_watcher():
+    return ManifestWatcher()
+
+@st.cache_resource
+def get_answer_cache():
+    return SemanticAnswerCache(
+        threshold=float(st.secrets.get("ANSWER_CACHE_THRESHOLD", 0.95)),
+        index_version_fn=get_manifest_watcher().index_version,
+    )
+
+# --- 대화 메모리 (세션별) ---
+def get_conversation_memory():
+    if 'conversation_memory' not in st.session_state:
+        st.session_state.conversation_memory = ConversationMemory(
+            keep_turns=int(st.secrets.get("MEMORY_KEEP_TURNS", 4)),
+            max_tokens=int(st.secrets.get("MEMORY_MAX_TOKENS", 600)),
+            # LLM 요약은 선택 사항이며, 켜더라도 백그라운드에서 만들어 다음 턴부터 씁니다. (TTFT에 더해지지 않도록)
+            summarizer=gemini_summarizer() if st.secrets.get("MEMORY_LLM_SUMMARY", False) else None,
+            background=True,
+        )
+    return st.session_state.conversation_memory
+
+# --- 답변 생성 함수 (추천 버튼 / 채팅 입력 공용) ---
+def stream_answer(question, collection, sys_inst, stream=True, interest=None):
+    """
+    답변을 조각 단위로 yield 합니다. 캐시에 있으면 저장된 답변을 한 번에 돌려줍니다.
+    답변 캐시 키에는 참고 정보뿐 아니라 시스템 지시와 [이전 대화]도 들어갑니다.
+    첫 조각까지 걸린 시간(TTFT)과 전체 생성 시간은 metrics에 기록됩니다.
+    검색 범위는 관심사 버튼(interest) 또는 질문의 단서 단어로 고른 주제로 좁힙니다.
+    고정 정보는 질문에 걸린 시설만 시스템 지시에 덧붙입니다.
+    """
+    started = time.perf_counter()
+    fact_keys = get_fact_matcher().match(question).facts
+    if fact_keys:
+        sys_inst = f"{sys_inst}\n[서일대학교 핵심 고정 정보]\n{render_facts(fact_keys)}"
+    where = get_topic_router().where_for(question, interest)
+    retrieved = retrieve(question, collection, top_k=CONTEXT_CANDIDATES, where=where)
+    context = assemble_context(retrieved)
+    # 방금 추가된 현재 질문은 [질문]에 따로 들어가므로 제외합니다.
+    prev_conv = get_conversation_memory().build(st.session_state.messages[:-1])
+    # 시스템 지시(관심사, 고정 정보)와 이전 대화가 같을 때만 캐시된 답변을 씁니다.
+    cache_prompt = f"{sys_inst}\n[이전 대화]\n{prev_conv}"
+    answer_cache = get_answer_cache()
+    if retrieved["embedding"] is not None:
+        cached = answer_cache.lookup(retrieved["embedding"], context["documents"], cache_prompt)
+        if cached:
+            metrics.observe("chat.ttft_ms.cached", (time.perf_counter() - started) * 1000)
+            yield cached
+            return
+
+    final_p = f"[참고 정보]\n{context['text']}\n[이전 대화]\n{prev_conv}\n[질문]\n{question}"
+    
+    model = genai.GenerativeModel('gemini-flash-latest')
+    res = model.generate_content([{'role':'user', 'parts':[sys_inst]}, {'role':'user', 'parts':[final_p]}], stream=stream)
+
+    parts = []
+    for chunk in res:
+        try:
+            text = chunk.text
+        except ValueError:
+            # 안전 필터 등으로 텍스트가 없는 조각은 건너뜁니다.
+            continue
+        if not text: continue
+        # 스트리밍이 아니면 첫 조각이 곧 전체 응답이므로 TTFT로 세지 않습니다. (전체 시간은 chat.generation_ms)
+        if stream and not parts:
+            metrics.observe("chat.ttft_ms", (time.perf_counter() - started) * 1000)
+        parts.append(text)
+        yield text
+    metrics.observe("chat.generation_ms", (time.perf_counter() - started) * 1000)
+
+    ai_msg = "".join(parts)
+    if retrieved["embedding"] is not None:
+        topics = [get_manifest_watcher().topic_of(cid) for cid in context["ids"]]
+        answer_cache.store(retrieved["embedding"], context["documents"], ai_msg, topics, cache_prompt)
+
+def generate_answer(question, collection, sys_inst, interest=None):
+    return "".join(stream_answer(question, collection, sys_inst, stream=False, interest=interest))
+
+def render_answer(question, collection, sys_inst, interest=None):
+    """
+    현재 chat_message 안에 답변을 출력하고 최종 텍스트를 돌려줍니다.
+    라우터가 잡담 / 위치 / 고정 정보로 분류한 질문은 검색과 LLM 호출 없이 바로 답합니다.
+    종류별 건수는 router.<종류>, 로컬 답변 시간은 router.<종류>_ms 로 기록합니다.
+    """
+    started = time.perf_counter()
+    route = get_query_router().route(question)
+    metrics.incr(f"router.{route.kind}")
+    if route.kind != RAG:
+        metrics.observe(f"router.{route.kind}_ms", (time.perf_counter() - started) * 1000)
+        st.markdown(route.answer)
+        return route.answer
+    if st.secrets.get("STREAM_RESPONSES", True):
+        return st.write_stream(stream_answer(question, collection, sys_inst, interest=interest))
+    with st.spinner("답변 생성 중..."):
+        ai_msg = generate_answer(question, collection, sys_inst, interest)
+    st.markdown(ai_msg)
+    return ai_msg
 
 # --- Firebase 오류 파싱 함수 ---
 def parse_firebase_error(response_text):
@@ -150,48 +389,30 @@ def parse_firebase_error(response_text):
     except json.JSONDecodeError:
         return "알 수 없는 오류가 발생했습니다."
     
+# --- Firebase 공용 HTTP 클라이언트 (연결 재사용, 공통 timeout/재시도, 엔드포인트별 지연 시간) ---
+@st.cache_resource
+def get_firebase_client():
+    return FirebaseClient(FIREBASE_DB_URL, api_key=FIREBASE_API_KEY,
+                          timeout=float(st.secrets.get("FIREBASE_TIMEOUT", 10)))
+
 # 채팅 기록을 Firebase에 저장하는 함수
+# (백그라운드 writer의 큐에 넣기만 하므로 UI는 기다리지 않습니다)
+@st.cache_resource
+def get_chat_log_writer():
+    # 채팅 기록과 함께 대시보드 집계 카운터도 같은 요청으로 갱신합니다.
+    return ChatLogWriter(get_firebase_client(), extra_updates_fn=message_increments)
+
 def save_chat_log(uid, token, role, message):
     if not uid or not token: return
-    try:
-        timestamp = int(time.time() * 1000)
-        chat_ref = f"chat_history/{uid}/{timestamp}"
-        data = {"role": role, "content": message, "timestamp": timestamp}
-        db_url = FIREBASE_DB_URL
-        if not db_url.endswith('/'): db_url += '/'
-        save_url = f"{db_url}{chat_ref}.json?auth={token}"
-        requests.put(save_url, json=data, timeout=3)
-    except Exception:
-        pass
+    get_chat_log_writer().log(uid, token, role, message)
 
-# --- 키워드 분석 및 업데이트 함수 ---
-def analyze_chat_keywords(uid, token):
-    try:
-        db_url = FIREBASE_DB_URL
-        if not db_url.endswith('/'): db_url += '/'
-        load_url = f"{db_url}chat_history/{uid}.json?auth={token}"
-        response = requests.get(load_url)
-        if response.status_code != 200 or not response.json(): return []
-
-        chat_data = response.json()
-        full_text = ""
-        for key in sorted(chat_data.keys())[-10:]: 
-            msg = chat_data[key]
-            if msg['role'] == 'user':
-                full_text += msg['content'] + "\n"
-        if len(full_text) < 5: return []
-
-        analysis_model = genai.GenerativeModel('gemini-flash-latest')
-        prompt = f"다음 대화에서 사용자의 핵심 관심 키워드 3개를 콤마로 구분해 추출해줘. 설명 없이 단어만. [대화] {full_text}"
-        result = analysis_model.generate_content(prompt).text
-        keywords = [k.strip() for k in result.split(',') if k.strip()]
-        
-        update_url = f"{db_url}users/{uid}/dynamic_keywords.json?auth={token}"
-        requests.put(update_url, json=keywords)
-        return keywords
-    except Exception:
-        st.toast("키워드 분석 중 일시적 오류 발생")
-        return []
+# --- 키워드 분석 (백그라운드, 사용자별 debounce) ---
+@st.cache_resource
+def get_keyword_analyzer():
+    return KeywordAnalyzer(
+        get_firebase_client(),
+        debounce_seconds=float(st.secrets.get("KEYWORD_DEBOUNCE_SECONDS", 30)),
+    )
 
 # --- Google OAuth ---
 def exchange_code_for_token(code):
@@ -203,7 +424,7 @@ def exchange_code_for_token(code):
         "redirect_uri": REDIRECT_URI
     }
     try:
-        response = requests.post(TOKEN_URL, data=payload); 
+        response = get_firebase_client().post(TOKEN_URL, data=payload); 
         response.raise_for_status(); return response.json()
     except: st.error("Google 토큰 교환 실패"); return None
 
@@ -214,13 +435,11 @@ def sign_in_with_google(google_id_token):
         'requestUri': REDIRECT_URI, 
         'returnSecureToken': True 
         }
-    res = requests.post(GOOGLE_LOGIN_URL, json=payload)
+    client = get_firebase_client()
+    res = client.identity("signInWithIdp", payload)
     if res.status_code == 200:
         data = res.json(); uid, token, email = data['localId'], data['idToken'], data.get('email')
-        db_url = FIREBASE_DB_URL; 
-        if not db_url.endswith('/'): db_url += '/'
-        user_db_url = f"{db_url}users/{uid}.json?auth={token}"
-        name_res = requests.get(user_db_url)
+        name_res = client.db_get(f"users/{uid}", token)
         
         user_role = 'user'
         if email in ADMIN_EMAILS:
@@ -230,7 +449,7 @@ def sign_in_with_google(google_id_token):
             u_data = name_res.json()
             
             if not u_data.get('role'):
-                 requests.patch(user_db_url, json={"role": user_role})
+                 client.db_patch(f"users/{uid}", token, {"role": user_role})
             else:
                  user_role = u_data.get('role')
             
@@ -246,7 +465,7 @@ def sign_in_with_google(google_id_token):
         else:
             u_name = data.get('displayName', '사용자')
             new_user_data = {"name": u_name, "email": email, "interests": None, "dynamic_keywords": [], "role": user_role, "onboarding_completed": False}
-            requests.put(user_db_url, json=new_user_data)
+            client.db_patch("", token, {f"users/{uid}": new_user_data, **new_user_increments()})
             return {
                 "email": email, "uid": uid, "name": u_name, "idToken": token, 
                 "interests": None, "dynamic_keywords": [], "role": user_role,
@@ -272,32 +491,87 @@ if 'code' in st.query_params:
 def set_page(page): st.session_state.page = page
 
 # --- 데이터 로딩 함수 ---
+# 대시보드 조회 기간 (None = 전체 기간)
+DASHBOARD_PERIODS = {"최근 7일": 7, "최근 30일": 30, "최근 90일": 90, "전체": None}
+
+@st.cache_resource
+def get_firebase_db():
+    return FirebaseDB(get_firebase_client())
+
 @st.cache_data(ttl=60)
 def get_all_users_from_db(token):
-    """Firebase에서 모든 사용자 데이터를 가져옵니다."""
+    """Firebase에서 모든 사용자 데이터를 가져옵니다. (스트리밍 파싱)"""
     try:
-        # 인증된 요청 전송
-        response = requests.get(f"{FIREBASE_DB_URL}users.json?auth={token}")
-        if response.status_code == 200 and response.json():
-            return response.json()
-        return {}
+        return dict(get_firebase_db().iter_children("users", token))
     except Exception as e:
         # st.warning(f"유저 데이터 로드 실패: {e}") # 디버깅 시 주석 해제
         return {}
     
 @st.cache_data(ttl=60)
-def get_all_chats_from_db(token):
-    """모든 채팅 기록을 가져옵니다."""
+def get_chats_in_window(token, days=None):
+    """최근 days일 채팅 기록만 서버에서 걸러 가져옵니다. days가 None이면 전체 기간."""
     try:
-        # 인증된 요청 전송
-        response = requests.get(f"{FIREBASE_DB_URL}chat_history.json?auth={token}")
-        if response.status_code == 200 and response.json():
-            return response.json()
-        return {}
+        return get_firebase_db().read_window("chat_history", token, days=days)
     except Exception as e:
         # st.warning(f"채팅 데이터 로드 실패: {e}") # 디버깅 시 주석 해제
         return {}
 
+@st.cache_data(ttl=60)
+def get_stats_from_db(token):
+    """사전 집계된 대시보드 통계 중 누적 지표(totals/keywords/interests)만 가져옵니다."""
+    try:
+        db = get_firebase_db()
+        return {name: db.get(f"stats/{name}", token) or {} for name in ("totals", "keywords", "interests")}
+    except Exception:
+        return {}
+
+@st.cache_data(ttl=60)
+def get_user_count(token):
+    """사전 집계(stats/totals)가 아직 없을 때 쓰는 총 사용자 수. shallow 조회로 키만 셉니다."""
+    try:
+        return get_firebase_db().count("users", token)
+    except Exception:
+        return 0
+
+@st.cache_data(ttl=60)
+def get_daily_stats(token, days=None):
+    """일자별 대화 수 중 최근 days일만 가져옵니다. (키가 YYYY-MM-DD라 문자열 순서로 자를 수 있습니다)"""
+    start_ms = window_start_ms(days)
+    start_date = date_of(start_ms) if start_ms is not None else None
+    try:
+        return get_firebase_db().get("stats/daily", token, orderBy="$key", startAt=start_date) or {}
+    except Exception:
+        return {}
+
+@st.cache_resource(max_entries=4)
+def get_chat_frame(_token, days, data_version):
+    """
+    선택한 기간의 채팅 기록을 열 단위 DataFrame으로 변환해 (기간, 데이터 버전=총 대화 수)별로 보관합니다.
+    대화가 새로 쌓이기 전까지는 다시 내려받거나 변환하지 않습니다.
+    """
+    return build_chat_frame(get_chats_in_window(_token, days))
+
+@st.cache_resource
+def get_keyword_index():
+    """대시보드 상세 보기용 키워드 역색인. 프로세스당 하나를 두고 새 질문만 추가합니다."""
+    return KeywordIndex()
+
+def sync_keyword_index(index, df_chats, window_start, lookback_ms=10 * 60 * 1000):
+    """
+    색인에 없는 사용자 질문만 추가합니다. window_start는 df_chats가 담은 구간의 시작 시각(None이면 전체)입니다.
+    로그는 배치로 조금 늦게 저장될 수 있으므로 마지막 색인 시각보다 lookback_ms 앞부터 확인합니다.
+    더 긴 기간으로 바꿔 구간 시작이 앞당겨지면 이전에 색인하지 않은 오래된 질문까지 프레임 전체를 다시 훑습니다.
+    (이미 색인한 메시지는 id로 건너뜁니다)
+    """
+    window_start = window_start or 0
+    user_rows = df_chats[df_chats['role'] == 'user']
+    if index.covered_from is not None and window_start >= index.covered_from:
+        user_rows = user_rows[user_rows['timestamp'] >= index.max_timestamp - lookback_ms]
+    else:
+        index.covered_from = window_start
+    rows = zip(user_rows['uid'].astype(str), user_rows['timestamp'], user_rows['content'])
+    return index.add_many((f"{uid}/{ts}", ts, content, uid) for uid, ts, content in rows)
+
 # --- 관리자 페이지 함수 (token 인자 받기) ---
 def admin_dashboard_page(token):
     st.title("📊 용용이 통합 관리자 대시보드")
@@ -307,74 +581,40 @@ def admin_dashboard_page(token):
         if st.button("⬅️ 챗봇으로 돌아가기", use_container_width=True):
             st.session_state.page = 'chat'
             st.rerun()
+    with col_nav1:
+        # 조회 기간: 추이 차트와 상세 대화는 서버에서 이 기간만 가져옵니다.
+        period_label = st.radio("조회 기간", list(DASHBOARD_PERIODS), index=1, horizontal=True, key="dash_period")
+        period_days = DASHBOARD_PERIODS[period_label]
             
     st.markdown("---")
     
     with st.spinner("실시간 데이터를 분석 중입니다..."):
-        try:
-            users_res = requests.get(f"{FIREBASE_DB_URL}users.json?auth={token}")
-            chats_res = requests.get(f"{FIREBASE_DB_URL}chat_history.json?auth={token}")
-            
-            users_data = users_res.json() if users_res.status_code == 200 else {}
-            chats_data = chats_res.json() if chats_res.status_code == 200 else {}
-        except Exception as e:
-            st.error(f"데이터 로드 실패: {e}")
-            return
-
-    # --- 데이터 전처리 ---
-    total_users = len(users_data) if users_data else 0
-    
-    # 채팅 데이터 평탄화
-    all_chat_records = []
-    if chats_data:
-        for uid, timestamp_dict in chats_data.items():
-            if timestamp_dict:
-                for ts, msg_info in timestamp_dict.items():
-                    dt = time.strftime('%Y-%m-%d', time.localtime(int(ts)/1000))
-                    all_chat_records.append({
-                        "date": dt,
-                        "role": msg_info.get('role'),
-                        "content": msg_info.get('content')
-                    })
-    
-    df_chats = pd.DataFrame(all_chat_records)
-    total_chats = len(df_chats)
-
-    # --- 키워드 분석 (실제 채팅 기반) ---
-    all_interests = []
-    if users_data:
-        for info in users_data.values():
-            ints = info.get('interests', [])
-            if ints: all_interests.extend(ints)
-
-    all_chat_keywords = []
-    if not df_chats.empty:
-        user_msgs = df_chats[df_chats['role'] == 'user']['content'].tolist()
-        stop_words = ["알려줘", "정보", "관련", "대해", "어디", "어떻게", "대한", "알려", "주세요", "질문", "답변", "좀", "내용", "있는지", "있어", "에", "인지", "하데", "있지", "학교"]
-
-        for msg in user_msgs:
-            words = msg.split()
-            for w in words:
-                cleaned_word = w.replace('은', '').replace('는', '').replace('이', '').replace('가', '').replace('을', '').replace('를', '').replace('에', '').replace('?', '')
-                if len(cleaned_word) >= 2 and cleaned_word not in stop_words:
-                    all_chat_keywords.append(cleaned_word)
-
-    kw_counts = Counter(all_chat_keywords)
+        stats = get_stats_from_db(token)
+        daily = get_daily_stats(token, period_days)
+    if not stats.get('totals'):
+        st.warning("집계 데이터가 없습니다. `python analytics.py --backfill` 로 기존 기록을 먼저 집계해주세요.")
+
+    # --- 사전 집계 데이터 (전체 기록을 내려받지 않습니다) ---
+    totals = stats.get('totals', {})
+    total_users = totals['users'] if 'users' in totals else get_user_count(token)
+    total_chats = totals.get('messages', 0)
+    kw_counts = Counter({k: v for k, v in stats.get('keywords', {}).items() if v > 0})
+    int_counts = Counter({k: v for k, v in stats.get('interests', {}).items() if v > 0})
     
     # [1] 상단 KPI 지표
     m1, m2, m3, m4 = st.columns(4)
     m1.metric("총 사용자", f"{total_users}명", delta="누적")
     m2.metric("총 대화 수", f"{total_chats}건", delta="누적")
     today_str = time.strftime('%Y-%m-%d')
-    today_chats = len(df_chats[df_chats['date'] == today_str]) if not df_chats.empty else 0
+    today_chats = daily.get(today_str, 0)
     m3.metric("오늘 대화량", f"{today_chats}건", delta="Today")
     m4.metric("분석된 키워드", f"{len(kw_counts)}개", delta="Unique")
 
     st.markdown("---")
 
-    st.subheader("📈 일자별 대화량 추이")
-    if not df_chats.empty:
-        daily_counts = df_chats.groupby('date').size().reset_index(name='counts')
+    st.subheader(f"📈 일자별 대화량 추이 ({period_label})")
+    if daily:
+        daily_counts = pd.DataFrame(sorted(daily.items()), columns=['date', 'counts'])
         fig_line = px.line(daily_counts, x='date', y='counts', markers=True, 
                             labels={'date': '날짜', 'counts': '대화 수'})
         fig_line.update_traces(line_color='#2ecc71', line_width=3)
@@ -393,7 +633,7 @@ def admin_dashboard_page(token):
         st.caption("표의 행을 클릭하면 오른쪽에서 상세 내용을 볼 수 있습니다.")
         
         selection = None
-        if all_chat_keywords:
+        if kw_counts:
             kw_counts_top = kw_counts.most_common(50)
             df_kw = pd.DataFrame(kw_counts_top, columns=['키워드', '빈도수'])
             
@@ -427,19 +667,46 @@ def admin_dashboard_page(token):
             # 헤더에 선택된 키워드를 바로 표시
             st.subheader(f"💬 '{selected_keyword}' 관련 질문")
             st.caption(f"키워드가 포함된 사용자 질문 내역입니다.")
+
+            # 검색 조건: 키워드 여러 개(AND/OR) + 기간
+            query_keywords = st.multiselect("검색 키워드", options=df_kw['키워드'].tolist(),
+                                            default=[selected_keyword], key=f"kw_query_{selected_keyword}")
+            f1, f2 = st.columns([1, 2])
+            match_mode = f1.radio("조건", ["OR", "AND"], horizontal=True, key="kw_mode")
+            date_range = f2.date_input("기간", value=(), key="kw_dates")
+            # 직접 고른 기간이 없으면 대시보드 조회 기간을 그대로 씁니다.
+            period_start = window_start_ms(period_days)
+            start_ms, end_ms = period_start, None
+            if len(date_range) == 2:
+                start_ms = int(pd.Timestamp(date_range[0], tz=LOCAL_TZ).timestamp() * 1000)
+                end_ms = int((pd.Timestamp(date_range[1], tz=LOCAL_TZ) + pd.Timedelta(days=1)).timestamp() * 1000) - 1
             
+            # 상세 대화는 키워드를 선택했을 때만 불러오고, 새 질문만 색인에 추가합니다.
+            # 직접 고른 기간이 조회 기간보다 앞서면 전체 기록을 불러와 색인합니다.
+            frame_days = period_days
+            if period_start is not None and start_ms < period_start:
+                frame_days = None
+            df_chats = get_chat_frame(token, frame_days, total_chats)
             if not df_chats.empty:
-                # 사용자 질문('user')만 필터링 + 키워드 검색
-                filtered_chats = df_chats[
-                    (df_chats['role'] == 'user') & 
-                    (df_chats['content'].astype(str).str.contains(selected_keyword))
-                ].sort_values(by='date', ascending=False)
+                kw_index = get_keyword_index()
+                sync_keyword_index(kw_index, df_chats, period_start if frame_days else None)
+                page_size = 20
+                total_hits, _ = kw_index.query(query_keywords, match_mode.lower(), start_ms, end_ms, limit=0)
+                page_count = max((total_hits - 1) // page_size + 1, 1)
+                page = st.number_input(f"페이지 (총 {total_hits}건)", min_value=1, max_value=page_count, value=1, step=1, key="kw_page")
+                # 역색인에서 조건에 맞는 질문만 최신순으로 한 페이지씩 가져옵니다.
+                _, page_ids = kw_index.query(query_keywords, match_mode.lower(), start_ms, end_ms,
+                                             offset=(page - 1) * page_size, limit=page_size)
+                hits = [kw_index.messages[msg_id] for msg_id in page_ids]
+                filtered_chats = pd.DataFrame(hits, columns=['timestamp', 'content'])
+                filtered_chats['datetime'] = (pd.to_datetime(filtered_chats['timestamp'].astype('int64'), unit='ms', utc=True)
+                                              .dt.tz_convert(LOCAL_TZ).dt.tz_localize(None))
                 
                 if not filtered_chats.empty:
                     st.dataframe(
-                        filtered_chats[['date', 'content']],
+                        filtered_chats[['datetime', 'content']],
                         column_config={
-                            "date": "일시",
+                            "datetime": st.column_config.DatetimeColumn("일시", format="YYYY-MM-DD HH:mm"),
                             "content": "질문 내용"
                         },
                         hide_index=True,
@@ -457,8 +724,7 @@ def admin_dashboard_page(token):
 
     # [3] 관심사 통계 (파이 차트)
     st.subheader("🏫 학생 관심사 비율 (가입 시 선택)")
-    if all_interests:
-        int_counts = Counter(all_interests)
+    if int_counts:
         df_int = pd.DataFrame.from_dict(int_counts, orient='index', columns=['count']).reset_index()
         fig_pie = px.pie(df_int, values='count', names='index', hole=0.4, 
                          color_discrete_sequence=px.colors.qualitative.Pastel)
@@ -466,6 +732,53 @@ def admin_dashboard_page(token):
     else:
         st.info("관심사 데이터가 없습니다.")
 
+    # [4] 캐시 / 성능 상태
+    with st.expander("⚙️ 캐시 / 성능 상태"):
+        q_stats = get_query_cache().stats()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("질문 임베딩 캐시", f"{q_stats['size']}개")
+        c2.metric("적중 / 미스", f"{q_stats['hits']} / {q_stats['misses']}")
+        c3.metric("적중률", f"{q_stats['hit_rate']:.0%}")
+        a_stats = get_answer_cache().stats()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("답변 캐시", f"{a_stats['size']}개")
+        c2.metric("적중 / 미스", f"{a_stats['hits']} / {a_stats['misses']}")
+        c3.metric("적중률", f"{a_stats['hit_rate']:.0%}")
+        log_stats = get_chat_log_writer().stats()
+        c1, c2, c3 = st.columns(3)
+        c1.metric("로그 대기열", f"{log_stats['queued']}건")
+        c2.metric("로그 저장 완료", f"{log_stats['sent']}건")
+        c3.metric("로컬 저널 보관", f"{log_stats['journaled']}건")
+        ttft = metrics.REGISTRY.histograms("chat.").get("chat.ttft_ms")
+        if ttft:
+            c1, c2, c3 = st.columns(3)
+            c1.metric("첫 토큰까지 (p50)", f"{ttft['p50']:.0f}ms")
+            c2.metric("첫 토큰까지 (p95)", f"{ttft['p95']:.0f}ms")
+            c3.metric("측정 횟수", f"{ttft['count']}회")
+        route_counts = metrics.REGISTRY.counters("router.")
+        if route_counts:
+            # 절약 시간 추정: (RAG 생성 p50 - 로컬 답변 p50) x 건수
+            route_ms = metrics.REGISTRY.histograms("router.")
+            rag_p50 = metrics.REGISTRY.histograms("chat.").get("chat.generation_ms", {}).get("p50", 0)
+            total = sum(route_counts.values())
+            rows = []
+            for kind in ROUTE_KINDS:
+                count = route_counts.get(f"router.{kind}", 0)
+                p50 = route_ms.get(f"router.{kind}_ms", {}).get("p50")
+                rows.append({"종류": kind, "건수": count, "비율": f"{count / total:.0%}",
+                             "p50 (ms)": round(p50, 2) if p50 is not None else None,
+                             "절약 추정 (s)": round(count * max(rag_p50 - p50, 0) / 1000, 1) if p50 is not None else 0.0})
+            st.caption("질문 라우팅 (검색/LLM 생략 비율)")
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+        fb_latency = metrics.REGISTRY.histograms("firebase.")
+        if fb_latency:
+            st.caption("Firebase 엔드포인트별 지연 시간")
+            st.dataframe(pd.DataFrame([
+                {"엔드포인트": name[len("firebase."):-len("_ms")], "호출 수": h['count'],
+                 "p50 (ms)": round(h['p50']), "p95 (ms)": round(h['p95'])}
+                for name, h in sorted(fb_latency.items())
+            ]), hide_index=True, use_container_width=True)
+
     if st.button("🔄 데이터 새로고침", use_container_width=True):
         st.rerun()
 
@@ -487,14 +800,14 @@ if st.session_state.logged_in:
         c1, c2 = st.columns(2)
         
         uid, token = st.session_state.user_info['uid'], st.session_state.user_info['idToken']
-        db_url = FIREBASE_DB_URL
-        if not db_url.endswith('/'): db_url += '/'
+        client = get_firebase_client()
         
         if c1.button("저장하기", type="primary", use_container_width=True):
-            requests.patch(f"{db_url}users/{uid}.json?auth={token}", json={
-                "interests": sel_ints, 
-                "dynamic_keywords": [],
-                "onboarding_complete": True 
+            client.db_patch("", token, {
+                f"users/{uid}/interests": sel_ints, 
+                f"users/{uid}/dynamic_keywords": [],
+                f"users/{uid}/onboarding_complete": True,
+                **interest_increments([], sel_ints)
             })
             
             st.session_state.user_info['interests'] = sel_ints
@@ -505,7 +818,7 @@ if st.session_state.logged_in:
             st.rerun()
             
         if c2.button("건너뛰기", use_container_width=True):
-            requests.patch(f"{db_url}users/{uid}.json?auth={token}", json={
+            client.db_patch(f"users/{uid}", token, {
                 "interests": [], 
                 "dynamic_keywords": [],
                 "onboarding_complete": True 
@@ -548,7 +861,13 @@ if st.session_state.logged_in:
                     del st.session_state[key]
                 st.rerun()
 
-        collection = load_chroma_collection()
+        collection = load_retriever_backend()
+
+        # 백그라운드 키워드 분석 결과 반영
+        nk = get_keyword_analyzer().poll(uid)
+        if nk:
+            st.session_state.user_info['dynamic_keywords'] = nk
+            st.toast(f"새로운 관심 키워드 발견! : {', '.join(nk)}", icon="🎉")
         
         static_ints = st.session_state.user_info.get('interests', []) or []
         if "선택안함" in static_ints: static_ints = []
@@ -559,31 +878,8 @@ if st.session_state.logged_in:
         sys_inst = f"""
         너는 '서일대학교' 학생들을 위한 AI 챗봇 '용용이'야. 친절하게 답변해.
         {prompt_part}
-        [서일대학교 핵심 고정 정보]
-        **1. 셔틀버스 및 찾아오시는 길**
-        * **지하철**: 7호선 면목역(서일대입구) 2번 출구
-        * **파랑(간선)버스**: 271번 (서일대 하차)
-        * **녹색(지선)버스**: 2013번, 2230번, 1213번
-        * **노랑(마을)버스**: 중랑2번
-        * **대학 셔틀버스 (학기 중 평일 오전 운행)**
-            * **운행 시간**: 오전 08:30 ~ 10:30
-            * **배차 간격**: 20분~25분 간격
-            * **승차 위치 (망우역)**: 1번 출구 역앞 로터리
-            * **승차 위치 (면목역)**: 2번 출구 버스정류장 위
-            * **비고**: 운행시간 외에는 운행하지 않습니다.
-
-        **2. 주요 편의시설**
-        * **학생식당**: 동아리관 2F
-            * **운영시간**: 11:00 ~ 13:30
-        * **편의점 (emart24)**: 배양관 B2
-            * **운영시간**: 오전 08:00 ~ 오후 17:00(학기 중 운영)
-        * **카페 (CAFEING)**: 흥학관 2F
-            * **운영시간**: 평일 09:00 ~ 18:00
-        * **프린터**: 배양관 1F, 도서관 1F
-            * **운영시간**: 항시 운영
-        * **ATM**: 누리관 2F 학생 테라스, 흥학관 2F
-            * **운영시간**: 항시 운영
-        * # 만약 위 [핵심 고정 정보]에 내용이 없다면,
+        # 질문에 관련된 [서일대학교 핵심 고정 정보]가 있으면 그 내용을 우선해서 답변하고,
+        # 만약 [핵심 고정 정보]에 내용이 없다면,
         # 그 때 [참고 정보]와 [이전 대화 내용]을 종합적으로 고려하여 답변을 생성해줘.
         # 참고 정보에도 내용이 없다면 솔직하게 모른다고 말해줘.
         """
@@ -602,34 +898,15 @@ if st.session_state.logged_in:
             if "messages" not in st.session_state: st.session_state.messages = []
             
             user_question = f"{q} 관련 정보 알려줘"
-            st.session_state.messages.append({"role": "user", "content": user_question})
+            st.session_state.messages.append(make_message("user", user_question))
             save_chat_log(uid, token, "user", user_question)
 
-            with st.spinner("답변 생성 중..."):
-                retrieved = find_relevant_info(user_question, collection)
-                prev_conv = "\n".join([f'{m["role"]}: {m["content"]}' for m in st.session_state.messages])
-                final_p = f"[참고 정보]\n{retrieved}\n[이전 대화]\n{prev_conv}\n[질문]\n{user_question}"
-                
-                model = genai.GenerativeModel('gemini-flash-latest')
-                res = model.generate_content([{'role':'user', 'parts':[sys_inst]}, {'role':'user', 'parts':[final_p]}])
-                ai_msg = res.text
-                
-                with st.chat_message("model"):
-                      st.markdown(ai_msg)
-                      target_location = None
-                      for loc_name, data in SEOIL_LOCATIONS.items():
-                        if loc_name in ai_msg: 
-                            target_location = loc_name
-                            break
-                      if target_location:
-                            data = SEOIL_LOCATIONS[target_location]
-                            map_image = highlight_building_on_image(target_location, data['x'], data['y'])
-                            if map_image: 
-                                st.divider()
-                                st.caption(f"📍 **{target_location}** 위치 안내")
-                                st.image(map_image, caption=f"{target_location} ({data['desc']})", use_container_width=True)
-
-            st.session_state.messages.append({"role": "model", "content": ai_msg})
+            with st.chat_message("model"):
+                  ai_msg = render_answer(user_question, collection, sys_inst, interest=q)
+                  model_msg = make_message("model", ai_msg, question=user_question)
+                  render_location_map(model_msg)
+
+            st.session_state.messages.append(model_msg)
             save_chat_log(uid, token, "model", ai_msg)
             st.rerun()
 
@@ -642,72 +919,29 @@ if st.session_state.logged_in:
                     cols[i % 4].button(f"👉 {interest}", key=f"btn_{interest}", on_click=lambda x=interest: st.session_state.update(run_rec=x), use_container_width=True)
             else: st.info("관심사가 없습니다.")
 
+        # 지난 대화는 메시지에 저장해 둔 화면 정보로 다시 그립니다. (위치 판별/지도 렌더링을 반복하지 않습니다)
         for msg in st.session_state.messages:
             with st.chat_message(msg["role"]):
                 st.markdown(msg["content"])
-                if msg["role"] == "model":
-                    for loc_name, data in SEOIL_LOCATIONS.items():
-                        if loc_name in msg["content"] or any(k in msg["content"] for k in data.get('keywords', [])):
-                            st.caption(f"📍 **{loc_name}** 위치 안내")
-                            map_image = highlight_building_on_image(loc_name, data['x'], data['y'])
-                            if map_image: st.image(map_image, use_container_width=True)
-                            break
+                render_location_map(msg)
 
         if prompt := st.chat_input("질문을 입력해주세요..."):
-            st.session_state.messages.append({"role": "user", "content": prompt})
+            st.session_state.messages.append(make_message("user", prompt))
             save_chat_log(uid, token, "user", prompt)
             
-            # 키워드 학습 로직
-            st.session_state.user_msg_count += 1
-            if st.session_state.user_msg_count % 2 == 0:
-                with st.spinner("학습 중..."):
-                    nk = analyze_chat_keywords(uid, token)
-                    if nk: 
-                        st.session_state.user_info['dynamic_keywords'] = nk
-                        st.toast(f"새로운 관심 키워드 발견! : {', '.join(nk)}", icon="🎉")
+            # 키워드 학습 로직 (백그라운드에서 분석하고, 결과는 다음 화면 갱신 때 반영됩니다)
+            get_keyword_analyzer().observe(uid, token, prompt, st.session_state.user_info.get('dynamic_keywords'))
 
             with st.chat_message("user"): st.markdown(prompt)
             
-            with st.spinner("답변 생성 중..."):
-                retrieved = find_relevant_info(prompt, collection)
-                prev_conv = "\n".join([f'{m["role"]}: {m["content"]}' for m in st.session_state.messages])
-                final_p = f"[참고 정보]\n{retrieved}\n[이전 대화]\n{prev_conv}\n[질문]\n{prompt}"
-                
-                model = genai.GenerativeModel('gemini-flash-latest')
-                res = model.generate_content([{'role':'user', 'parts':[sys_inst]}, {'role':'user', 'parts':[final_p]}])
-                ai_msg = res.text
+            with st.chat_message("model"):
+                ai_msg = render_answer(prompt, collection, sys_inst)
                 
-                with st.chat_message("model"):
-                    st.markdown(ai_msg)
-                    
-                    # 조건부 지도 표시 로직 (불필요한 이미지 출력 방지)
-                    target_location = None
-                    
-                    # 1. 사용자가 위치를 물어보는 의도인지 확인하는 단어들
-                    location_intents = ["위치", "어디", "지도", "약도", "가는", "찾아", "안내", "장소", "어디에", "어디로"]
-                    is_location_intent = any(t in prompt for t in location_intents)
-                    
-                    for loc_name, data in SEOIL_LOCATIONS.items():
-                        # 조건 A: AI 답변에 정확한 '건물 이름'이 포함되어 있으면 표시
-                        if loc_name in ai_msg:
-                            target_location = loc_name
-                            break
-                        
-                        # 조건 B: 사용자가 '위치'를 물어봤고, 질문에 건물명이나 관련 키워드가 있는 경우
-                        if is_location_intent and (loc_name in prompt or any(k in prompt for k in data.get('keywords', []))):
-                             target_location = loc_name
-                             break
-
-                    # 조건이 맞을 때만 지도 표시
-                    if target_location:
-                        data = SEOIL_LOCATIONS[target_location]
-                        map_image = highlight_building_on_image(target_location, data['x'], data['y'])
-                        if map_image: 
-                            st.divider()
-                            st.caption(f"📍 **{target_location}** 위치 안내")
-                            st.image(map_image, caption=f"{target_location} ({data['desc']})", use_container_width=True)
-                                    
-            st.session_state.messages.append({"role": "model", "content": ai_msg})
+                # 조건부 지도 표시 로직 (불필요한 이미지 출력 방지, 조건이 맞을 때만 지도 표시)
+                model_msg = make_message("model", ai_msg, question=prompt)
+                render_location_map(model_msg)
+                                
+            st.session_state.messages.append(model_msg)
             save_chat_log(uid, token, "model", ai_msg)
 
     # 4. 프로필 수정 페이지
@@ -725,11 +959,9 @@ if st.session_state.logged_in:
         
         c1, c2 = st.columns(2)
         uid, token = st.session_state.user_info['uid'], st.session_state.user_info['idToken']
-        db_url = FIREBASE_DB_URL; 
-        if not db_url.endswith('/'): db_url += '/'
         
         if c1.button("저장", type="primary", use_container_width=True):
-            requests.patch(f"{db_url}users/{uid}.json?auth={token}", json={"interests": new_ints})
+            get_firebase_client().db_patch("", token, {f"users/{uid}/interests": new_ints, **interest_increments(curr_ints, new_ints)})
             st.session_state.user_info['interests'] = new_ints; st.session_state.page = 'chat'; st.rerun()
             
         if c2.button("취소", use_container_width=True):
@@ -925,16 +1157,13 @@ else: # 로그인 페이지
 
                 if login_submit:
                     login_payload = {"email": login_email, "password": login_password, "returnSecureToken": True}
-                    response = requests.post(LOGIN_URL, json=login_payload)
+                    client = get_firebase_client()
+                    response = client.identity("signInWithPassword", login_payload)
                     if response.status_code == 200:
                         user_data = response.json()
                         uid, id_token = user_data['localId'], user_data['idToken']
-                        db_url = FIREBASE_DB_URL
-                        if not db_url.endswith('/'): 
-                            db_url += '/'
-                        user_db_url = f"{db_url}users/{uid}.json?auth={id_token}"
                         
-                        name_response = requests.get(user_db_url)
+                        name_response = client.db_get(f"users/{uid}", id_token)
 
                         user_name = "사용자"
                         user_interests = None 
@@ -985,16 +1214,13 @@ else: # 로그인 페이지
                         st.error("비밀번호는 6자리 이상이어야 합니다.")
                     else:
                         signup_payload = {"email": signup_email, "password": signup_password, "returnSecureToken": True}
-                        response = requests.post(SIGNUP_URL, json=signup_payload)
+                        client = get_firebase_client()
+                        response = client.identity("signUp", signup_payload)
                         if response.status_code == 200:
                             user_data = response.json()
                             uid, id_token = user_data['localId'], user_data['idToken']
-                            db_url = FIREBASE_DB_URL
-                            if not db_url.endswith('/'): 
-                                db_url += '/'
-                            user_db_url = f"{db_url}users/{uid}.json?auth={id_token}"
                             user_data_payload = {"name": signup_name, "email": signup_email, "interests": None, "dynamic_keywords": []}
-                            put_response = requests.put(user_db_url, json=user_data_payload)
+                            put_response = client.db_patch("", id_token, {f"users/{uid}": user_data_payload, **new_user_increments()})
                             if put_response.status_code == 200:
                                 st.success("회원가입이 완료되었습니다! '로그인' 탭에서 로그인해주세요.")
                                 st.session_state.page = 'login'
@@ -0,0 +1,51 @@
+# 대시보드 채팅 평탄화 벤치마크: 기존 방식(legacy_flatten) vs 열 단위 변환(build_chat_frame)
+# 사용법: python bench_chat_frame.py [--sizes 10000 100000 1000000] [--users 500]
+import argparse
+import random
+import time
+
+from chat_frame import build_chat_frame, legacy_flatten
+
+SAMPLE_QUESTIONS = ["셔틀버스 시간 알려줘", "학생식당 몇 시까지야?", "도서관 위치 어디야", "장학금 신청 기간", "편의점 어디 있어?"]
+
+
+def make_history(n_messages, n_users, seed=0):
+    rng = random.Random(seed)
+    start = int(time.time() * 1000) - 90 * 24 * 3600 * 1000
+    chats = {}
+    for i in range(n_messages):
+        uid = f"user{rng.randrange(n_users):05d}"
+        ts = start + rng.randrange(90 * 24 * 3600 * 1000)
+        role = "user" if i % 2 == 0 else "model"
+        chats.setdefault(uid, {})[str(ts + i)] = {"role": role, "content": rng.choice(SAMPLE_QUESTIONS), "timestamp": ts + i}
+    return chats
+
+
+def measure(fn, data, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(data)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'messages':>10} | {'legacy (s)':>10} | {'columnar (s)':>12} | {'speedup':>7} | {'legacy MB':>9} | {'columnar MB':>11}")
+    print("-" * 75)
+    for size in args.sizes:
+        data = make_history(size, args.users)
+        repeat = 1 if size >= 1_000_000 else args.repeat
+        legacy_t, legacy_df = measure(legacy_flatten, data, repeat)
+        new_t, new_df = measure(build_chat_frame, data, repeat)
+        assert len(legacy_df) == len(new_df) == size
+        legacy_mb = legacy_df.memory_usage(deep=True).sum() / 1e6
+        new_mb = new_df.memory_usage(deep=True).sum() / 1e6
+        print(f"{size:>10,} | {legacy_t:>10.3f} | {new_t:>12.3f} | {legacy_t / new_t:>6.1f}x | {legacy_mb:>9.1f} | {new_mb:>11.1f}")
@@ -0,0 +1,107 @@
+# 검색 벤치마크: 어휘(BM25) / 벡터(Chroma) / 하이브리드(RRF) / 주제 라우팅 하이브리드의 recall@k와 지연 시간 비교
+# 사용법: python prepare_data.py 로 DB를 만든 뒤
+#         python bench_retrieval.py [--k 3] [--stub-embedder]
+# 정답은 질문마다 기대하는 주제이며, 검색된 청크 첫 줄의 "[주제]"로 판정합니다.
+import argparse
+import statistics
+import time
+
+import chromadb
+
+from bm25_index import BM25_PATH, BM25Index, hybrid_search
+from embedding_pipeline import GeminiEmbedder, StubEmbedder
+from index_manifest import DB_PATH
+from topic_router import TopicRouter
+
+COLLECTION_NAME = "seoil_info_db"
+
+# (질문, 기대 주제)
+QUERIES = [
+    ("2013번 버스 타는 곳", "셔틀버스"),
+    ("셔틀버스 운행 시간 알려줘", "셔틀버스"),
+    ("학교 오는 길 지하철역에서", "셔틀버스"),
+    ("학생식당 운영 시간", "학생식당"),
+    ("학식 메뉴 가격", "학생식당"),
+    ("편의점 어디 있어?", "편의점, 카페"),
+    ("카페 영업시간", "편의점, 카페"),
+    ("도서관 열람실 좌석 예약", "도서관"),
+    ("도서 대출 권수와 기간", "도서관"),
+    ("스터디룸 예약 방법", "스터디공간"),
+    ("PC실 이용 시간", "PC이용, VR실"),
+    ("VR실 사용 신청", "PC이용, VR실"),
+    ("헬스장 이용 안내", "체육시설"),
+    ("휴게실 위치", "휴게공간"),
+    ("수강신청 기간", "학사공지"),
+    ("장학금 신청 공지", "공지사항"),
+    ("학생증 발급 방법", "대학생활메뉴얼"),
+    ("축제 일정", "행사안내"),
+    ("복사기나 프린터 있는 곳", "편의시설"),
+    ("서일대학교 학교 소개", "서일대학교"),
+]
+
+
+def is_relevant(document, topic):
+    return (document or "").startswith(f"[{topic}]")
+
+
+def recall_at_k(results, k):
+    hits = sum(any(is_relevant(doc, topic) for doc in docs[:k]) for docs, topic in results)
+    return hits / len(results) if results else 0.0
+
+
+def run(mode, search, k):
+    results, latencies = [], []
+    for query, topic in QUERIES:
+        started = time.perf_counter()
+        docs = search(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append((docs, topic))
+    return recall_at_k(results, k), latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=10)
+    parser.add_argument("--stub-embedder", action="store_true", help="Gemini 대신 StubEmbedder로 질문을 임베딩합니다. (DB도 stub으로 만든 경우)")
+    args = parser.parse_args()
+
+    bm25 = BM25Index.load(BM25_PATH)
+    if bm25 is None:
+        raise SystemExit(f"어휘 색인({BM25_PATH})이 없습니다. 먼저 python prepare_data.py 를 실행해주세요.")
+    collection = chromadb.PersistentClient(path=DB_PATH).get_collection(name=COLLECTION_NAME)
+
+    if args.stub_embedder:
+        embedder = StubEmbedder()
+    else:
+        import google.generativeai as genai
+        import streamlit as st
+        genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
+        embedder = GeminiEmbedder(task_type="RETRIEVAL_QUERY")
+
+    embed_calls = {"count": 0}
+    router = TopicRouter()
+
+    def vector_search(query, n, where=None):
+        embed_calls["count"] += 1
+        embedding = embedder([query])[0]
+        res = collection.query(query_embeddings=[embedding], n_results=n, where=where)
+        return res['ids'][0], res['documents'][0]
+
+    modes = {
+        "lexical": lambda q: [bm25.document(h.id) for h in bm25.search(q, args.k)],
+        "vector": lambda q: vector_search(q, args.k)[1],
+        "hybrid": lambda q: hybrid_search(q, bm25, vector_search, top_k=args.k, candidates=args.candidates)["documents"],
+        # 주제 라우팅(where 필터) + 하이브리드
+        "routed": lambda q: hybrid_search(q, bm25, vector_search, top_k=args.k, candidates=args.candidates,
+                                          where=router.where_for(q))["documents"],
+    }
+
+    print(f"청크 {len(bm25)}개, 질문 {len(QUERIES)}개, k={args.k}")
+    print(f"{'mode':>8} | {'recall@k':>8} | {'mean (ms)':>9} | {'p95 (ms)':>8} | {'embeds':>6}")
+    print("-" * 54)
+    for mode, search in modes.items():
+        embed_calls["count"] = 0
+        recall, latencies = run(mode, search, args.k)
+        p95 = sorted(latencies)[max(0, round(0.95 * (len(latencies) - 1)))]
+        print(f"{mode:>8} | {recall:>8.2f} | {statistics.mean(latencies):>9.1f} | {p95:>8.1f} | {embed_calls['count']:>6}")
@@ -0,0 +1,115 @@
+# 벡터 검색 벤치마크: Chroma(PersistentClient) vs NumPy memory-map 정확 검색
+# 사용법: python bench_vector_index.py [--sizes 500 5000 50000] [--dim 768] [--queries 200] [--backends numpy chroma]
+# 백엔드마다 별도 프로세스에서 불러와 질의 지연 시간과 상주 메모리(RSS) 증가량을 잽니다.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from vector_index import NumpyVectorIndex, export_vectors
+
+
+def rss_mb():
+    # 현재 프로세스의 상주 메모리 (Linux /proc 기준, 그 외에는 최대 RSS)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def make_data(size, dim, seed=0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.normal(size=(size, dim)).astype(np.float32)
+    ids = [f"chunk_{i:06d}" for i in range(size)]
+    documents = [f"[주제{i % 17}] 본문 {i}" for i in range(size)]
+    return ids, documents, embeddings
+
+
+def chroma_available():
+    try:
+        import chromadb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build(workdir, size, dim, dtype, backends):
+    ids, documents, embeddings = make_data(size, dim)
+    if "chroma" in backends:
+        import chromadb
+        client = chromadb.PersistentClient(path=os.path.join(workdir, "chroma"))
+        collection = client.get_or_create_collection(name="bench")
+        for start in range(0, size, 5000):
+            end = start + 5000
+            collection.add(ids=ids[start:end], documents=documents[start:end], embeddings=embeddings[start:end].tolist())
+    export_vectors(ids, documents, embeddings, dtype=dtype,
+                   vectors_path=os.path.join(workdir, "vectors.npy"), table_path=os.path.join(workdir, "vectors.json"))
+
+
+def child(backend, workdir, dim, n_queries, top_k):
+    """한 백엔드를 불러와 질의하고 결과를 JSON 한 줄로 출력합니다."""
+    queries = np.random.default_rng(1).normal(size=(n_queries, dim)).astype(np.float32)
+    base = rss_mb()
+    started = time.perf_counter()
+    if backend == "chroma":
+        import chromadb
+        index = chromadb.PersistentClient(path=os.path.join(workdir, "chroma")).get_collection(name="bench")
+    else:
+        index = NumpyVectorIndex(os.path.join(workdir, "vectors.npy"), os.path.join(workdir, "vectors.json"))
+    load_ms = (time.perf_counter() - started) * 1000
+    latencies = []
+    for q in queries:
+        started = time.perf_counter()
+        index.query(query_embeddings=[q.tolist()], n_results=top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    print(json.dumps({
+        "load_ms": load_ms,
+        "p50_ms": latencies[len(latencies) // 2],
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "rss_mb": rss_mb() - base,
+    }))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[500, 5000, 50000])
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+    parser.add_argument("--backends", choices=["chroma", "numpy"], nargs="+", default=["chroma", "numpy"])
+    parser.add_argument("--child", choices=["chroma", "numpy"], help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.workdir, args.dim, args.queries, args.top_k)
+        sys.exit(0)
+
+    backends = list(args.backends)
+    if "chroma" in backends and not chroma_available():
+        print("chromadb가 설치되어 있지 않아 NumPy 백엔드만 측정합니다.")
+        backends.remove("chroma")
+
+    print(f"{'vectors':>8} | {'backend':>7} | {'load (ms)':>9} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | {'RSS +MB':>7}")
+    print("-" * 62)
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            build(workdir, size, args.dim, args.dtype, backends)
+            for backend in backends:
+                out = subprocess.run([sys.executable, __file__, "--child", backend, "--workdir", workdir,
+                                      "--dim", str(args.dim), "--queries", str(args.queries), "--top-k", str(args.top_k)],
+                                     capture_output=True, text=True, check=True)
+                r = json.loads(out.stdout.strip().splitlines()[-1])
+                print(f"{size:>8,} | {backend:>7} | {r['load_ms']:>9.1f} | {r['p50_ms']:>8.2f} | {r['p95_ms']:>8.2f} | {r['rss_mb']:>7.1f}")
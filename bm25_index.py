@@ -0,0 +1,174 @@
+import json
+import math
+import os
+import re
+from collections import Counter, namedtuple
+
+from index_manifest import DB_PATH
+from keywords import DEFAULT_STOP_WORDS, strip_particle
+from vector_index import matches_where
+
+# prepare_data.py가 만들어 두는 어휘 색인 문서 표 (청크 id / 본문)
+BM25_PATH = os.path.join(DB_PATH, "bm25_index.json")
+
+_WORD = re.compile(r"\w+")
+
+Hit = namedtuple("Hit", ["id", "score", "coverage"])
+
+
+def analyze(text, ngram_range=(2, 3), stop_words=()):
+    """
+    텍스트를 문자 n-gram 토큰으로 나눕니다.
+    단어마다 끝의 조사를 떼고 n-gram을 만들며, n보다 짧은 단어(예: '책')는 단어 그대로 씁니다.
+    띄어쓰기가 달라도 '2013번', '셔틀버스' 같은 정확한 표현이 겹치는 n-gram으로 맞춰집니다.
+    """
+    lo, hi = ngram_range
+    tokens = []
+    for word in _WORD.findall(str(text).lower()):
+        word = strip_particle(word)
+        if word in stop_words: continue
+        if len(word) < lo:
+            tokens.append(word)
+            continue
+        for n in range(lo, hi + 1):
+            tokens.extend(word[i:i + n] for i in range(len(word) - n + 1))
+    return tokens
+
+
+def analyze_query(text, ngram_range=(2, 3)):
+    # 질문은 '알려줘', '어디' 같은 불용어를 빼고 나눕니다.
+    return analyze(text, ngram_range, DEFAULT_STOP_WORDS)
+
+
+class BM25Index:
+    """
+    청크 본문 위의 문자 n-gram BM25 색인.
+    문서 표(ids/documents)만 디스크에 저장하고, 역색인은 불러올 때 메모리에서 다시 만듭니다.
+    (캠퍼스 정보는 수백 개 청크라 몇 밀리초면 만들어집니다)
+    """
+
+    def __init__(self, ids, documents, k1=1.5, b=0.75, ngram_range=(2, 3), metadatas=None):
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas) if metadatas else [{} for _ in self.ids]
+        self.k1 = k1
+        self.b = b
+        self.ngram_range = tuple(ngram_range)
+        self._position = {cid: i for i, cid in enumerate(self.ids)}
+
+        self._postings = {}  # 토큰 -> [(문서 번호, 빈도), ...]
+        self._doc_len = []
+        for i, doc in enumerate(self.documents):
+            counts = Counter(analyze(doc, self.ngram_range))
+            self._doc_len.append(sum(counts.values()))
+            for token, tf in counts.items():
+                self._postings.setdefault(token, []).append((i, tf))
+        self._avg_len = (sum(self._doc_len) / len(self._doc_len)) if self._doc_len else 0.0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def document(self, chunk_id):
+        i = self._position.get(chunk_id)
+        return self.documents[i] if i is not None else None
+
+    def metadata(self, chunk_id):
+        i = self._position.get(chunk_id)
+        return self.metadatas[i] if i is not None else None
+
+    def idf(self, token):
+        n, df = len(self.ids), len(self._postings.get(token, ()))
+        return math.log(1 + (n - df + 0.5) / (df + 0.5))
+
+    def search(self, query, top_k=10, where=None):
+        """
+        BM25 점수 순으로 Hit(id, score, coverage)를 돌려줍니다.
+        coverage는 질문 토큰의 idf 가중치 중 문서에 실제로 나온 비율(0~1)입니다.
+        where(Chroma 형식 메타데이터 조건)가 있으면 조건에 맞는 청크만 점수를 매깁니다.
+        """
+        if not self.ids: return []
+        allowed = None
+        if where:
+            allowed = {i for i, meta in enumerate(self.metadatas) if matches_where(meta, where)}
+        query_counts = Counter(analyze_query(query, self.ngram_range))
+        if not query_counts: return []
+        scores, matched = {}, {}
+        total_weight = 0.0
+        for token, qtf in query_counts.items():
+            idf = self.idf(token)
+            total_weight += idf
+            for i, tf in self._postings.get(token, ()):
+                if allowed is not None and i not in allowed: continue
+                norm = tf + self.k1 * (1 - self.b + self.b * self._doc_len[i] / self._avg_len)
+                scores[i] = scores.get(i, 0.0) + qtf * idf * tf * (self.k1 + 1) / norm
+                matched[i] = matched.get(i, 0.0) + idf
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [Hit(self.ids[i], scores[i], matched[i] / total_weight if total_weight else 0.0) for i in ranked]
+
+    def save(self, path=BM25_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"ids": self.ids, "documents": self.documents, "k1": self.k1, "b": self.b,
+                       "ngram_range": list(self.ngram_range), "metadatas": self.metadatas}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=BM25_PATH):
+        """저장된 색인을 불러옵니다. 파일이 없으면 None."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return cls(data["ids"], data["documents"], k1=data.get("k1", 1.5), b=data.get("b", 0.75),
+                   ngram_range=data.get("ngram_range", (2, 3)), metadatas=data.get("metadatas"))
+
+
+def is_decisive(hits, min_coverage=0.7, margin=1.5):
+    """
+    어휘 검색 결과만으로 충분한지 판단합니다.
+    1위 문서가 질문 토큰을 대부분(min_coverage 이상) 포함하고, 2위보다 margin배 이상 높을 때 True.
+    """
+    if not hits or hits[0].coverage < min_coverage: return False
+    return len(hits) == 1 or hits[0].score >= margin * hits[1].score
+
+
+def reciprocal_rank_fusion(rankings, k=60, top_k=None, with_scores=False):
+    """여러 순위 목록(id 리스트)을 역순위 합(RRF)으로 합칩니다. with_scores면 (id, 점수) 목록."""
+    fused = {}
+    for ranking in rankings:
+        for rank, cid in enumerate(ranking):
+            fused[cid] = fused.get(cid, 0.0) + 1.0 / (k + rank + 1)
+    ordered = sorted(fused, key=fused.get, reverse=True)
+    ordered = ordered[:top_k] if top_k else ordered
+    return [(cid, fused[cid]) for cid in ordered] if with_scores else ordered
+
+
+def hybrid_search(query, index, vector_search=None, top_k=3, candidates=10, rrf_k=60, where=None):
+    """
+    어휘(BM25) 검색과 벡터 검색 결과를 RRF로 합칩니다.
+
+    vector_search(query, n, where)는 (ids, documents)를 돌려주는 함수로, 어휘 점수만으로 결정적이면
+    호출하지 않습니다. (원격 질문 임베딩을 건너뜁니다)
+    where는 두 검색에 똑같이 적용할 메타데이터 조건입니다.
+    벡터 검색이 실패하면 어휘 결과만으로 답합니다.
+    반환: {"ids", "documents", "scores"(RRF), "metadatas", "decisive"(어휘 결과만 썼는지)}
+    """
+    lexical = index.search(query, candidates, where) if index is not None else []
+    decisive = is_decisive(lexical)
+    rankings = [[hit.id for hit in lexical]]
+    documents = {}
+    if vector_search is not None and not decisive:
+        try:
+            vector_ids, vector_docs = vector_search(query, candidates, where)
+            documents.update(zip(vector_ids, vector_docs))
+            rankings.append(list(vector_ids))
+        except Exception:
+            if not lexical: raise
+    fused = reciprocal_rank_fusion(rankings, rrf_k, top_k, with_scores=True)
+    ids = [cid for cid, _ in fused]
+    docs = [documents.get(cid) or (index.document(cid) if index is not None else None) for cid in ids]
+    metas = [(index.metadata(cid) if index is not None else None) or {} for cid in ids]
+    return {"ids": ids, "documents": docs, "scores": [score for _, score in fused], "metadatas": metas,
+            "decisive": decisive}
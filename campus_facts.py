@@ -0,0 +1,167 @@
+import re
+from collections import namedtuple
+
+from location_matcher import AhoCorasick
+
+# 자주 묻는 고정 정보 (예전 sys_inst의 [서일대학교 핵심 고정 정보])
+# 시설 -> 이름 / 질문에서 찾을 별칭 / 위치(또는 타는 곳) / 운영시간 / 비고
+CAMPUS_FACTS = {
+    "subway": {"name": "지하철", "group": "찾아오시는 길",
+               "aliases": ["지하철", "전철", "7호선", "면목역", "서일대입구"],
+               "location": "7호선 면목역(서일대입구) 2번 출구", "hours": None, "notes": None},
+    "bus_blue": {"name": "파랑(간선)버스", "group": "찾아오시는 길",
+                 "aliases": ["간선버스", "파란버스", "파랑버스", "271번"],
+                 "location": "271번 (서일대 하차)", "hours": None, "notes": None},
+    "bus_green": {"name": "녹색(지선)버스", "group": "찾아오시는 길",
+                  "aliases": ["지선버스", "초록버스", "녹색버스", "2013번", "2230번", "1213번"],
+                  "location": "2013번, 2230번, 1213번", "hours": None, "notes": None},
+    "bus_yellow": {"name": "노랑(마을)버스", "group": "찾아오시는 길",
+                   "aliases": ["마을버스", "노란버스", "노랑버스", "중랑2번", "중랑02"],
+                   "location": "중랑2번", "hours": None, "notes": None},
+    "shuttle": {"name": "대학 셔틀버스", "group": "찾아오시는 길",
+                "aliases": ["셔틀", "셔틀버스", "스쿨버스", "통학버스"],
+                "location": "망우역 1번 출구 역앞 로터리 / 면목역 2번 출구 버스정류장 위",
+                "hours": "학기 중 평일 오전 08:30 ~ 10:30 (20~25분 간격)",
+                "notes": "운행시간 외에는 운행하지 않습니다."},
+    "cafeteria": {"name": "학생식당", "group": "주요 편의시설",
+                  "aliases": ["학생식당", "학식", "식당", "구내식당"],
+                  "location": "동아리관 2F", "hours": "11:00 ~ 13:30", "notes": None},
+    "convenience_store": {"name": "편의점(emart24)", "group": "주요 편의시설",
+                          "aliases": ["편의점", "이마트24", "emart24", "매점"],
+                          "location": "배양관 B2", "hours": "오전 08:00 ~ 오후 17:00 (학기 중 운영)", "notes": None},
+    "cafe": {"name": "카페(CAFEING)", "group": "주요 편의시설",
+             "aliases": ["카페", "cafeing", "커피"],
+             "location": "흥학관 2F", "hours": "평일 09:00 ~ 18:00", "notes": None},
+    "printer": {"name": "프린터", "group": "주요 편의시설",
+                "aliases": ["프린터", "프린트", "인쇄", "출력"],
+                "location": "배양관 1F, 도서관 1F", "hours": "항시 운영", "notes": None},
+    "atm": {"name": "ATM", "group": "주요 편의시설",
+            "aliases": ["atm", "현금인출기", "에이티엠", "현금 인출"],
+            "location": "누리관 2F 학생 테라스, 흥학관 2F", "hours": "항시 운영", "notes": None},
+}
+
+# 여러 시설을 한꺼번에 가리키는 말
+GROUP_ALIASES = {
+    "버스": ["bus_blue", "bus_green", "bus_yellow", "shuttle"],
+    "찾아오는 길": ["subway", "bus_blue", "bus_green", "bus_yellow", "shuttle"],
+    "찾아오시는 길": ["subway", "bus_blue", "bus_green", "bus_yellow", "shuttle"],
+    "오시는 길": ["subway", "bus_blue", "bus_green", "bus_yellow", "shuttle"],
+    "오는 길": ["subway", "bus_blue", "bus_green", "bus_yellow", "shuttle"],
+    "오는 방법": ["subway", "bus_blue", "bus_green", "bus_yellow", "shuttle"],
+    "가는 방법": ["subway", "bus_blue", "bus_green", "bus_yellow", "shuttle"],
+    "대중교통": ["subway", "bus_blue", "bus_green", "bus_yellow"],
+}
+
+# 질문이 묻는 항목(slot)
+SLOT_CUES = {
+    "hours": ["몇 시", "몇시", "시간", "언제", "운영", "영업", "열어", "여나", "닫아", "닫나", "까지", "부터", "운행"],
+    "location": ["어디", "위치", "몇 층", "몇층", "장소", "타는 곳", "타는곳", "정류장", "출구", "있어", "있나", "가는", "오는", "몇 번", "몇번"],
+}
+
+# 고정 정보로는 답할 수 없는 내용 (이런 단어가 있으면 LLM 경로로 보냅니다)
+UNSURE_CUES = ["메뉴", "가격", "얼마", "휴무", "주말", "토요일", "일요일", "방학", "오늘", "내일", "공휴일",
+               "추천", "맛있", "왜", "변경", "바뀌", "혹시", "말고"]
+
+FactMatch = namedtuple("FactMatch", ["facts", "slots", "confident", "answer"])
+
+
+def _has_final_consonant(word):
+    # 괄호 안 부가 설명은 빼고 마지막 글자의 받침을 봅니다. (영문은 l/m/n/r 로 끝나면 받침으로 읽습니다)
+    ch = re.sub(r"\(.*?\)", "", word).strip()[-1:].lower() or " "
+    if "가" <= ch <= "힣":
+        return (ord(ch) - ord("가")) % 28 != 0
+    return ch in "013678lmnr"
+
+
+def topic_particle(word):
+    return word + ("은" if _has_final_consonant(word) else "는")
+
+
+def render_facts(keys, facts=CAMPUS_FACTS):
+    """시설 목록을 sys_inst에 넣을 마크다운으로 만듭니다. (예전 [핵심 고정 정보]와 같은 형식)"""
+    lines, group = [], None
+    for key in keys:
+        fact = facts[key]
+        if fact["group"] != group:
+            group = fact["group"]
+            lines.append(f"**{group}**")
+        lines.append(f"* **{fact['name']}**: {fact['location']}")
+        if fact["hours"]: lines.append(f"    * **운영시간**: {fact['hours']}")
+        if fact["notes"]: lines.append(f"    * **비고**: {fact['notes']}")
+    return "\n".join(lines)
+
+
+class FactMatcher:
+    """
+    질문에서 시설(intent)과 묻는 항목(slot: 위치/운영시간)을 찾아 고정 정보로 바로 답합니다.
+
+    - 시설 별칭, 묶음 별칭, slot 단서, 불확실 단서를 하나의 Aho-Corasick 오토마톤으로 한 번에 찾습니다.
+    - 더 긴 단어 안에 들어 있는 짧은 별칭(예: '셔틀버스' 안의 '버스')은 무시합니다.
+    - 묶음 별칭은 그 묶음의 시설을 질문이 직접 가리키지 않았을 때만 펼칩니다. ("2013번 버스" -> 녹색버스만)
+    - 시설과 slot이 모두 있고, 찾은 시설마다 물은 slot의 값이 있고, 불확실 단서가 없고, 질문이 짧을 때만
+      confident=True이며 템플릿 답변을 만듭니다. (예: 지하철 운영시간은 표에 없으므로 LLM 경로)
+      그 밖에는 찾은 시설만 LLM 프롬프트에 넣도록 facts 목록만 돌려줍니다.
+    """
+
+    def __init__(self, facts=CAMPUS_FACTS, group_aliases=GROUP_ALIASES, slot_cues=SLOT_CUES,
+                 unsure_cues=UNSURE_CUES, max_question_length=40):
+        self.facts = facts
+        self.max_question_length = max_question_length
+        entries = {}
+        for key, fact in facts.items():
+            for alias in fact["aliases"]:
+                entries.setdefault(alias.lower(), []).append(("fact", key))
+        for alias, keys in group_aliases.items():
+            entries.setdefault(alias.lower(), []).append(("group", tuple(keys)))
+        for slot, cues in slot_cues.items():
+            for cue in cues:
+                entries.setdefault(cue, []).append(("slot", slot))
+        for cue in unsure_cues:
+            entries.setdefault(cue, []).append(("unsure", None))
+        self._entries = entries
+        self._automaton = AhoCorasick(entries)
+
+    def _matches(self, text):
+        spans = [(start, end, self._automaton.patterns[pid]) for start, end, pid in self._automaton.iter(text)]
+        # 같은 종류의 더 긴 일치 안에 완전히 들어가는 짧은 일치는 버립니다.
+        fact_spans = [(s, e) for s, e, w in spans if any(k in ("fact", "group") for k, _ in self._entries[w])]
+        result = []
+        for start, end, word in spans:
+            for kind, value in self._entries[word]:
+                if kind in ("fact", "group") and any(s <= start and end <= e and (e - s) > (end - start) for s, e in fact_spans):
+                    continue
+                result.append((start, kind, value))
+        return sorted(result, key=lambda m: m[0])
+
+    def match(self, question):
+        text = str(question or "").lower()
+        facts, groups, slots, unsure = [], [], [], False
+        for _, kind, value in self._matches(text):
+            if kind == "fact" and value not in facts: facts.append(value)
+            elif kind == "group": groups.append(value)
+            elif kind == "slot" and value not in slots: slots.append(value)
+            elif kind == "unsure": unsure = True
+        named = set(facts)
+        for keys in groups:
+            if named.isdisjoint(keys):
+                facts.extend(key for key in keys if key not in facts)
+        answerable = all(self.facts[key][slot] for key in facts for slot in slots)
+        confident = bool(facts and slots and answerable and not unsure and len(text.strip()) <= self.max_question_length)
+        return FactMatch(facts, slots, confident, self.answer(facts, slots) if confident else None)
+
+    def answer(self, keys, slots):
+        """템플릿 답변. 위치를 물으면 위치, 시간을 물으면 운영시간을 답하고 비고를 덧붙입니다."""
+        lines = []
+        for key in keys:
+            fact = self.facts[key]
+            name = fact["name"]
+            if "location" in slots or not fact["hours"]:
+                if fact["group"] == "찾아오시는 길":
+                    lines.append(f"🚌 **{name}**: {fact['location']}")
+                else:
+                    lines.append(f"📍 {topic_particle(name)} **{fact['location']}**에 있어요.")
+            if "hours" in slots and fact["hours"]:
+                lines.append(f"🕒 {name} 운영시간은 **{fact['hours']}**이에요.")
+            if fact["notes"]:
+                lines.append(f"※ {fact['notes']}")
+        return "\n\n".join(lines)
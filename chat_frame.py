@@ -0,0 +1,75 @@
+from datetime import datetime
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+# 서버 로컬 시간대 (기존 time.localtime 기반 날짜 계산과 같은 기준)
+LOCAL_TZ = datetime.now().astimezone().tzinfo
+
+ROLE_CATEGORIES = ["user", "model"]
+
+
+def build_chat_frame(chats_data):
+    """
+    chat_history 트리({uid: {timestamp: {role, content, ...}}})를 열 단위로 바로 모아 DataFrame을 만듭니다.
+
+    메시지마다 딕셔너리를 만들지 않고 uid/timestamp/role/content 배열을 채운 뒤,
+    타임스탬프는 한 번의 벡터 연산으로 datetime으로 바꿉니다.
+    결과 열: uid(category), timestamp(int64, ms), datetime(datetime64), date(datetime64, 자정 기준),
+             role(category, user/model 외의 값은 NaN), content(object)
+    """
+    uid_list, counts, timestamps, role_codes, contents = [], [], [], [], []
+    role_index = {role: i for i, role in enumerate(ROLE_CATEGORIES)}
+    for uid, timestamp_dict in (chats_data or {}).items():
+        if not timestamp_dict: continue
+        messages = timestamp_dict.values()
+        uid_list.append(uid)
+        counts.append(len(timestamp_dict))
+        try:
+            keys = list(map(int, timestamp_dict.keys()))
+        except ValueError:
+            # 타임스탬프가 아닌 키가 섞인 경우 해당 키만 0으로 처리합니다.
+            keys = [int(k) if str(k).isdigit() else 0 for k in timestamp_dict.keys()]
+        timestamps.extend(keys)
+        try:
+            roles = [m.get('role') for m in messages]
+            contents.extend([m.get('content') for m in messages])
+        except AttributeError:
+            # 메시지가 딕셔너리가 아닌 잘못된 항목이 섞인 경우
+            roles = [m.get('role') if isinstance(m, dict) else None for m in messages]
+            contents.extend([m.get('content') if isinstance(m, dict) else None for m in messages])
+        role_codes.extend(map(role_index.get, roles, repeat(-1)))
+
+    ts = np.array(timestamps, dtype=np.int64)
+    dt = (pd.to_datetime(ts, unit='ms', utc=True)
+          .tz_convert(LOCAL_TZ)
+          .tz_localize(None))
+    # 범주형 열은 코드 배열로 바로 만들어 문자열 비교를 피합니다.
+    uid_codes = np.repeat(np.arange(len(uid_list), dtype=np.int32), counts)
+    frame = pd.DataFrame({
+        "uid": pd.Categorical.from_codes(uid_codes, categories=uid_list),
+        "timestamp": ts,
+        "datetime": dt,
+        "date": dt.normalize(),
+        "role": pd.Categorical.from_codes(np.array(role_codes, dtype=np.int8), categories=ROLE_CATEGORIES),
+        "content": pd.Series(contents, dtype=object),
+    })
+    return frame
+
+
+def legacy_flatten(chats_data):
+    """이전 대시보드 방식(메시지별 time.strftime + dict 리스트). 벤치마크 비교용."""
+    import time
+    all_chat_records = []
+    if chats_data:
+        for uid, timestamp_dict in chats_data.items():
+            if timestamp_dict:
+                for ts, msg_info in timestamp_dict.items():
+                    dt = time.strftime('%Y-%m-%d', time.localtime(int(ts)/1000))
+                    all_chat_records.append({
+                        "date": dt,
+                        "role": msg_info.get('role'),
+                        "content": msg_info.get('content')
+                    })
+    return pd.DataFrame(all_chat_records)
@@ -0,0 +1,224 @@
+import atexit
+import json
+import os
+import queue
+import random
+import threading
+import time
+
+import requests
+
+
+class ChatLogWriter:
+    """
+    채팅 기록을 백그라운드 스레드에서 Firebase Realtime Database에 저장합니다.
+
+    - log()는 큐에 넣기만 하므로 UI 스레드는 기다리지 않습니다.
+    - 모인 메시지는 사용자별로 묶어 한 번의 멀티 경로 PATCH(chat_history/{uid}/{timestamp} ...)로 보냅니다.
+      extra_updates_fn(uid, messages)가 돌려주는 경로(집계 카운터 등)도 같은 요청에 함께 씁니다.
+    - 실패하면 지수 백오프로 재시도하고, 그래도 안 되면 로컬 저널(JSON Lines)에 남겼다가
+      나중에 다시 보냅니다. 저널은 재전송이 성공한 뒤에야 남은 기록만으로 원자적으로(임시 파일 + os.replace) 다시 씁니다.
+    - 멀티 경로 PATCH는 원자적이라 메시지가 저장됐으면 카운터도 반영된 것입니다. 응답을 받지 못한 뒤의 재시도와
+      저널 재전송 전에는 메시지 키가 이미 있는지 먼저 조회해, 저장된 메시지(와 그 증가 연산)는 다시 보내지 않습니다.
+      조회에 실패하면 보내지 않고 다음 기회로 미룹니다. (증가 연산이 두 번 반영되지 않도록)
+    - 요청은 공용 FirebaseClient(client)로 보냅니다. 그 계층은 PATCH를 상태 코드로 재시도하지 않으므로
+      PATCH 재시도는 모두 여기서(저장 여부 확인 후) 합니다.
+    """
+
+    def __init__(self, client, journal_path="./cache/chat_log_journal.jsonl",
+                 batch_window=0.5, max_batch=50, retries=4, backoff=0.5,
+                 replay_interval=30.0, extra_updates_fn=None, start=True):
+        self.client = client
+        self.journal_path = journal_path
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.retries = retries
+        self.backoff = backoff
+        self.replay_interval = replay_interval
+        self.extra_updates_fn = extra_updates_fn
+
+        self.sent = 0
+        self.failed = 0
+        self.journaled = self._count_journal()   # 로컬 저널에 남아 있는(다시 보낼) 기록 수
+
+        self._queue = queue.Queue()
+        self._tokens = {}         # uid -> 가장 최근 인증 토큰
+        self._last_ts = {}        # uid -> 마지막으로 사용한 타임스탬프 (키 충돌 방지)
+        self._lock = threading.Lock()
+        self._journal_lock = threading.Lock()
+        self._last_replay = 0.0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="chat-log-writer", daemon=True)
+        # start=False면 스레드를 띄우지 않습니다. (테스트에서 _send/_maybe_replay를 직접 부를 때)
+        if start: self._thread.start()
+        atexit.register(self.close)
+
+    # --- UI 스레드에서 호출 ---
+    def log(self, uid, token, role, message):
+        if not uid or not token: return
+        with self._lock:
+            timestamp = int(time.time() * 1000)
+            if timestamp <= self._last_ts.get(uid, 0):
+                timestamp = self._last_ts[uid] + 1
+            self._last_ts[uid] = timestamp
+            self._tokens[uid] = token
+        self._queue.put({"uid": uid, "key": str(timestamp),
+                         "data": {"role": role, "content": message, "timestamp": timestamp}})
+
+    def flush(self, timeout=10.0):
+        """큐가 빌 때까지 기다립니다. (종료 시점 등)"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def close(self):
+        self.flush()
+        self._stopped.set()
+
+    def stats(self):
+        return {"queued": self._queue.qsize(), "sent": self.sent, "failed": self.failed, "journaled": self.journaled}
+
+    # --- 백그라운드 스레드 ---
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                first = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                self._maybe_replay()
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._send(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            self._maybe_replay()
+
+    def _group(self, records):
+        grouped = {}
+        for record in records:
+            grouped.setdefault(record["uid"], {})[record["key"]] = record["data"]
+        return grouped
+
+    def _existing_keys(self, uid, keys):
+        """chat_history/{uid} 에 이미 저장된 키 집합. 조회에 실패하면 None."""
+        token = self._tokens.get(uid)
+        params = {"orderBy": '"$key"', "startAt": json.dumps(min(keys)), "endAt": json.dumps(max(keys))}
+        try:
+            response = self.client.db_get(f"chat_history/{uid}", token, params=params)
+        except requests.RequestException:
+            return None
+        if response.status_code != 200:
+            return None
+        return set(response.json() or {}) & set(keys)
+
+    def _patch(self, uid, updates, verify=False):
+        """
+        사용자 한 명의 메시지를 저장하고, 저장하지 못한 메시지 {key: data}를 돌려줍니다. (모두 저장했으면 {})
+        verify=True(저널 재전송)이거나 앞선 시도의 결과를 알 수 없으면, 보내기 전에 이미 저장된 키를 빼고 보냅니다.
+        """
+        token = self._tokens.get(uid)
+        pending = dict(updates)
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * (2 ** (attempt - 1)) + random.uniform(0, self.backoff))
+            if verify:
+                existing = self._existing_keys(uid, list(pending))
+                if existing is None: continue
+                for key in existing: pending.pop(key)
+                if not pending: return {}
+            body = {f"chat_history/{uid}/{key}": data for key, data in pending.items()}
+            if self.extra_updates_fn:
+                body.update(self.extra_updates_fn(uid, list(pending.values())))
+            try:
+                response = self.client.db_patch("", token, body)
+            except requests.RequestException:
+                # 서버가 이미 반영했을 수 있으므로 다음 시도부터는 저장 여부를 먼저 확인합니다.
+                verify = True
+                continue
+            if response.status_code == 200:
+                return {}
+            # 권한 오류(만료된 토큰 등)는 재시도해도 소용없으므로 바로 저널로 넘깁니다.
+            if response.status_code in (401, 403):
+                return pending
+            # 5xx는 반영 여부를 알 수 없고, 그 밖의 오류는 반영되지 않은 것입니다.
+            verify = verify or response.status_code >= 500
+        return pending
+
+    def _send(self, records, verify=False, journal=True):
+        """기록을 보내고 저장하지 못한 기록 목록을 돌려줍니다. journal=True면 그 기록을 저널에 덧붙입니다."""
+        failed = []
+        for uid, updates in self._group(records).items():
+            unsent = self._patch(uid, updates, verify)
+            self.sent += len(updates) - len(unsent)
+            if unsent:
+                self.failed += len(unsent)
+                failed.extend({"uid": uid, "key": key, "data": data} for key, data in unsent.items())
+        if failed and journal:
+            self._append_journal(failed)
+        return failed
+
+    # --- 로컬 저널 ---
+    def _count_journal(self):
+        if not self.journal_path or not os.path.exists(self.journal_path): return 0
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+
+    def _read_journal(self):
+        if not os.path.exists(self.journal_path): return []
+        records = []
+        with open(self.journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+        return records
+
+    def _rewrite_journal(self, records):
+        # 중간에 프로세스가 죽어도 이전 저널이나 새 저널 중 하나는 온전히 남도록 임시 파일을 바꿔치기합니다.
+        if not records:
+            if os.path.exists(self.journal_path): os.remove(self.journal_path)
+        else:
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.journal_path)
+        self.journaled = len(records)
+
+    def _append_journal(self, records):
+        if not self.journal_path: return
+        with self._journal_lock:
+            os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.journaled += len(records)
+
+    def _maybe_replay(self):
+        if not self.journal_path or time.monotonic() - self._last_replay < self.replay_interval:
+            return
+        self._last_replay = time.monotonic()
+        with self._journal_lock:
+            records = self._read_journal()
+        # 토큰을 알 수 없는 사용자(재시작 후 아직 로그인하지 않은 경우)의 기록은 저널에 그대로 두고 다음 기회로 미룹니다.
+        ready = [r for r in records if r["uid"] in self._tokens]
+        if not ready: return
+        # 응답을 받지 못한 채 저널로 넘어온 기록일 수 있으므로 저장 여부를 확인하고 보냅니다.
+        # 보내는 동안 저널 파일은 그대로 두므로, 도중에 죽어도 다음 실행에서 다시 확인하고 보냅니다.
+        unsent = self._send(ready, verify=True, journal=False)
+        done = {(r["uid"], r["key"]) for r in ready} - {(r["uid"], r["key"]) for r in unsent}
+        with self._journal_lock:
+            # 그 사이 덧붙은 기록도 남기고, 저장을 확인한 기록만 뺍니다.
+            self._rewrite_journal([r for r in self._read_journal() if (r["uid"], r["key"]) not in done])
@@ -0,0 +1,210 @@
+import re
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+from tokens import estimate_tokens, truncate_to_tokens
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# 통째로 하나의 블록으로 취급하는 태그
+LEAF_BLOCK_TAGS = {"p", "dt", "dd", "pre", "blockquote", "address", "figcaption"}
+LIST_TAGS = {"ul", "ol"}
+SKIP_TAGS = {"script", "style", "noscript", "nav", "header", "footer", "form", "button", "select", "iframe"}
+INLINE_TAGS = {"a", "span", "strong", "b", "em", "i", "u", "small", "sup", "sub", "font", "label", "img", "br"}
+
+# 문장 경계 (마침표/물음표/느낌표 뒤 공백, 또는 줄바꿈)
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.?!。])\s+|\n+')
+
+
+def _clean(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _table_rows(table):
+    """표의 각 행을 '열 이름: 값 | 열 이름: 값' 형태의 한 줄로 만듭니다."""
+    rows = []
+    headers = []
+    for tr in table.find_all("tr"):
+        ths = tr.find_all("th", recursive=False)
+        tds = tr.find_all("td", recursive=False)
+        if ths and not tds and not headers:
+            headers = [_clean(th.get_text(" ")) for th in ths]
+            continue
+        cells = [_clean(c.get_text(" ")) for c in tr.find_all(["th", "td"], recursive=False)]
+        if not any(cells):
+            continue
+        if headers and len(headers) == len(cells):
+            row = " | ".join(f"{h}: {c}" if h else c for h, c in zip(headers, cells) if c)
+        else:
+            row = " | ".join(c for c in cells if c)
+        rows.append(row)
+    return rows
+
+
+def extract_blocks(root):
+    """
+    DOM을 순회하며 (섹션 제목, 텍스트) 블록 목록을 만듭니다.
+    제목 태그는 섹션을 바꾸고, 표는 행 단위, 목록은 항목 단위로 나뉩니다.
+    """
+    blocks = []
+    state = {"section": ""}
+
+    def walk(node):
+        inline_buf = []
+
+        def flush():
+            text = _clean(" ".join(inline_buf))
+            inline_buf.clear()
+            if text:
+                blocks.append((state["section"], text))
+
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if child.__class__.__name__ in ("Comment", "Doctype"):
+                    continue
+                inline_buf.append(str(child))
+                continue
+            if not isinstance(child, Tag) or child.name in SKIP_TAGS:
+                continue
+
+            name = child.name
+            if name in INLINE_TAGS:
+                inline_buf.append(child.get_text(" "))
+            elif name in HEADING_TAGS:
+                flush()
+                title = _clean(child.get_text(" "))
+                if title:
+                    state["section"] = title
+            elif name == "table":
+                flush()
+                caption = child.find("caption")
+                if caption and _clean(caption.get_text(" ")):
+                    state["section"] = _clean(caption.get_text(" "))
+                for row in _table_rows(child):
+                    blocks.append((state["section"], row))
+            elif name in LIST_TAGS:
+                flush()
+                for li in child.find_all("li", recursive=False):
+                    text = _clean(li.get_text(" "))
+                    if text:
+                        blocks.append((state["section"], f"- {text}"))
+            elif name in LEAF_BLOCK_TAGS:
+                flush()
+                text = _clean(child.get_text(" "))
+                if text:
+                    blocks.append((state["section"], text))
+            else:
+                flush()
+                walk(child)
+        flush()
+
+    walk(root)
+    return blocks
+
+
+def _split_long_block(text, max_tokens):
+    """max_tokens를 넘는 블록을 문장 -> 단어 경계 순으로 잘게 나눕니다."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+    pieces = []
+    current = ""
+    for sentence in SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        candidate = f"{current} {sentence}".strip()
+        if estimate_tokens(candidate) <= max_tokens:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        current = ""
+        # 문장 하나가 예산보다 길면 단어 경계에서 자릅니다.
+        while estimate_tokens(sentence) > max_tokens:
+            head = truncate_to_tokens(sentence, max_tokens)
+            if not head:
+                break
+            pieces.append(head)
+            sentence = sentence[len(head):].strip()
+        current = sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def pack_blocks(blocks, topic, url, max_tokens=300, overlap_tokens=40):
+    """
+    블록들을 토큰 예산(max_tokens) 안에서 청크로 묶습니다.
+    같은 섹션 안에서 예산 때문에 청크가 나뉠 때는 앞 청크의 마지막 블록들을 overlap_tokens만큼 이어 붙입니다.
+    각 청크 본문 첫 줄에는 [주제] 섹션 제목이 들어갑니다.
+    """
+    chunks = []
+    current = []       # 현재 청크의 (섹션, 텍스트) 블록들
+    current_tokens = 0
+
+    def header_for(section):
+        return f"[{topic}] {section}" if section else f"[{topic}]"
+
+    def emit():
+        if not current:
+            return
+        sections = []
+        for section, _ in current:
+            if section and section not in sections:
+                sections.append(section)
+        lines = [header_for(current[0][0])]
+        last_section = current[0][0]
+        for section, text in current:
+            if section != last_section and section:
+                lines.append(section)
+                last_section = section
+            lines.append(text)
+        chunks.append({
+            "topic": topic,
+            "url": url,
+            "section": " / ".join(sections),
+            "content": "\n".join(lines),
+        })
+
+    for section, text in blocks:
+        header_tokens = estimate_tokens(header_for(section))
+        budget = max(20, max_tokens - header_tokens)
+        for piece in _split_long_block(text, budget):
+            piece_tokens = estimate_tokens(piece)
+            # 새 섹션 제목이 한 줄 추가되는 비용
+            section_tokens = estimate_tokens(section) if current and section != current[-1][0] else 0
+            if current and current_tokens + section_tokens + piece_tokens > budget:
+                same_section = current[-1][0] == section
+                emit()
+                carry = []
+                if same_section and overlap_tokens > 0:
+                    carried_tokens = 0
+                    for block in reversed(current):
+                        block_tokens = estimate_tokens(block[1])
+                        if carried_tokens + block_tokens > overlap_tokens:
+                            break
+                        carry.insert(0, block)
+                        carried_tokens += block_tokens
+                    # 이어 붙인 블록과 새 조각이 함께 예산을 넘으면 앞쪽 블록부터 뺍니다.
+                    while carry and carried_tokens + piece_tokens > budget:
+                        carried_tokens -= estimate_tokens(carry.pop(0)[1])
+                current = carry
+                current_tokens = sum(estimate_tokens(b[1]) for b in carry)
+                section_tokens = 0
+            current.append((section, piece))
+            current_tokens += section_tokens + piece_tokens
+    emit()
+    return chunks
+
+
+def chunk_page(topic, url, html, max_tokens=300, overlap_tokens=40):
+    """
+    scrape 결과 HTML을 id='_contentBuilder' 구조에 맞춰 청크로 나눕니다.
+    콘텐츠 영역이 없으면 페이지 전체(nav/header/footer 제외)를 사용합니다.
+    각 청크는 {"topic", "url", "section", "content"} 딕셔너리입니다.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    root = soup.find(id='_contentBuilder')
+    if root is None:
+        print(f"  -> WARN: '{topic}' 페이지에서 id='_contentBuilder' 영역을 찾지 못했습니다. 전체 페이지를 청킹합니다.")
+        root = soup.body or soup
+    return pack_blocks(extract_blocks(root), topic, url, max_tokens=max_tokens, overlap_tokens=overlap_tokens)
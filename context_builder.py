@@ -0,0 +1,85 @@
+import re
+
+from tokens import estimate_tokens, truncate_to_tokens
+
+_SPACES = re.compile(r"\s+")
+
+
+def shingles(text, k=5):
+    """공백을 정리한 문자 k-gram 집합. 짧은 글은 글 전체를 하나의 shingle로 씁니다."""
+    text = _SPACES.sub(" ", str(text or "")).strip()
+    if len(text) <= k: return {text} if text else set()
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def overlap(a, b):
+    """두 shingle 집합의 겹침 정도. 작은 쪽 기준(포함 비율)이라 한 청크가 다른 청크의 일부여도 1에 가깝습니다."""
+    if not a or not b: return 0.0
+    return len(a & b) / min(len(a), len(b))
+
+
+def split_header(document, metadata=None):
+    """청크 첫 줄의 "[주제] 섹션" 머리말과 본문을 나눕니다. (주제, 섹션, 본문)"""
+    metadata = metadata or {}
+    topic, section = metadata.get("topic", ""), metadata.get("section", "")
+    first, _, body = str(document).partition("\n")
+    match = re.match(r"^\[([^\]]+)\]\s*(.*)$", first)
+    if match:
+        return topic or match.group(1), section or match.group(2), body
+    return topic, section, document
+
+
+def build_context(candidates, token_budget=900, max_chunks=5, mmr_lambda=0.7, duplicate_threshold=0.8,
+                  min_chunk_tokens=60):
+    """
+    검색 후보를 프롬프트의 [참고 정보]로 조립합니다.
+
+    candidates: 관련도 순서의 [{"id", "document", "score", "metadata"}] (score가 없으면 순위로 계산)
+    1) 앞서 고른 청크와 shingle이 duplicate_threshold 이상 겹치는 후보는 버립니다. (겹치는 조각/반복 안내문)
+    2) MMR: mmr_lambda * 관련도 - (1 - mmr_lambda) * 이미 고른 청크와의 최대 유사도 로 다음 청크를 고릅니다.
+    3) 청크마다 "[출처 n] 주제 > 섹션" 꼬리표를 붙여 token_budget 안에 채웁니다.
+       남은 예산이 min_chunk_tokens 이상이면 마지막 청크는 잘라서라도 넣습니다.
+    반환: {"text", "ids", "documents", "tokens"}
+    """
+    if not candidates:
+        return {"text": "", "ids": [], "documents": [], "tokens": 0}
+    scores = [c.get("score") for c in candidates]
+    if any(s is None for s in scores):
+        scores = [1.0 / (rank + 1) for rank in range(len(candidates))]
+    top = max(scores) or 1.0
+    relevance = [s / top for s in scores]
+    grams = [shingles(c["document"]) for c in candidates]
+
+    selected = []
+    remaining = list(range(len(candidates)))
+    while remaining and len(selected) < max_chunks:
+        best, best_value = None, None
+        for i in list(remaining):
+            similarity = max((overlap(grams[i], grams[j]) for j in selected), default=0.0)
+            if similarity >= duplicate_threshold:
+                remaining.remove(i)
+                continue
+            value = mmr_lambda * relevance[i] - (1 - mmr_lambda) * similarity
+            if best_value is None or value > best_value:
+                best, best_value = i, value
+        if best is None: break
+        selected.append(best)
+        remaining.remove(best)
+
+    parts, ids, documents, used = [], [], [], 0
+    for n, i in enumerate(selected, 1):
+        candidate = candidates[i]
+        topic, section, body = split_header(candidate["document"], candidate.get("metadata"))
+        tag = f"[출처 {n}] {topic}" + (f" > {section}" if section else "")
+        block = f"{tag}\n{body.strip()}"
+        cost = estimate_tokens(block)
+        if used + cost > token_budget:
+            left = token_budget - used
+            if left < min_chunk_tokens: break
+            block = truncate_to_tokens(block, left)
+            cost = estimate_tokens(block)
+        parts.append(block)
+        ids.append(candidate["id"])
+        documents.append(candidate["document"])
+        used += cost
+    return {"text": "\n\n".join(parts), "ids": ids, "documents": documents, "tokens": used}
@@ -0,0 +1,140 @@
+import threading
+
+from tokens import estimate_tokens, truncate_to_tokens
+
+
+def format_messages(messages):
+    return "\n".join(f'{m["role"]}: {m["content"]}' for m in messages)
+
+
+def simple_summarizer(previous_summary, messages, max_tokens=300):
+    """LLM 없이 쓰는 요약: 사용자 질문 첫 줄만 모아 이전 요약 뒤에 붙입니다."""
+    questions = [m["content"].strip().splitlines()[0] for m in messages if m["role"] == "user" and m["content"].strip()]
+    lines = [previous_summary] if previous_summary else []
+    if questions:
+        lines.append("사용자가 물어본 것: " + " / ".join(questions))
+    summary = "\n".join(lines)
+    # 예산을 넘으면 오래된 앞부분부터 버립니다.
+    while estimate_tokens(summary) > max_tokens and "\n" in summary:
+        summary = summary.split("\n", 1)[1]
+    return truncate_to_tokens(summary, max_tokens)
+
+
+def gemini_summarizer(model_name='gemini-flash-latest'):
+    """이전 요약과 새로 밀려난 대화로 요약을 갱신하는 Gemini 요약 함수를 만듭니다."""
+    def summarize(previous_summary, messages, max_tokens=300):
+        import google.generativeai as genai
+        prompt = (
+            f"다음은 챗봇과 학생의 [기존 요약]과 그 이후의 [새 대화]야. "
+            f"둘을 합쳐 {max_tokens // 2}단어 이내의 한국어 요약으로 갱신해줘. "
+            f"학생이 궁금해한 주제와 챗봇이 알려준 핵심 사실만 남기고 설명 없이 요약만 출력해.\n"
+            f"[기존 요약]\n{previous_summary or '없음'}\n[새 대화]\n{format_messages(messages)}"
+        )
+        model = genai.GenerativeModel(model_name)
+        return model.generate_content(prompt).text.strip()
+    return summarize
+
+
+class ConversationMemory:
+    """
+    프롬프트의 [이전 대화] 영역을 만드는 대화 메모리.
+
+    - 최근 keep_turns턴(사용자+챗봇 한 쌍)은 원문 그대로 둡니다.
+    - 그보다 오래된 메시지는 fold_batch개가 모일 때마다 요약에 점진적으로 합칩니다.
+    - 결과 전체가 max_tokens를 넘지 않도록 요약과 오래된 메시지부터 잘라냅니다.
+    - background=True면 요약 함수(LLM 등)를 백그라운드 스레드에서 부르고, 그동안은 로컬 요약을 씁니다.
+      LLM 요약은 끝난 뒤의 다음 build()부터 반영되므로 답변의 첫 토큰을 기다리게 하지 않습니다.
+    """
+
+    def __init__(self, keep_turns=4, max_tokens=600, summary_max_tokens=200, fold_batch=4, summarizer=None,
+                 background=False):
+        self.keep_turns = keep_turns
+        self.max_tokens = max_tokens
+        self.summary_max_tokens = summary_max_tokens
+        self.fold_batch = fold_batch
+        self.summarizer = summarizer or simple_summarizer
+        self.summary = ""
+        self.summarized_count = 0  # 요약에 이미 반영된 앞쪽 메시지 수
+        self.background = background
+        self._generation = 0       # 요약을 갱신할 때마다 늘려, 늦게 끝난 백그라운드 요약을 버립니다.
+        self._ready = None         # 백그라운드에서 끝난 요약 (다음 build()에서 반영)
+        self._lock = threading.Lock()
+
+    def _fold(self, messages):
+        if self.background and self.summarizer is not simple_summarizer:
+            self._fold_in_background(messages)
+            return
+        try:
+            summary = self.summarizer(self.summary, messages, max_tokens=self.summary_max_tokens)
+        except Exception:
+            # 요약 호출이 실패해도 대화는 계속되어야 하므로 로컬 요약으로 대신합니다.
+            summary = simple_summarizer(self.summary, messages, max_tokens=self.summary_max_tokens)
+        self.summary = truncate_to_tokens(summary, self.summary_max_tokens)
+
+    def _fold_in_background(self, messages):
+        previous = self.summary
+        # 당장은 로컬 요약으로 접어 두고, 같은 구간의 LLM 요약이 끝나면 그것으로 바꿉니다.
+        self.summary = simple_summarizer(previous, messages, max_tokens=self.summary_max_tokens)
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+            self._ready = None
+
+        def run():
+            try:
+                summary = self.summarizer(previous, messages, max_tokens=self.summary_max_tokens)
+            except Exception:
+                return
+            with self._lock:
+                if generation == self._generation:
+                    self._ready = summary
+
+        threading.Thread(target=run, name="memory-summary", daemon=True).start()
+
+    def build(self, messages):
+        """messages(현재 질문 제외)로 [이전 대화] 영역 문자열을 만듭니다."""
+        with self._lock:
+            if self._ready:
+                self.summary = truncate_to_tokens(self._ready, self.summary_max_tokens)
+                self._ready = None
+            if self.summarized_count > len(messages):
+                # 대화가 초기화된 경우
+                self.summary, self.summarized_count = "", 0
+                self._generation += 1
+                self._ready = None
+
+        recent_start = max(0, len(messages) - self.keep_turns * 2)
+        pending = messages[self.summarized_count:recent_start]
+        if len(pending) >= self.fold_batch:
+            self._fold(pending)
+            self.summarized_count = recent_start
+            pending = []
+
+        # 아직 요약되지 않은 메시지는 최근 메시지 앞에 원문으로 둡니다.
+        verbatim = list(pending) + list(messages[recent_start:])
+        # 요약이 최근 대화 자리를 다 차지하지 않도록 전체 예산의 절반까지만 씁니다.
+        summary = truncate_to_tokens(self.summary, min(self.summary_max_tokens, self.max_tokens // 2))
+        head = [f"(요약) {summary}"] if summary else []
+        budget = self.max_tokens - estimate_tokens("\n".join(head + [""]))
+
+        lines = []
+        used = 0
+        for m in reversed(verbatim):
+            line = f'{m["role"]}: {m["content"]}'
+            tokens = estimate_tokens(line + "\n")
+            if used + tokens > budget:
+                if not lines:
+                    # 가장 최근 메시지 하나는 잘라서라도 남깁니다.
+                    lines.append(truncate_to_tokens(line, max(budget, 0)))
+                break
+            lines.append(line)
+            used += tokens
+        lines.reverse()
+        lines = [l for l in lines if l]
+
+        # 조각별 추정치와 합친 문자열의 추정치가 다를 수 있으므로, 실제로 만든 문자열로 예산을 확인합니다.
+        text = "\n".join(head + lines)
+        while estimate_tokens(text) > self.max_tokens and len(lines) > 1:
+            lines.pop(0)
+            text = "\n".join(head + lines)
+        return truncate_to_tokens(text, self.max_tokens)
@@ -0,0 +1,233 @@
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+EMBEDDING_MODEL = "models/embedding-001"
+
+
+# --- 임베딩 함수 (실제 / 오프라인용) ---
+class GeminiEmbedder:
+    """genai.embed_content로 여러 문서를 한 번에 임베딩합니다."""
+
+    def __init__(self, model=EMBEDDING_MODEL, task_type="RETRIEVAL_DOCUMENT"):
+        self.model = model
+        self.task_type = task_type
+
+    def __call__(self, texts):
+        import google.generativeai as genai
+        result = genai.embed_content(model=self.model, content=texts, task_type=self.task_type)
+        return result['embedding']
+
+
+class StubEmbedder:
+    """
+    네트워크 없이 동작하는 테스트용 임베딩 함수.
+    텍스트 해시로 만든 결정적인 단위 벡터를 돌려주므로 같은 입력이면 항상 같은 결과가 나옵니다.
+    """
+
+    def __init__(self, dim=768, fail_rate=0.0):
+        self.dim = dim
+        self.fail_rate = fail_rate
+
+    def __call__(self, texts):
+        if self.fail_rate and random.random() < self.fail_rate:
+            raise RuntimeError("StubEmbedder: 임의로 발생시킨 오류")
+        vectors = []
+        for text in texts:
+            seed = int.from_bytes(hashlib.sha256(text.encode('utf-8')).digest()[:8], 'big')
+            rng = random.Random(seed)
+            vec = [rng.gauss(0, 1) for _ in range(self.dim)]
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            vectors.append([v / norm for v in vec])
+        return vectors
+
+
+# --- 요청 속도 제한 ---
+class TokenBucket:
+    """초당 rate개의 토큰이 채워지는 토큰 버킷. acquire()는 토큰이 생길 때까지 기다립니다."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1.0):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# --- 체크포인트 ---
+class EmbeddingCheckpoint:
+    """
+    완료된 배치를 JSON Lines 파일에 덧붙여 저장합니다.
+    청크 ID가 내용 해시이므로, 중단된 실행을 다시 돌리면 이미 임베딩한 청크는 건너뜁니다.
+    비정상 종료로 마지막 줄이 잘렸으면 load()가 마지막 완전한 줄까지 파일을 잘라내,
+    이어서 덧붙이는 기록이 잘린 줄에 붙어 버려지지 않게 합니다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _truncate_partial_line(self):
+        with open(self.path, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if not size: return
+            f.seek(size - 1)
+            if f.read(1) == b"\n": return
+            # 끝에서부터 마지막 줄바꿈을 찾아 그 뒤(잘린 줄)를 버립니다.
+            end, step = size, 4096
+            while end > 0:
+                start = max(0, end - step)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline != -1:
+                    f.truncate(start + newline + 1)
+                    return
+                end = start
+            f.truncate(0)
+
+    def load(self):
+        done = {}
+        if not self.path or not os.path.exists(self.path):
+            return done
+        with self._lock:
+            self._truncate_partial_line()
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    done[record['id']] = record['embedding']
+                except (json.JSONDecodeError, KeyError):
+                    # 깨진 줄은 무시합니다.
+                    continue
+        return done
+
+    def append(self, ids, embeddings):
+        if not self.path:
+            return
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                for cid, emb in zip(ids, embeddings):
+                    f.write(json.dumps({"id": cid, "embedding": emb}) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def clear(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# --- 처리량 통계 ---
+class EmbeddingStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.embedded = 0
+        self.resumed = 0
+        self.batches = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def add_batch(self, size):
+        with self._lock:
+            self.embedded += size
+            self.batches += 1
+
+    def add_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    @property
+    def chunks_per_sec(self):
+        return self.embedded / self.elapsed if self.elapsed > 0 else 0.0
+
+    def report(self):
+        return (f"임베딩 {self.embedded}개 ({self.batches}배치, 체크포인트 재사용 {self.resumed}개), "
+                f"{self.elapsed:.1f}초, {self.chunks_per_sec:.1f} chunks/s, 재시도 {self.retries}회")
+
+
+def _embed_batch(embedder, ids, texts, limiter, stats, retries, backoff):
+    for attempt in range(retries + 1):
+        if limiter:
+            limiter.acquire()
+        try:
+            embeddings = embedder(texts)
+            if len(embeddings) != len(texts):
+                raise ValueError(f"임베딩 개수 불일치: {len(embeddings)} != {len(texts)}")
+            return ids, embeddings
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            stats.add_retry()
+            delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+            print(f"  -> RETRY: 임베딩 배치({len(texts)}개) {attempt + 1}/{retries} - {delay:.1f}초 후 재시도: {e}")
+            time.sleep(delay)
+
+
+def embed_in_batches(items, embedder=None, batch_size=50, max_workers=3, requests_per_sec=2.0,
+                     checkpoint_path=None, retries=3, backoff=1.0, progress=True):
+    """
+    [(id, text), ...]를 batch_size 단위로 나눠 병렬로 임베딩하고 ({id: embedding}, EmbeddingStats)를 돌려줍니다.
+
+    - 동시에 최대 max_workers개의 배치를 보내되, 전체 요청 속도는 requests_per_sec로 제한합니다.
+    - checkpoint_path가 있으면 완료된 배치를 기록하고, 다음 실행에서 그 청크들은 다시 보내지 않습니다.
+    - 한 배치가 재시도 끝에 실패하면 예외를 올리지만, 그 전까지 끝난 배치는 체크포인트에 남습니다.
+    """
+    embedder = embedder or GeminiEmbedder()
+    stats = EmbeddingStats()
+    checkpoint = EmbeddingCheckpoint(checkpoint_path)
+
+    results = checkpoint.load()
+    pending = [(cid, text) for cid, text in items if cid not in results]
+    stats.resumed = len(items) - len(pending)
+    if stats.resumed and progress:
+        print(f" INFO: 체크포인트에서 {stats.resumed}개의 임베딩을 이어받습니다.")
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    limiter = TokenBucket(requests_per_sec) if requests_per_sec else None
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_embed_batch, embedder, [cid for cid, _ in batch], [text for _, text in batch],
+                            limiter, stats, retries, backoff)
+            for batch in batches
+        ]
+        first_error = None
+        for future in as_completed(futures):
+            try:
+                ids, embeddings = future.result()
+            except Exception as e:
+                # 나머지 배치는 끝까지 받아서 체크포인트에 남긴 뒤 예외를 올립니다.
+                first_error = first_error or e
+                continue
+            checkpoint.append(ids, embeddings)
+            results.update(zip(ids, embeddings))
+            stats.add_batch(len(ids))
+            if progress:
+                print(f"  -> 배치 완료 {stats.batches}/{len(batches)} ({stats.chunks_per_sec:.1f} chunks/s)")
+
+    if progress:
+        print(f"📊 {stats.report()}")
+    if first_error is not None:
+        raise first_error
+    return {cid: results[cid] for cid, _ in items}, stats
@@ -0,0 +1,92 @@
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import metrics
+
+IDENTITY_TOOLKIT_URL = "https://identitytoolkit.googleapis.com/v1/accounts:"
+
+
+class FirebaseClient:
+    """
+    Firebase Realtime Database / Identity Toolkit / OAuth 요청을 모두 보내는 공용 HTTP 클라이언트.
+
+    - keep-alive 연결을 재사용하는 requests.Session 하나를 씁니다. (연결 풀 pool_size개)
+    - 모든 요청에 같은 timeout을 적용하고, 429/5xx 응답과 읽기 시간 초과는 멱등 메서드(GET/PUT/DELETE)만,
+      연결 실패(요청이 나가기 전)는 모든 메서드를 retries번 다시 시도합니다.
+      이 계층은 PATCH를 다시 보내지 않을 뿐이고, 증가 연산이 든 PATCH의 재시도/재전송 시 중복 방지는
+      호출하는 쪽(ChatLogWriter의 저장 여부 확인)이 맡습니다.
+    - 데이터베이스 URL은 생성할 때 한 번만 정규화합니다.
+    - 요청마다 엔드포인트별 지연 시간을 metrics의 firebase.{엔드포인트}_ms 히스토그램에 기록합니다.
+    - FirebaseDB / ChatLogWriter / KeywordAnalyzer는 이 클라이언트를 받아 db_* 헬퍼로 요청합니다.
+    """
+
+    def __init__(self, db_url, api_key=None, pool_size=20, timeout=10, retries=2, backoff=0.3, registry=None):
+        self.db_url = db_url if db_url.endswith('/') else db_url + '/'
+        self.api_key = api_key
+        self.timeout = timeout
+        self.registry = registry or metrics.REGISTRY
+
+        retry = Retry(total=retries, connect=retries, read=retries, status=retries, backoff_factor=backoff,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(["GET", "HEAD", "PUT", "DELETE"]),
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    # --- URL ---
+    def url(self, path, token=None):
+        """데이터베이스 경로의 REST URL. path가 비어 있으면 루트(멀티 경로 PATCH용)입니다."""
+        url = f"{self.db_url}{path.strip('/')}.json"
+        return f"{url}?auth={token}" if token else url
+
+    def endpoint_of(self, method, url):
+        """지연 시간 히스토그램 이름에 쓸 엔드포인트 이름. (예: db.get.users, identity.signInWithPassword)"""
+        if url.startswith(IDENTITY_TOOLKIT_URL):
+            return "identity." + url[len(IDENTITY_TOOLKIT_URL):].split('?')[0]
+        if url.startswith(self.db_url):
+            segment = url[len(self.db_url):].split('?')[0].split('/')[0].replace('.json', '')
+            return f"db.{method.lower()}.{segment or 'root'}"
+        return f"http.{method.lower()}.{urlsplit(url).hostname}"
+
+    # --- 요청 ---
+    def request(self, method, url, endpoint=None, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        name = f"firebase.{endpoint or self.endpoint_of(method, url)}"
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self.registry.incr(f"{name}.errors")
+            raise
+        finally:
+            self.registry.observe(f"{name}_ms", (time.perf_counter() - started) * 1000)
+        if response.status_code >= 400:
+            self.registry.incr(f"{name}.errors")
+        return response
+
+    def get(self, url, **kwargs): return self.request("GET", url, **kwargs)
+    def put(self, url, **kwargs): return self.request("PUT", url, **kwargs)
+    def patch(self, url, **kwargs): return self.request("PATCH", url, **kwargs)
+    def post(self, url, **kwargs): return self.request("POST", url, **kwargs)
+
+    # --- Realtime Database ---
+    def db_get(self, path, token=None, **kwargs):
+        return self.get(self.url(path, token), **kwargs)
+
+    def db_put(self, path, token, data, **kwargs):
+        return self.put(self.url(path, token), json=data, **kwargs)
+
+    def db_patch(self, path, token, data, **kwargs):
+        """path=""이면 루트에 멀티 경로 PATCH를 보냅니다."""
+        return self.patch(self.url(path, token), json=data, **kwargs)
+
+    # --- Identity Toolkit ---
+    def identity(self, action, payload, **kwargs):
+        """accounts:{action} 호출. (signUp, signInWithPassword, signInWithIdp ...)"""
+        return self.post(f"{IDENTITY_TOOLKIT_URL}{action}", params={"key": self.api_key}, json=payload, **kwargs)
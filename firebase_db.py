@@ -0,0 +1,109 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    # 큰 응답을 통째로 메모리에 올리지 않고 항목 단위로 파싱합니다. (pip install ijson)
+    import ijson
+except ImportError:
+    ijson = None
+
+DAY_MS = 24 * 3600 * 1000
+
+
+def window_start_ms(days, now_ms=None):
+    """최근 days일 구간의 시작 시각(ms). days가 None이면 None(전체 기간)."""
+    if not days: return None
+    now_ms = now_ms if now_ms is not None else int(time.time() * 1000)
+    return now_ms - int(days) * DAY_MS
+
+
+def _query_value(value):
+    # Firebase REST 쿼리 파라미터는 JSON 값이어야 합니다. ("$key", "1700000000000", 50 ...)
+    return json.dumps(value, ensure_ascii=False)
+
+
+class FirebaseDB:
+    """
+    Realtime Database REST 읽기 계층. 요청은 모두 공용 FirebaseClient(연결 풀, 공통 timeout)로 보냅니다.
+
+    - shallow_keys()/count(): shallow=true 로 자식 키만 받아 개수를 셉니다.
+    - read_window(): 사용자별 기록을 orderBy="$key"&startAt/endAt 으로 기간만큼만 읽습니다.
+      (chat_history 키는 13자리 ms 타임스탬프라 문자열 순서와 시간 순서가 같습니다)
+    - page_history(): orderBy="$key"&endAt=커서&limitToLast 로 한 사용자의 기록을 최신순으로 나눠 읽습니다.
+    - iter_children(): ijson이 있으면 응답을 스트리밍으로 파싱해 (키, 값)을 하나씩 돌려줍니다.
+    """
+
+    def __init__(self, client, max_workers=8):
+        self.client = client
+        self.max_workers = max_workers
+
+    def _params(self, query):
+        return {k: (_query_value(v) if k in ("orderBy", "startAt", "endAt", "equalTo") else v)
+                for k, v in query.items() if v is not None}
+
+    def get(self, path, token=None, **query):
+        """경로 하나를 읽습니다. 데이터가 없거나 실패하면 None."""
+        response = self.client.db_get(path, token, params=self._params(query))
+        if response.status_code != 200: return None
+        return response.json()
+
+    def iter_children(self, path, token=None, **query):
+        """경로의 자식 (키, 값)을 하나씩 돌려줍니다. ijson이 없으면 전체를 파싱한 뒤 돌려줍니다."""
+        if ijson is None:
+            data = self.get(path, token, **query)
+            yield from (data or {}).items() if isinstance(data, dict) else ()
+            return
+        with self.client.db_get(path, token, params=self._params(query), stream=True) as response:
+            if response.status_code != 200: return
+            response.raw.decode_content = True
+            try:
+                yield from ijson.kvitems(response.raw, '', use_float=True)
+            except ijson.common.IncompleteJSONError:
+                # 응답이 null(데이터 없음)인 경우
+                return
+
+    def shallow_keys(self, path, token=None):
+        """자식 키 목록만 가져옵니다. (값은 내려받지 않습니다)"""
+        data = self.get(path, token, shallow="true")
+        return list(data.keys()) if isinstance(data, dict) else []
+
+    def count(self, path, token=None):
+        return len(self.shallow_keys(path, token))
+
+    def read_user_window(self, path, token=None, start_ms=None, end_ms=None):
+        """한 사용자의 기록 중 [start_ms, end_ms] 구간만 읽습니다."""
+        query = {"orderBy": "$key"} if (start_ms is not None or end_ms is not None) else {}
+        if start_ms is not None: query["startAt"] = str(int(start_ms))
+        if end_ms is not None: query["endAt"] = str(int(end_ms))
+        return dict(self.iter_children(path, token, **query))
+
+    def read_window(self, path, token=None, days=None, start_ms=None, end_ms=None):
+        """
+        {uid: {timestamp: ...}} 형태의 트리(chat_history 등)를 기간만큼만 읽습니다.
+        사용자 목록은 shallow로 가져오고 사용자별 구간 조회는 병렬로 보냅니다.
+        """
+        if start_ms is None: start_ms = window_start_ms(days)
+        uids = self.shallow_keys(path, token)
+        if not uids: return {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda uid: self.read_user_window(f"{path.strip('/')}/{uid}", token, start_ms, end_ms), uids)
+            return {uid: data for uid, data in zip(uids, results) if data}
+
+    def page_history(self, path, token=None, before=None, page_size=50):
+        """
+        한 사용자의 기록을 최신순으로 page_size개씩 읽습니다.
+        before에 이전 페이지가 돌려준 커서를 넘기면 그보다 오래된 기록을 읽고,
+        (이번 페이지 {키: 값}, 다음 커서 또는 None) 을 돌려줍니다.
+        """
+        query = {"orderBy": "$key", "limitToLast": page_size + (1 if before is not None else 0)}
+        if before is not None: query["endAt"] = str(before)
+        page = dict(self.iter_children(path, token, **query))
+        # endAt은 커서 자신도 포함하므로 빼줍니다.
+        if before is not None: page.pop(str(before), None)
+        keys = sorted(page)
+        if len(keys) > page_size:
+            for k in keys[:-page_size]: page.pop(k)
+            keys = keys[-page_size:]
+        next_cursor = keys[0] if keys and len(keys) == page_size else None
+        return page, next_cursor
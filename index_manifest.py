@@ -0,0 +1,136 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+DB_PATH = "./chroma_db"
+# 주제별 페이지 상태(ETag/Last-Modified/본문 해시/청크 ID)를 기록하는 매니페스트
+MANIFEST_PATH = os.path.join(DB_PATH, "index_manifest.json")
+
+
+def load_manifest(path=MANIFEST_PATH):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {"topics": {}}
+
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def new_index_version():
+    return str(time.time_ns())
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def chunk_id(topic, content):
+    """위치가 아닌 내용으로 정해지는 청크 ID. 같은 내용이면 실행마다 같은 ID가 나옵니다."""
+    return "chunk_" + content_hash(f"{topic}\n{content}")[:24]
+
+
+def diff_page(topic, page, old_entry, chunk_fn, now=None):
+    """
+    fetch_pages()의 결과 하나를 이전 매니페스트 항목과 비교해 (상태, 새 항목, 새로 만든 청크 {id: chunk})를 돌려줍니다.
+    chunk_fn(response)는 페이지의 청크 목록을 만들며, 가져오기에 실패했거나 304이면 부르지 않습니다.
+
+    - "error": 가져오기 실패. 일시적인 오류로 기존 청크가 지워지지 않도록 이전 항목을 그대로 둡니다.
+    - "not_modified": 304 응답. 이전 항목을 그대로 둡니다.
+    - "empty": 추출된 텍스트가 없음. 항목이 없으므로 그 주제의 청크는 삭제 대상이 됩니다.
+    - "unchanged": 본문 해시가 같음. 이전 청크 ID와 수집 시각을 유지합니다.
+    - "changed": 새 청크 ID 목록으로 바꿉니다.
+    """
+    if page['error'] is not None:
+        return "error", old_entry, {}
+    response = page['response']
+    if response.status_code == 304 and old_entry:
+        return "not_modified", old_entry, {}
+
+    chunks = chunk_fn(response)
+    text = "\n".join(chunk['content'] for chunk in chunks)
+    if not text.strip():
+        return "empty", None, {}
+
+    entry = {
+        "url": page['url'],
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified'),
+        "page_hash": content_hash(text),
+        "updated_at": int(now if now is not None else time.time()),
+    }
+    if old_entry and old_entry.get("page_hash") == entry["page_hash"]:
+        entry["chunk_ids"] = old_entry["chunk_ids"]
+        entry["updated_at"] = old_entry.get("updated_at", entry["updated_at"])
+        return "unchanged", entry, {}
+
+    new_chunks = {}
+    for chunk in chunks:
+        new_chunks.setdefault(chunk_id(topic, chunk['content']), chunk)
+    entry["chunk_ids"] = list(new_chunks)
+    return "changed", entry, new_chunks
+
+
+IndexPlan = namedtuple("IndexPlan", ["add", "delete", "missing", "wanted"])
+
+
+def plan_changes(topics, new_chunks, existing_ids):
+    """
+    새 매니페스트의 청크 ID와 DB에 있는 ID를 비교합니다.
+    add: 이번에 새로 만든 청크 중 DB에 없는 것 (이것만 임베딩합니다)
+    delete: DB에는 있지만 매니페스트 어디에도 없는 것
+    missing: 매니페스트에는 있지만 DB에도 새 청크에도 없는 것 (--full 로 다시 만들어야 합니다)
+    """
+    wanted = {cid for entry in topics.values() for cid in entry["chunk_ids"]}
+    existing = set(existing_ids)
+    return IndexPlan(add=[cid for cid in new_chunks if cid not in existing],
+                     delete=sorted(existing - wanted),
+                     missing=wanted - existing - set(new_chunks),
+                     wanted=wanted)
+
+
+class ManifestWatcher:
+    """
+    앱 쪽에서 매니페스트를 읽는 헬퍼. 파일이 바뀌었을 때(mtime 기준)만 다시 읽습니다.
+    prepare_data.py가 재색인하면 index_version이 바뀌므로, 캐시 무효화 기준으로 사용합니다.
+    """
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._manifest = {"topics": {}}
+        self._topic_by_chunk = {}
+
+    def _refresh(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime == self._mtime:
+                return
+            self._mtime = mtime
+            self._manifest = load_manifest(self.path) if mtime is not None else {"topics": {}}
+            self._topic_by_chunk = {
+                cid: topic
+                for topic, entry in self._manifest.get("topics", {}).items()
+                for cid in entry.get("chunk_ids", [])
+            }
+
+    def index_version(self):
+        self._refresh()
+        return self._manifest.get("index_version") or str(self._manifest.get("updated_at", ""))
+
+    def topic_of(self, chunk_id):
+        self._refresh()
+        return self._topic_by_chunk.get(chunk_id)
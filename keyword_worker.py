@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from firebase_db import FirebaseDB
+
+
+def extract_keywords_with_gemini(text, model_name='gemini-flash-latest'):
+    import google.generativeai as genai
+    analysis_model = genai.GenerativeModel(model_name)
+    prompt = f"다음 대화에서 사용자의 핵심 관심 키워드 3개를 콤마로 구분해 추출해줘. 설명 없이 단어만. [대화] {text}"
+    result = analysis_model.generate_content(prompt).text
+    return [k.strip() for k in result.split(',') if k.strip()]
+
+
+class KeywordAnalyzer:
+    """
+    사용자 관심 키워드 분석을 요청 경로 밖(백그라운드)에서 실행합니다.
+
+    - 사용자별 최근 질문을 메모리에 보관하고, 처음 한 번만 FirebaseDB.page_history()로
+      최근 기록 한 페이지(orderBy="$key"&limitToLast)를 가져와 채웁니다.
+    - 새 질문이 min_new_messages개 이상 쌓이면 분석을 예약하되, 사용자별로 debounce_seconds에
+      한 번만 실행합니다. (그 사이 들어온 질문은 다음 실행에 합쳐집니다)
+    - 결과가 이전과 다를 때만 users/{uid}/dynamic_keywords 에 저장합니다.
+    - UI는 poll()로 새 결과를 가져갑니다.
+    - Firebase 요청은 공용 FirebaseClient(client)로 보냅니다.
+    """
+
+    def __init__(self, client, extract_fn=None, window=10, min_new_messages=2,
+                 debounce_seconds=30.0, max_workers=2):
+        self.client = client
+        self.db = FirebaseDB(client)
+        self.extract_fn = extract_fn or extract_keywords_with_gemini
+        self.window = window
+        self.min_new_messages = min_new_messages
+        self.debounce_seconds = debounce_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="keyword-analyzer")
+        self._lock = threading.Lock()
+        self._recent = {}       # uid -> deque(최근 사용자 질문)
+        self._new_count = {}    # uid -> 마지막 분석 이후 새 질문 수
+        self._tokens = {}       # uid -> 최근 인증 토큰
+        self._last_run = {}     # uid -> 마지막 분석 시작 시각
+        self._scheduled = set() # 분석이 예약/실행 중인 uid
+        self._pushed = {}       # uid -> 마지막으로 저장한 키워드
+        self._results = {}      # uid -> 아직 UI가 가져가지 않은 새 키워드
+
+    def observe(self, uid, token, message, current_keywords=None):
+        """
+        사용자 질문 하나를 기록하고, 필요하면 백그라운드 분석을 예약합니다. 바로 반환됩니다.
+        current_keywords는 이미 저장된 키워드로, 같은 결과를 다시 저장하지 않는 데 씁니다.
+        """
+        if not uid or not token: return
+        with self._lock:
+            self._tokens[uid] = token
+            if current_keywords is not None and uid not in self._pushed:
+                self._pushed[uid] = list(current_keywords)
+            seeded = uid in self._recent
+            if not seeded:
+                self._recent[uid] = deque(maxlen=self.window)
+            self._recent[uid].append(message)
+            self._new_count[uid] = self._new_count.get(uid, 0) + 1
+            should_schedule = self._new_count[uid] >= self.min_new_messages and uid not in self._scheduled
+            if should_schedule:
+                self._scheduled.add(uid)
+                delay = max(0.0, self._last_run.get(uid, 0) + self.debounce_seconds - time.time())
+        if not seeded:
+            self._executor.submit(self._seed, uid)
+        if should_schedule:
+            timer = threading.Timer(delay, lambda: self._executor.submit(self._analyze, uid))
+            timer.daemon = True
+            timer.start()
+
+    def poll(self, uid):
+        """새로 분석된 키워드가 있으면 돌려주고 비웁니다. 없으면 None."""
+        with self._lock:
+            return self._results.pop(uid, None)
+
+    def _seed(self, uid):
+        # 이 프로세스에서 처음 보는 사용자면 최근 기록을 가져와 앞쪽을 채웁니다.
+        try:
+            history, _ = self.db.page_history(f"chat_history/{uid}", self._tokens.get(uid), page_size=self.window * 2)
+        except (requests.RequestException, ValueError):
+            return
+        if not history: return
+        older = [history[k]['content'] for k in sorted(history)
+                 if isinstance(history[k], dict) and history[k].get('role') == 'user']
+        with self._lock:
+            current = list(self._recent[uid])
+            # 방금 observe()로 들어온 질문이 이미 저장돼 있을 수 있으므로 겹치는 뒷부분은 뺍니다.
+            while older and current and older[-1] in current:
+                older.pop()
+            self._recent[uid] = deque(older + current, maxlen=self.window)
+
+    def _analyze(self, uid):
+        with self._lock:
+            self._last_run[uid] = time.time()
+            self._new_count[uid] = 0
+            full_text = "\n".join(self._recent.get(uid, []))
+            token = self._tokens.get(uid)
+        try:
+            if len(full_text) < 5: return
+            keywords = self.extract_fn(full_text)
+            if not keywords or keywords == self._pushed.get(uid): return
+            response = self.client.db_put(f"users/{uid}/dynamic_keywords", token, keywords)
+            if response.status_code == 200:
+                with self._lock:
+                    self._pushed[uid] = keywords
+                    self._results[uid] = keywords
+        except Exception:
+            # 분석 실패는 다음 분석에서 다시 시도하면 되므로 조용히 넘어갑니다.
+            pass
+        finally:
+            with self._lock:
+                self._scheduled.discard(uid)
+                reschedule = self._new_count.get(uid, 0) >= self.min_new_messages
+            if reschedule:
+                with self._lock:
+                    self._scheduled.add(uid)
+                timer = threading.Timer(self.debounce_seconds, lambda: self._executor.submit(self._analyze, uid))
+                timer.daemon = True
+                timer.start()
@@ -0,0 +1,160 @@
+import bisect
+import re
+import threading
+from collections import Counter
+
+try:
+    # 설치되어 있으면 형태소 분석기로 명사만 뽑습니다. (pip install kiwipiepy)
+    from kiwipiepy import Kiwi
+except ImportError:
+    Kiwi = None
+
+DEFAULT_STOP_WORDS = {
+    "알려줘", "알려주세요", "정보", "관련", "대해", "대해서", "어디", "어디야", "어떻게", "대한", "알려", "주세요",
+    "질문", "답변", "좀", "내용", "있는지", "있어", "있나요", "인지", "하데", "있지", "학교", "뭐야", "언제",
+    "몇", "시", "궁금해", "궁금합니다", "해줘", "가능", "되나요", "돼", "나요", "그럼", "그리고",
+}
+
+# 단어 끝에 붙는 조사 (긴 것부터 검사합니다)
+PARTICLES = sorted([
+    "에서는", "에게서", "으로는", "으로도", "이라도", "까지는", "부터는", "에서도", "이라는", "이랑은",
+    "에서", "에게", "한테", "으로", "까지", "부터", "처럼", "보다", "이랑", "하고", "이나", "이나마", "라도",
+    "에는", "에도", "은", "는", "이", "가", "을", "를", "에", "도", "만", "의", "와", "과", "로", "랑", "요",
+], key=len, reverse=True)
+
+# 조사처럼 보이는 글자로 끝나지만 명사의 일부인 말. 단어가 이 중 하나로 끝나면 떼지 않습니다.
+# (예: 와이파이 -> 와이파, 학점인정제도 -> 학점인정제 가 되지 않도록)
+NO_STRIP_WORDS = {
+    "와이파이", "요가", "지도", "제도", "정도", "속도", "온도", "태도", "진로", "경로", "통로",
+    "회의", "강의", "학과", "결과", "효과", "휴가", "평가",
+}
+
+_PUNCT = re.compile(r"[^\w가-힣]+")
+
+
+def strip_particle(word, min_stem=2, keep=NO_STRIP_WORDS):
+    """
+    단어 끝의 조사 하나만 떼어냅니다. 남는 어간이 min_stem보다 짧아지거나,
+    단어가 keep(조사처럼 끝나는 명사)의 하나로 끝나면 그대로 둡니다.
+    """
+    if any(word[-n:] in keep for n in range(2, len(word) + 1)):
+        return word
+    for particle in PARTICLES:
+        if word.endswith(particle) and len(word) - len(particle) >= min_stem:
+            return word[:-len(particle)]
+    return word
+
+
+class KeywordTokenizer:
+    """
+    질문에서 키워드를 뽑는 토크나이저.
+    kiwipiepy가 있으면 명사/고유명사/외래어를 뽑고, 없으면 공백 단위로 나눈 뒤 끝의 조사만 제거합니다.
+    """
+
+    NOUN_TAGS = {"NNG", "NNP", "SL", "SN", "SH"}
+
+    def __init__(self, stop_words=None, min_length=2, use_morphology=True):
+        self.stop_words = set(DEFAULT_STOP_WORDS if stop_words is None else stop_words)
+        self.min_length = min_length
+        self._kiwi = Kiwi() if (use_morphology and Kiwi is not None) else None
+        self._lock = threading.Lock()
+
+    def tokenize(self, text):
+        text = str(text or "")
+        if self._kiwi is not None:
+            with self._lock:
+                tokens = [t.form for t in self._kiwi.tokenize(text) if t.tag in self.NOUN_TAGS]
+        else:
+            tokens = [strip_particle(w) for w in _PUNCT.sub(" ", text).split()]
+        return [t for t in tokens if len(t) >= self.min_length and t not in self.stop_words]
+
+
+_default_tokenizer = None
+
+
+def extract_keywords(text, tokenizer=None):
+    """기본 토크나이저로 키워드를 뽑습니다."""
+    global _default_tokenizer
+    if tokenizer is None:
+        if _default_tokenizer is None:
+            _default_tokenizer = KeywordTokenizer()
+        tokenizer = _default_tokenizer
+    return tokenizer.tokenize(text)
+
+
+class KeywordIndex:
+    """
+    사용자 질문의 키워드 빈도(keyword -> count)와 역색인(keyword -> 메시지 id 목록)을 점진적으로 유지합니다.
+    add()는 새 메시지만 반영하므로, 순위 조회와 상세 보기에서 전체 기록을 다시 훑지 않습니다.
+    """
+
+    def __init__(self, tokenizer=None):
+        self.tokenizer = tokenizer or KeywordTokenizer()
+        self.counts = Counter()
+        self.postings = {}   # keyword -> [(timestamp, msg_id), ...] (시간순 정렬)
+        self.messages = {}   # msg_id -> {"uid", "timestamp", "content"}
+        self.max_timestamp = 0
+        # 빠짐없이 색인된 구간의 시작 시각 (None: 아직 동기화 전, 0: 전체 기록)
+        self.covered_from = None
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.messages)
+
+    def add(self, msg_id, timestamp, content, uid=None):
+        """메시지 하나를 색인합니다. 이미 색인한 id면 무시하고 False를 돌려줍니다."""
+        with self._lock:
+            if msg_id in self.messages:
+                return False
+            timestamp = int(timestamp)
+            self.messages[msg_id] = {"uid": uid, "timestamp": timestamp, "content": content}
+            self.max_timestamp = max(self.max_timestamp, timestamp)
+            for keyword in set(self.tokenizer.tokenize(content)):
+                self.counts[keyword] += 1
+                bisect.insort(self.postings.setdefault(keyword, []), (timestamp, msg_id))
+            return True
+
+    def add_many(self, rows):
+        """(msg_id, timestamp, content, uid) 묶음을 색인하고 새로 추가된 개수를 돌려줍니다."""
+        added = 0
+        for msg_id, timestamp, content, uid in rows:
+            added += self.add(msg_id, timestamp, content, uid)
+        return added
+
+    def top(self, n=50):
+        with self._lock:
+            return self.counts.most_common(n)
+
+    def lookup(self, keyword):
+        """키워드가 들어간 메시지 id를 최신순으로 돌려줍니다."""
+        with self._lock:
+            return [msg_id for _, msg_id in reversed(self.postings.get(keyword, []))]
+
+    def _range(self, keyword, start_ms=None, end_ms=None):
+        # 시간순으로 정렬된 게시 목록에서 [start_ms, end_ms] 구간만 이분 탐색으로 잘라냅니다.
+        posting = self.postings.get(keyword, [])
+        lo = 0 if start_ms is None else bisect.bisect_left(posting, (int(start_ms), ""))
+        hi = len(posting) if end_ms is None else bisect.bisect_right(posting, (int(end_ms), "\uffff"))
+        return posting[lo:hi]
+
+    def query(self, keywords, mode="or", start_ms=None, end_ms=None, offset=0, limit=20):
+        """
+        여러 키워드를 AND/OR로 묶어 찾고 기간(start_ms~end_ms, 양끝 포함)으로 거릅니다.
+        결과는 최신순이며 (전체 건수, offset부터 limit개의 메시지 id) 를 돌려줍니다.
+        """
+        keywords = [k for k in dict.fromkeys(keywords or []) if k]
+        if not keywords: return 0, []
+        with self._lock:
+            ranges = [self._range(k, start_ms, end_ms) for k in keywords]
+            if mode == "and":
+                # 가장 짧은 목록을 기준으로 나머지 목록에 모두 있는 메시지만 남깁니다.
+                ranges.sort(key=len)
+                others = [{msg_id for _, msg_id in r} for r in ranges[1:]]
+                merged = [entry for entry in ranges[0] if all(entry[1] in o for o in others)]
+            else:
+                merged = sorted(set().union(*ranges)) if len(ranges) > 1 else ranges[0]
+        total = len(merged)
+        # 최신순 페이지: 뒤에서부터 offset만큼 건너뛰고 limit개를 가져옵니다.
+        end = max(total - offset, 0)
+        start = max(end - limit, 0)
+        return total, [msg_id for _, msg_id in reversed(merged[start:end])]
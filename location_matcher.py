@@ -0,0 +1,115 @@
+from collections import deque, namedtuple
+
+# 사용자가 위치를 묻는 의도로 보는 단어들
+LOCATION_INTENTS = ["위치", "어디", "지도", "약도", "가는", "찾아", "안내", "장소", "어디에", "어디로"]
+
+Match = namedtuple("Match", ["start", "end", "word", "kind", "location"])
+
+
+class AhoCorasick:
+    """여러 패턴을 한 번의 순회로 모두 찾는 Aho-Corasick 오토마톤."""
+
+    def __init__(self, patterns):
+        self.patterns = []
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for pattern in patterns:
+            self._add(pattern)
+        self._build()
+
+    def _add(self, pattern):
+        if not pattern: return
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].append(len(self.patterns))
+        self.patterns.append(pattern)
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter(self, text):
+        """(시작, 끝, 패턴 번호)를 끝 위치 순서로 돌려줍니다."""
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for pid in self._out[state]:
+                yield i + 1 - len(self.patterns[pid]), i + 1, pid
+
+
+class LocationMatcher:
+    """
+    건물 이름 / 건물 키워드 / 위치 의도 단어를 하나의 오토마톤으로 묶어 한 번에 찾습니다.
+    locations는 SEOIL_LOCATIONS 형식({이름: {"keywords": [...], ...}})입니다.
+    """
+
+    def __init__(self, locations, intent_words=LOCATION_INTENTS):
+        entries = {}
+        for name, data in locations.items():
+            for keyword in data.get('keywords', []):
+                entries.setdefault(keyword, []).append(("keyword", name))
+            # 이름은 키워드 목록에 같은 단어가 있어도 이름으로 취급합니다.
+            entries[name] = [("name", name)] + [e for e in entries.get(name, []) if e[1] != name]
+        for word in intent_words:
+            entries.setdefault(word, []).append(("intent", None))
+        self._entries = entries
+        self._automaton = AhoCorasick(entries)
+        self.location_order = list(locations)
+
+    def find_all(self, text):
+        """text에 나오는 모든 이름/키워드/의도 단어를 시작 위치 순서로 돌려줍니다."""
+        if not text: return []
+        matches = []
+        for start, end, pid in self._automaton.iter(str(text)):
+            word = self._automaton.patterns[pid]
+            for kind, location in self._entries[word]:
+                matches.append(Match(start, end, word, kind, location))
+        matches.sort(key=lambda m: (m.start, -m.end))
+        return matches
+
+    def locations_in(self, text, kinds=("name", "keyword"), matches=None):
+        """text에 언급된 건물을 처음 나온 순서대로 돌려줍니다."""
+        seen = []
+        for m in (matches if matches is not None else self.find_all(text)):
+            if m.kind in kinds and m.location not in seen:
+                seen.append(m.location)
+        return seen
+
+    def has_intent(self, text, matches=None):
+        return any(m.kind == "intent" for m in (matches if matches is not None else self.find_all(text)))
+
+    def detect(self, answer, question=None):
+        """
+        지도를 보여줄 건물 하나를 고릅니다.
+        1) 답변에 건물 이름이 있으면 그 건물, 2) 질문이 위치를 묻고 건물 이름/키워드가 있으면 그 건물.
+        question이 없으면 답변의 이름과 키워드를 모두 봅니다. (지난 대화 다시 그리기용)
+        """
+        if question is None:
+            found = self.locations_in(answer)
+            return found[0] if found else None
+        found = self.locations_in(answer, kinds=("name",))
+        if found: return found[0]
+        q_matches = self.find_all(question)
+        if self.has_intent(question, q_matches):
+            found = self.locations_in(question, matches=q_matches)
+            if found: return found[0]
+        return None
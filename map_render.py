@@ -0,0 +1,75 @@
+import io
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw
+
+
+class MapRenderer:
+    """
+    캠퍼스 지도 위에 건물 위치를 표시한 PNG를 만들어 LRU로 보관합니다.
+
+    - 기본 지도(seoil_map.png)는 처음 한 번만 디코딩하고, 표시할 때마다 메모리 안에서 복사해 그립니다.
+    - 결과는 인코딩된 PNG 바이트로 (건물 이름 조합)별로 저장하므로 st.image에 그대로 넘길 수 있습니다.
+    - 여러 건물을 한 번에 표시할 수 있고, 이름 순서와 상관없이 같은 조합은 같은 캐시 항목을 씁니다.
+    """
+
+    def __init__(self, map_path, locations, radius=30, width=5, color="red", max_entries=64):
+        self.map_path = map_path
+        self.locations = locations
+        self.radius = radius
+        self.width = width
+        self.color = color
+        self.max_entries = max_entries
+        self._base = None
+        self._missing = False
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _base_image(self):
+        if self._base is None and not self._missing:
+            try:
+                with Image.open(self.map_path) as image:
+                    self._base = image.convert("RGB")
+            except FileNotFoundError:
+                self._missing = True
+        return self._base
+
+    def _draw(self, names):
+        base = self._base_image()
+        if base is None: return None
+        image = base.copy()
+        draw = ImageDraw.Draw(image)
+        r = self.radius
+        for name in names:
+            x, y = self.locations[name]['x'], self.locations[name]['y']
+            draw.ellipse((x - r, y - r, x + r, y + r), outline=self.color, width=self.width)
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    @staticmethod
+    def key_of(names):
+        """건물 이름 조합의 캐시 키. (순서/중복 무시)"""
+        return tuple(sorted(set(names)))
+
+    def render(self, names):
+        """names(건물 이름 하나 또는 여러 개)를 표시한 PNG 바이트. 지도나 건물이 없으면 None."""
+        if isinstance(names, str): names = [names]
+        key = self.key_of(n for n in names if n in self.locations)
+        if not key: return None
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+            png = self._draw(key)
+            if png is None: return None
+            self._cache[key] = png
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            return png
+
+    def prerender(self):
+        """건물마다 하나씩 미리 그려 둡니다."""
+        for name in self.locations:
+            self.render(name)
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class Histogram:
+    """최근 max_samples개의 값을 보관해 평균/백분위수를 계산합니다."""
+
+    def __init__(self, max_samples=1000):
+        self.samples = deque(maxlen=max_samples)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.samples.append(value)
+        self.count += 1
+        self.total += value
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, max(0, round(q / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": max(self.samples) if self.samples else 0.0,
+        }
+
+
+class MetricsRegistry:
+    """프로세스 전역 카운터/히스토그램 모음. Streamlit 세션(스레드) 간에 공유됩니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe(self, name, value):
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram()
+            self._histograms[name].observe(value)
+
+    @contextmanager
+    def timer(self, name):
+        """with 블록의 실행 시간을 밀리초 단위로 기록합니다."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def counters(self, prefix=""):
+        with self._lock:
+            return {k: v for k, v in self._counters.items() if k.startswith(prefix)}
+
+    def histograms(self, prefix=""):
+        with self._lock:
+            return {k: h.summary() for k, h in self._histograms.items() if k.startswith(prefix)}
+
+
+REGISTRY = MetricsRegistry()
+
+incr = REGISTRY.incr
+observe = REGISTRY.observe
+timer = REGISTRY.timer
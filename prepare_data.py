@@ -1,9 +1,18 @@
+import argparse
+import os
+import time
+
 import streamlit as st
 import google.generativeai as genai
-import requests
-from bs4 import BeautifulSoup
 import chromadb
 
+from bm25_index import BM25_PATH, BM25Index
+from chunker import chunk_page
+from embedding_pipeline import EmbeddingCheckpoint, StubEmbedder, embed_in_batches
+from index_manifest import DB_PATH, diff_page, load_manifest, new_index_version, plan_changes, save_manifest
+from scraper import conditional_headers, fetch_pages
+from vector_index import VECTORS_PATH, export_vectors
+
 try:
     # 1. secrets.toml에서만 키를 불러옵니다.
     API_KEY = st.secrets["GEMINI_API_KEY"]
@@ -16,104 +25,204 @@ except Exception as e:
     st.error(f"Gemini API 설정 중 오류 발생: {e}")
     st.stop()
 
-def scrape_and_process_page(topic, url):
+COLLECTION_NAME = "seoil_info_db"
+# 완료된 임베딩 배치를 기록하는 체크포인트 (DB 저장이 끝나면 삭제됩니다)
+CHECKPOINT_PATH = os.path.join(DB_PATH, "embedding_checkpoint.jsonl")
+
+URLS = {
+    "학사공지": "https://www.seoil.ac.kr/seoil/599/subview.do",
+    "공지사항": "https://www.seoil.ac.kr/seoil/598/subview.do",
+    "행사안내": "https://www.seoil.ac.kr/seoil/600/subview.do",
+    "홍보사항": "https://www.seoil.ac.kr/seoil/602/subview.do",
+    "셔틀버스": "https://www.seoil.ac.kr/seoil/520/subview.do",
+    "서일대학교": "https://www.seoil.ac.kr/sites/seoil/index.do",
+    "학교소식": "https://www.seoil.ac.kr/seoil/616/subview.do",
+    "스터디공간": "https://www.seoil.ac.kr/seoil/583/subview.do",
+    "PC이용, VR실": "https://www.seoil.ac.kr/seoil/584/subview.do",
+    "편의점, 카페": "https://www.seoil.ac.kr/seoil/585/subview.do",
+    "학생식당": "https://www.seoil.ac.kr/seoil/3896/subview.do",
+    "휴게공간": "https://www.seoil.ac.kr/seoil/586/subview.do",
+    "편의시설": "https://www.seoil.ac.kr/seoil/587/subview.do",
+    "체육시설": "https://www.seoil.ac.kr/seoil/588/subview.do",
+    "대학생활메뉴얼": "https://www.seoil.ac.kr/seoil/3409/subview.do",
+    "찾아오시는길": "https://www.seoil.ac.kr/seoil/520/subview.do",
+    "도서관": "https://www.seoil.ac.kr/seoil/580/subview.do"
+}
+
+
+def chunk_metadata(topic, url, content, scraped_at, section=None):
+    """
+    Chroma에 함께 저장할 청크 메타데이터. (where 필터용, 값에 None은 쓸 수 없습니다)
+    section이 없으면 청크 첫 줄 "[주제] 섹션"에서 읽습니다.
+    """
+    if section is None:
+        first_line = content.split('\n', 1)[0]
+        prefix = f"[{topic}]"
+        section = first_line[len(prefix):].strip() if first_line.startswith(prefix) else ""
+    return {"topic": topic, "url": url or "", "section": section or "", "scraped_at": int(scraped_at or 0)}
+
+
+def prepare_and_save_embeddings(full_rebuild=False, embedder=None, batch_size=50, max_workers=3, requests_per_sec=2.0,
+                                max_tokens=300, overlap_tokens=40, vector_dtype="float32"):
     """
-    페이지의 주제(topic)에 따라 최적화된 방법으로 스크레이핑을 수행하는 함수.
+    홈페이지를 스크레이핑해 ChromaDB에 임베딩을 저장합니다.
+    기본은 증분 모드로, 바뀐 페이지의 새 청크만 임베딩하고 사라진 청크만 삭제합니다.
+    full_rebuild=True이면 기존 컬렉션을 지우고 전부 다시 만듭니다.
+    embedder를 넘기면 Gemini 대신 사용합니다. (예: 오프라인 테스트용 StubEmbedder)
+    max_tokens/overlap_tokens는 청크 하나의 토큰 예산과 청크 간 겹침 크기입니다.
+    vector_dtype은 NumPy 검색용으로 내보낼 벡터 행렬의 자료형(float32/float16)입니다.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    response = requests.get(url, headers=headers, timeout=30)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, 'html.parser')
-
-    # 1. 모든 페이지의 기본 콘텐츠 영역을 찾습니다.
-    main_content = soup.find(id='_contentBuilder')
-
-    if main_content:
-        print(f" INFO: '{topic}' 페이지에서 id='_contentBuilder' 내용을 추출했습니다.")
-        return main_content.get_text(separator='\n', strip=True)
-    else:
-        print(f"  -> WARN: '{topic}' 페이지에서 id='_contentBuilder' 영역을 찾지 못했습니다. 전체 텍스트를 추출합니다.")
-        return soup.get_text(separator='\n', strip=True)
-        
-        
-def prepare_and_save_embeddings():
     print("서일대학교 홈페이지 정보 스크레이핑 시작...")
-    urls = {
-        "학사공지": "https://www.seoil.ac.kr/seoil/599/subview.do",
-        "공지사항": "https://www.seoil.ac.kr/seoil/598/subview.do",
-        "행사안내": "https://www.seoil.ac.kr/seoil/600/subview.do",
-        "홍보사항": "https://www.seoil.ac.kr/seoil/602/subview.do",
-        "셔틀버스": "https://www.seoil.ac.kr/seoil/520/subview.do",
-        "서일대학교": "https://www.seoil.ac.kr/sites/seoil/index.do",
-        "학교소식": "https://www.seoil.ac.kr/seoil/616/subview.do",
-        "스터디공간": "https://www.seoil.ac.kr/seoil/583/subview.do",
-        "PC이용, VR실": "https://www.seoil.ac.kr/seoil/584/subview.do",
-        "편의점, 카페": "https://www.seoil.ac.kr/seoil/585/subview.do",
-        "학생식당": "https://www.seoil.ac.kr/seoil/3896/subview.do",
-        "휴게공간": "https://www.seoil.ac.kr/seoil/586/subview.do",
-        "편의시설": "https://www.seoil.ac.kr/seoil/587/subview.do",
-        "체육시설": "https://www.seoil.ac.kr/seoil/588/subview.do",
-        "대학생활메뉴얼": "https://www.seoil.ac.kr/seoil/3409/subview.do",
-        "찾아오시는길": "https://www.seoil.ac.kr/seoil/520/subview.do",
-        "도서관": "https://www.seoil.ac.kr/seoil/580/subview.do"
-    }
-    
-    all_chunks = []
-    for topic, url in urls.items():
+    urls = URLS
+
+    # ChromaDB 클라이언트 초기화 및 컬렉션 생성
+    # (ChromaDB는 데이터를 디스크에 자동으로 저장/관리해줍니다)
+    client = chromadb.PersistentClient(path=DB_PATH)
+    if full_rebuild:
         try:
-            text = scrape_and_process_page(topic, url)
-            if not text.strip():
-                print(f"  -> WARN: '{topic}' 페이지에서 추출된 텍스트가 없습니다.")
-                continue
-            
-            # 텍스트를 500자 단위로 자르기
-            for i in range(0, len(text), 500):
-                chunk = text[i:i+500]
-                all_chunks.append({"topic": topic, "content": chunk})
-            print(f"✅ '{topic}' 페이지 스크레이핑 완료")
+            client.delete_collection(name=COLLECTION_NAME)
+            print("기존 DB를 삭제하고 새로 생성합니다.")
+        except Exception:
+            pass
+    collection = client.get_or_create_collection(name=COLLECTION_NAME) # DB 이름 지정
+
+    old_manifest = {"topics": {}} if full_rebuild else load_manifest()
+    old_topics = old_manifest.get("topics", {})
+    if not full_rebuild and not old_topics and collection.count() > 0:
+        # 매니페스트가 없는 예전 DB(chunk_0, chunk_1... ID)는 증분 비교가 불가능하므로 새로 만듭니다.
+        print(f"매니페스트가 없어 기존 DB({collection.count()}개)를 삭제하고 새로 생성합니다.")
+        client.delete_collection(name=COLLECTION_NAME)
+        collection = client.get_or_create_collection(name=COLLECTION_NAME)
+    elif old_topics and collection.count() == 0:
+        # DB 폴더만 비워진 경우 매니페스트를 믿을 수 없으므로 전부 다시 만듭니다.
+        old_topics = {}
 
+    # 이전 실행의 ETag/Last-Modified로 조건부 요청을 보냅니다.
+    headers_by_url = {}
+    for topic, entry in old_topics.items():
+        if entry.get("url") == urls.get(topic):
+            headers_by_url[entry["url"]] = conditional_headers(entry.get("etag"), entry.get("last_modified"))
+
+    new_topics = {}
+    new_chunks = {}  # 이번 실행에서 새로 만든 청크 {id: chunk}
+    # 페이지를 병렬로 가져오고, 도착하는 순서대로 바로 파싱/청킹합니다.
+    # (같은 URL을 쓰는 주제는 한 번만 요청하고 첫 번째 주제로 저장합니다.)
+    for page in fetch_pages(urls, headers_by_url=headers_by_url):
+        topic = page['topics'][0]
+        old_entry = old_topics.get(topic)
+        if len(page['topics']) > 1:
+            print(f" INFO: {page['topics']} 주제가 같은 URL을 공유하여 '{topic}'(으)로 한 번만 처리합니다.")
+        try:
+            # 제목/표 행/목록 항목 단위로 나눈 뒤 토큰 예산에 맞춰 묶습니다.
+            status, entry, chunks = diff_page(topic, page, old_entry, lambda response: chunk_page(
+                topic, page['url'], response.text, max_tokens=max_tokens, overlap_tokens=overlap_tokens))
+            error = page['error']
         except Exception as e:
-            print(f"❌ '{topic}' 페이지 처리 중 오류 발생: {e}")
-            continue
+            # 일시적인 오류로 기존 청크가 지워지지 않도록 이전 상태를 유지합니다.
+            status, entry, chunks, error = "error", old_entry, {}, e
+        if status == "error":
+            print(f"❌ '{topic}' 페이지 처리 중 오류 발생: {error}")
+        elif status == "not_modified":
+            print(f"⏩ '{topic}' 페이지 변경 없음 (304)")
+        elif status == "unchanged":
+            print(f"⏩ '{topic}' 페이지 내용 변경 없음")
+        elif status == "empty":
+            print(f"  -> WARN: '{topic}' 페이지에서 추출된 텍스트가 없습니다.")
+        else:
+            print(f"✅ '{topic}' 페이지 스크레이핑 완료")
+        if entry: new_topics[topic] = entry
+        new_chunks.update(chunks)
 
-    print("\n텍스트 조각들을 임베딩하는 중... (시간이 걸릴 수 있습니다)")
-    if not all_chunks:
+    if not new_topics:
         print("스크레이핑된 데이터가 없어 임베딩을 진행할 수 없습니다.")
         return
-    
 
-    contents = [chunk['content'] for chunk in all_chunks]
+    # 현재 DB에 있는 ID와 이번에 필요한 ID를 비교해 차이만 반영합니다.
+    plan = plan_changes(new_topics, new_chunks, collection.get(include=[])['ids'])
+    ids_to_add, ids_to_delete = plan.add, plan.delete
+    if plan.missing:
+        print(f"  -> WARN: 매니페스트에는 있지만 DB에 없는 청크가 {len(plan.missing)}개 있습니다. --full 옵션으로 다시 생성해주세요.")
+
+    print(f"\n변경 사항: 추가 {len(ids_to_add)}개, 삭제 {len(ids_to_delete)}개, 유지 {len(plan.wanted) - len(ids_to_add)}개")
+
+    if ids_to_add:
+        print("\n새 텍스트 조각들을 임베딩하는 중... (시간이 걸릴 수 있습니다)")
+        contents = [new_chunks[cid]['content'] for cid in ids_to_add]
+        # 배치 단위로 나눠 병렬 임베딩하고, 끝난 배치는 체크포인트에 남겨 중단 시 이어서 진행합니다.
+        embeddings_by_id, _ = embed_in_batches(
+            list(zip(ids_to_add, contents)),
+            embedder=embedder,
+            batch_size=batch_size,
+            max_workers=max_workers,
+            requests_per_sec=requests_per_sec,
+            checkpoint_path=CHECKPOINT_PATH,
+        )
+
+        # 데이터를 ChromaDB에 추가 (같은 ID가 있으면 덮어씁니다)
+        # 주제/URL/섹션/수집 시각을 메타데이터로 같이 저장해 검색 시 where 필터로 쓸 수 있게 합니다.
+        collection.upsert(
+            embeddings=[embeddings_by_id[cid] for cid in ids_to_add],
+            documents=contents,
+            metadatas=[chunk_metadata(new_chunks[cid]['topic'], new_chunks[cid]['url'], new_chunks[cid]['content'],
+                                      new_topics[new_chunks[cid]['topic']]['updated_at'], new_chunks[cid].get('section'))
+                       for cid in ids_to_add],
+            ids=ids_to_add
+        )
+        EmbeddingCheckpoint(CHECKPOINT_PATH).clear()
+
+    if ids_to_delete:
+        collection.delete(ids=ids_to_delete)
+
+    # 메타데이터 없이 저장된 예전 청크는 매니페스트의 주제/URL로 메타데이터만 채웁니다. (재임베딩 없음)
+    stored = collection.get(include=["metadatas", "documents"])
+    owner = {cid: (topic, entry) for topic, entry in new_topics.items() for cid in entry["chunk_ids"]}
+    ids_to_tag = [cid for cid, meta in zip(stored['ids'], stored['metadatas']) if not (meta or {}).get("topic") and cid in owner]
+    if ids_to_tag:
+        documents = dict(zip(stored['ids'], stored['documents']))
+        collection.update(ids=ids_to_tag, metadatas=[
+            chunk_metadata(owner[cid][0], owner[cid][1].get("url"), documents[cid], owner[cid][1].get("updated_at"))
+            for cid in ids_to_tag])
+        print(f"메타데이터 보강: {len(ids_to_tag)}개 청크")
+
+    # 같은 청크로 어휘(BM25) 색인 문서 표와 NumPy 벡터 행렬을 다시 만듭니다.
+    # (앱의 하이브리드 검색 / RETRIEVER_BACKEND="numpy" 용)
+    db_changed = bool(ids_to_add or ids_to_delete or ids_to_tag)
+    if db_changed or not os.path.exists(BM25_PATH) or not os.path.exists(VECTORS_PATH):
+        stored = collection.get(include=["documents", "embeddings", "metadatas"])
+        BM25Index(stored['ids'], stored['documents'], metadatas=stored['metadatas']).save(BM25_PATH)
+        print(f"어휘 색인 갱신: {len(stored['ids'])}개 청크 -> '{BM25_PATH}'")
+        if len(stored['ids']):
+            export_vectors(stored['ids'], stored['documents'], stored['embeddings'], dtype=vector_dtype,
+                           metadatas=stored['metadatas'])
+            print(f"벡터 행렬 내보내기: {len(stored['ids'])}개 ({vector_dtype}) -> '{VECTORS_PATH}'")
+
+    # 실제로 DB가 바뀐 경우에만 index_version을 올립니다. (앱의 답변 캐시가 이 값으로 무효화됩니다)
+    index_version = old_manifest.get("index_version")
+    if db_changed or not index_version:
+        index_version = new_index_version()
+    save_manifest({"topics": new_topics, "updated_at": int(time.time()), "index_version": index_version})
+
+    print(f"\n🎉 임베딩 완료! 총 {collection.count()}개의 정보 조각이 '{DB_PATH}' 폴더에 저장되었습니다.")
+
 
-    # ChromaDB 클라이언트 초기화 및 컬렉션 생성
-    # (ChromaDB는 데이터를 디스크에 자동으로 저장/관리해줍니다)
-    db_path = "./chroma_db"
-    client = chromadb.PersistentClient(path=db_path)
-    collection = client.get_or_create_collection(name="seoil_info_db") # DB 이름 지정
-    
-    embedding_result = genai.embed_content(model="models/embedding-001", content=contents, task_type="RETRIEVAL_DOCUMENT")
-
-    # ChromaDB에 저장할 데이터 형식으로 준비
-    documents = contents
-    embeddings = embedding_result['embedding']
-    ids = [f"chunk_{i}" for i in range(len(documents))] # 각 정보 조각의 고유 ID
-
-    try:
-        if collection.count() > 0:
-            print(f"기존 DB({collection.count()}개)를 삭제하고 새로 생성합니다.")
-            client.delete_collection(name="seoil_info_db")
-            collection = client.get_or_create_collection(name="seoil_info_db")
-    except Exception:
-        pass
-
-    # 데이터를 ChromaDB에 추가
-    collection.add(
-        embeddings=embeddings,
-        documents=documents,
-        ids=ids
-    )
-        
-    print(f"\n🎉 임베딩 완료! 총 {len(documents)}개의 정보 조각이 '{db_path}' 폴더에 저장되었습니다.")
 if __name__ == "__main__":
-    prepare_and_save_embeddings()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="서일대학교 홈페이지 정보를 스크레이핑해 ChromaDB에 저장합니다.")
+    parser.add_argument("--full", action="store_true", help="증분 갱신 대신 DB를 지우고 전부 다시 임베딩합니다.")
+    parser.add_argument("--batch-size", type=int, default=50, help="임베딩 요청 1회에 보낼 청크 수 (기본 50)")
+    parser.add_argument("--workers", type=int, default=3, help="동시에 보낼 임베딩 배치 수 (기본 3)")
+    parser.add_argument("--rate", type=float, default=2.0, help="초당 임베딩 요청 수 제한 (기본 2.0)")
+    parser.add_argument("--max-tokens", type=int, default=300, help="청크 하나의 최대 토큰 수 (기본 300)")
+    parser.add_argument("--overlap", type=int, default=40, help="청크 간 겹치는 토큰 수 (기본 40)")
+    parser.add_argument("--vector-dtype", choices=["float32", "float16"], default="float32", help="내보낼 벡터 행렬 자료형 (기본 float32)")
+    parser.add_argument("--stub-embedder", action="store_true", help="Gemini 대신 오프라인 StubEmbedder를 사용합니다.")
+    args = parser.parse_args()
+    prepare_and_save_embeddings(
+        full_rebuild=args.full,
+        embedder=StubEmbedder() if args.stub_embedder else None,
+        batch_size=args.batch_size,
+        max_workers=args.workers,
+        requests_per_sec=args.rate,
+        max_tokens=args.max_tokens,
+        overlap_tokens=args.overlap,
+        vector_dtype=args.vector_dtype,
+    )
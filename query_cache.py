@@ -0,0 +1,115 @@
+import atexit
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_query(text):
+    """캐시 키용 질문 정규화: 유니코드 NFC, 앞뒤 공백 제거, 연속 공백 축약, 소문자화."""
+    text = unicodedata.normalize('NFC', text or '')
+    return ' '.join(text.split()).lower()
+
+
+class QueryEmbeddingCache:
+    """
+    질문 임베딩을 보관하는 프로세스 전역 LRU 캐시.
+
+    - 정규화된 질문 문자열을 키로 사용하고, max_size를 넘으면 가장 오래 안 쓴 항목을 버립니다.
+    - persist_path가 있으면 디스크(JSON)에 저장해 Streamlit 재시작 후에도 재사용합니다.
+      저장은 flush_interval초에 한 번으로 묶어서 합니다.
+    - hits / misses 카운터로 적중률을 확인할 수 있습니다.
+    """
+
+    def __init__(self, max_size=512, persist_path=None, flush_interval=30.0):
+        self.max_size = max_size
+        self.persist_path = persist_path
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._load()
+        if self.persist_path:
+            atexit.register(self.flush)
+
+    def _load(self):
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return
+        try:
+            with open(self.persist_path, 'r', encoding='utf-8') as f:
+                items = json.load(f)
+            for key, embedding in items[-self.max_size:]:
+                self._data[key] = embedding
+        except (OSError, ValueError, TypeError):
+            # 깨진 캐시 파일은 무시하고 빈 캐시로 시작합니다.
+            self._data.clear()
+
+    def get(self, query):
+        key = normalize_query(query)
+        with self._lock:
+            embedding = self._data.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def peek(self, query):
+        """적중/미스 카운터와 LRU 순서를 건드리지 않고 조회합니다. (이미 있는 임베딩을 재사용할 때)"""
+        with self._lock:
+            return self._data.get(normalize_query(query))
+
+    def put(self, query, embedding):
+        key = normalize_query(query)
+        with self._lock:
+            self._data[key] = embedding
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+            self._dirty = True
+            should_flush = time.monotonic() - self._last_flush >= self.flush_interval
+        if should_flush:
+            self.flush()
+
+    def get_or_compute(self, query, compute):
+        """캐시에 없으면 compute(query)로 임베딩을 만들어 저장한 뒤 돌려줍니다."""
+        embedding = self.get(query)
+        if embedding is None:
+            embedding = compute(query)
+            self.put(query, embedding)
+        return embedding
+
+    def flush(self):
+        if not self.persist_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            items = list(self._data.items())
+            self._dirty = False
+            self._last_flush = time.monotonic()
+        try:
+            os.makedirs(os.path.dirname(self.persist_path) or '.', exist_ok=True)
+            tmp_path = self.persist_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(items, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
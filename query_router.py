@@ -0,0 +1,187 @@
+import math
+import re
+from collections import Counter, namedtuple
+
+from campus_facts import topic_particle
+from location_matcher import AhoCorasick
+from topic_router import TOPIC_CUES
+
+# 라우팅 결과 종류
+CHITCHAT = "chitchat"   # 인사/감사 등 잡담 -> 정해진 답변
+LOCATION = "location"   # "X 어디야?" -> SEOIL_LOCATIONS 설명 + 지도
+FACT = "fact"           # 시설 위치/운영시간, 교통 -> campus_facts 템플릿
+RAG = "rag"             # 그 밖의 질문 -> 검색 + LLM 생성
+ROUTE_KINDS = [CHITCHAT, LOCATION, FACT, RAG]
+
+Route = namedtuple("Route", ["kind", "answer", "location"])
+
+# 잡담 단서 -> 답변 종류
+CHITCHAT_CUES = {
+    "greet": ["안녕", "하이", "hi", "hello", "반가워", "반갑", "ㅎㅇ"],
+    "thanks": ["고마워", "고맙", "감사", "땡큐", "thank", "thx"],
+    "bye": ["잘가", "잘 가", "바이", "bye", "다음에 봐", "수고"],
+    "identity": ["누구야", "누구니", "누구세요", "너는 누구", "넌 누구", "이름이 뭐", "이름 뭐"],
+    "ack": ["ㅋㅋ", "ㅎㅎ", "응", "네", "넵", "그래", "알겠", "오케이", "ok", "좋아", "굿"],
+}
+
+CHITCHAT_ANSWERS = {
+    "greet": "안녕하세요! 서일대학교 AI 챗봇 '용용이'예요. 학교생활에 대해 궁금한 점을 물어보세요. 🐉",
+    "thanks": "도움이 되었다니 기뻐요! 더 궁금한 점이 있으면 언제든 물어보세요. 😊",
+    "bye": "다음에 또 찾아주세요! 좋은 하루 보내세요. 👋",
+    "identity": "저는 서일대학교 학생들을 위한 AI 챗봇 '용용이'예요. 학사, 시설, 셔틀버스 같은 학교 정보를 알려드려요.",
+    "ack": "네! 더 궁금한 점이 있으면 언제든 물어보세요.",
+    "other": "저는 서일대학교 정보를 알려드리는 챗봇 '용용이'예요. 학사, 시설, 셔틀버스 등 학교에 대해 궁금한 점을 물어보세요!",
+}
+
+# 단서를 지우고 나서 남아도 되는 말 (어미, 조사, 부탁 표현, 문장부호)
+FILLER_WORDS = ["알려주세요", "알려줘요", "알려줘", "알려 줘", "있나요", "있어요", "있어", "있니", "인가요", "이에요", "예요",
+                "하세요", "합니다", "습니다", "드려요", "드립니다", "해요", "어요", "에요", "이야", "야", "요", "어",
+                "좀", "은", "는", "이", "가", "에", "용용아", "용용이", "챗봇", "너", "정말", "진짜", "많이"]
+# 학교 정보 질문임을 드러내는 말. 하나라도 있으면 잡담으로 보내지 않습니다.
+DOMAIN_WORDS = sorted({cue for cues in TOPIC_CUES.values() for cue in cues} | {
+    "교수", "연구실", "사무실", "학과", "전화", "번호", "등록금", "납부", "마감", "휴강", "보강", "강의", "수업", "주차",
+    "동아리", "가입", "기숙사", "학생증", "장학", "신청", "일정", "기간", "방법", "어디", "언제", "어떻게", "몇"})
+_NON_WORD = re.compile(r"[\s\W_]+")
+
+
+def _residual(text, spans, fillers):
+    """text에서 spans 구간과 filler 단어를 지우고 남은 글자 (잡담/위치 질문 여부 판정용)."""
+    chars = list(text)
+    for start, end in spans:
+        for i in range(start, end): chars[i] = " "
+    rest = "".join(chars)
+    # 긴 filler부터 지웁니다. ("있어요"를 지우기 전에 "요"만 지우지 않도록)
+    for word in sorted({fillers.patterns[pid] for _, _, pid in fillers.iter(rest)}, key=len, reverse=True):
+        rest = rest.replace(word, " ")
+    return _NON_WORD.sub("", rest)
+
+
+class NgramClassifier:
+    """
+    문자 n-gram 다항 나이브 베이즈. 잡담 규칙이 이미 걸린 짧은 질문을 잡담으로 확정할 때만 씁니다.
+    외부 라이브러리 없이 CPU에서 수 µs 안에 끝나도록 작게 유지합니다.
+    """
+
+    def __init__(self, ngram_range=(1, 3), alpha=1.0):
+        self.ngram_range = ngram_range
+        self.alpha = alpha
+        self.labels = []
+        self._counts = {}
+        self._totals = {}
+        self._priors = {}
+        self._vocab = set()
+
+    def features(self, text):
+        text = _NON_WORD.sub(" ", str(text or "").lower()).strip()
+        low, high = self.ngram_range
+        return Counter(text[i:i + n] for n in range(low, high + 1) for i in range(len(text) - n + 1))
+
+    def fit(self, texts, labels):
+        docs = Counter(labels)
+        self.labels = sorted(docs)
+        self._priors = {label: math.log(docs[label] / len(labels)) for label in self.labels}
+        self._counts = {label: Counter() for label in self.labels}
+        for text, label in zip(texts, labels):
+            self._counts[label].update(self.features(text))
+        self._vocab = set().union(*self._counts.values())
+        self._totals = {label: sum(c.values()) for label, c in self._counts.items()}
+        return self
+
+    def predict_proba(self, text):
+        """{라벨: 확률}"""
+        grams = self.features(text)
+        v = len(self._vocab) or 1
+        logs = {}
+        for label in self.labels:
+            counts, denom = self._counts[label], self._totals[label] + self.alpha * v
+            logs[label] = self._priors[label] + sum(
+                n * math.log((counts.get(g, 0) + self.alpha) / denom) for g, n in grams.items())
+        top = max(logs.values())
+        exp = {label: math.exp(value - top) for label, value in logs.items()}
+        total = sum(exp.values())
+        return {label: value / total for label, value in exp.items()}
+
+
+# 분류기 기본 학습 예문 (잡담 / 정보 질문)
+SEED_EXAMPLES = [
+    ("안녕하세요", CHITCHAT), ("안녕 용용아", CHITCHAT), ("반가워요", CHITCHAT), ("하이", CHITCHAT),
+    ("고마워", CHITCHAT), ("감사합니다", CHITCHAT), ("정말 고마워요", CHITCHAT), ("땡큐", CHITCHAT),
+    ("잘가", CHITCHAT), ("다음에 또 올게", CHITCHAT), ("수고했어", CHITCHAT), ("너 누구야", CHITCHAT),
+    ("이름이 뭐야", CHITCHAT), ("ㅋㅋㅋㅋ", CHITCHAT), ("심심해", CHITCHAT), ("뭐해", CHITCHAT),
+    ("오늘 기분 어때", CHITCHAT), ("너 귀엽다", CHITCHAT), ("좋은 아침", CHITCHAT), ("잘 자", CHITCHAT),
+    ("장학금 신청 기간이 언제야", RAG), ("수강신청 방법 알려줘", RAG), ("도서관 열람실 운영 시간", RAG),
+    ("학생증 재발급은 어떻게 해", RAG), ("이번 주 학식 메뉴 뭐야", RAG), ("휴학 신청 서류", RAG),
+    ("졸업 요건 알려줘", RAG), ("스터디룸 예약 방법", RAG), ("계절학기 등록금", RAG), ("축제 언제 해", RAG),
+    ("성적 정정 기간", RAG), ("복학 절차가 궁금해", RAG), ("셔틀버스 시간표", RAG), ("공지사항 알려줘", RAG),
+    ("기숙사 신청 어떻게 해", RAG), ("체육관 이용 방법", RAG), ("PC실 운영 시간", RAG), ("취업 특강 일정", RAG),
+]
+
+
+def default_classifier():
+    texts, labels = zip(*SEED_EXAMPLES)
+    return NgramClassifier().fit(texts, labels)
+
+
+class QueryRouter:
+    """
+    질문을 잡담 / 위치 / 고정 정보 / 검색(RAG) 으로 나눠, 앞의 세 가지는 검색과 LLM 호출 없이 바로 답합니다.
+
+    1) 고정 정보: FactMatcher가 확실하다고 판단하면 템플릿 답변
+    2) 위치: 위치 의도 단어 + 건물 이름 하나뿐인 짧은 질문("배양관 어디야?")이면 SEOIL_LOCATIONS 설명 (지도는 답변의 건물 이름으로 표시)
+    3) 잡담: 잡담 단서와 어미/조사 외에 남는 말이 없으면 정해진 답변
+    4) 분류기(선택): 잡담 단서가 있고 남은 말이 max_residual 글자 이하이며 학교 정보 단어가 없을 때만,
+       잡담 확률이 threshold 이상이면 잡담으로 확정합니다. (분류기 혼자서는 잡담으로 보내지 않습니다)
+    그 밖에는 RAG. 잘못 잡담으로 보내는 쪽이 검색 한 번 더 하는 것보다 나쁘므로 애매하면 항상 RAG로 보냅니다.
+    """
+
+    def __init__(self, locations, location_matcher, fact_matcher, chitchat_cues=CHITCHAT_CUES,
+                 chitchat_answers=CHITCHAT_ANSWERS, filler_words=FILLER_WORDS, domain_words=DOMAIN_WORDS,
+                 classifier=None, classifier_threshold=0.9, max_residual=4):
+        self.locations = locations
+        self.location_matcher = location_matcher
+        self.fact_matcher = fact_matcher
+        self.chitchat_answers = chitchat_answers
+        self._cue_kinds = {}
+        for kind, cues in chitchat_cues.items():
+            for cue in cues:
+                self._cue_kinds.setdefault(cue.lower(), kind)
+        self._chitchat = AhoCorasick(self._cue_kinds)
+        self._fillers = AhoCorasick(filler_words)
+        self._domain = AhoCorasick(w.lower() for w in domain_words)
+        self.classifier = classifier
+        self.classifier_threshold = classifier_threshold
+        self.max_residual = max_residual
+
+    def _location_answer(self, name):
+        desc = self.locations[name].get("desc", "")
+        number, _, use = desc.partition(":")
+        if use.strip():
+            return f"📍 {topic_particle(name)} 캠퍼스 **{number.strip()}**이에요. ({use.strip()})\n\n아래 지도에서 위치를 확인하세요."
+        return f"📍 **{name}** 위치를 지도에서 확인하세요."
+
+    def route(self, question):
+        text = str(question or "").strip()
+        if not text: return Route(RAG, None, None)
+
+        fact = self.fact_matcher.match(text)
+        if fact.confident:
+            return Route(FACT, fact.answer, None)
+
+        matches = self.location_matcher.find_all(text)
+        names = self.location_matcher.locations_in(text, kinds=("name",), matches=matches)
+        if len(names) == 1 and self.location_matcher.has_intent(text, matches):
+            if len(_residual(text, [(m.start, m.end) for m in matches], self._fillers)) <= self.max_residual:
+                return Route(LOCATION, self._location_answer(names[0]), names[0])
+
+        lowered = text.lower()
+        hits = list(self._chitchat.iter(lowered))
+        if hits and not matches and not fact.facts and next(self._domain.iter(lowered), None) is None:
+            residual = _residual(lowered, [(s, e) for s, e, _ in hits], self._fillers)
+            if not residual or (self.classifier and len(residual) <= self.max_residual and
+                                self.classifier.predict_proba(text).get(CHITCHAT, 0.0) >= self.classifier_threshold):
+                # 가장 긴 단서의 종류로 답합니다. (예: "안녕 고마워" -> 둘 다 같은 길이면 먼저 나온 것)
+                start, end, pid = max(hits, key=lambda h: (h[1] - h[0], -h[0]))
+                kind = self._cue_kinds[self._chitchat.patterns[pid]]
+                return Route(CHITCHAT, self.chitchat_answers[kind], None)
+
+        return Route(RAG, None, None)
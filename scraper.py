@@ -0,0 +1,116 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# 재시도할 HTTP 상태 코드 (일시적인 서버 오류 / 요청 제한)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def create_session(pool_size=8):
+    """keep-alive 연결을 재사용하는 공용 requests.Session을 만듭니다."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+
+class HostLimiter:
+    """호스트별 동시 요청 수를 제한합니다."""
+
+    def __init__(self, per_host=4):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._semaphores = {}
+
+    def get(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+
+def fetch_with_retry(session, url, limiter=None, timeout=30, retries=3, backoff=1.0, headers=None):
+    """
+    지수 백오프로 재시도하며 페이지를 가져옵니다.
+    연결 오류나 RETRY_STATUS_CODES 응답일 때만 재시도하고, 그 외 4xx는 바로 예외를 올립니다.
+    """
+    semaphore = limiter.get(url) if limiter else None
+    for attempt in range(retries + 1):
+        try:
+            if semaphore:
+                with semaphore:
+                    response = session.get(url, headers=headers, timeout=timeout)
+            else:
+                response = session.get(url, headers=headers, timeout=timeout)
+
+            if response.status_code in RETRY_STATUS_CODES and attempt < retries:
+                raise requests.HTTPError(f"{response.status_code} 응답", response=response)
+            response.raise_for_status()
+            return response
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            status = e.response.status_code if getattr(e, 'response', None) is not None else None
+            if attempt >= retries or (status is not None and status not in RETRY_STATUS_CODES):
+                raise
+            # 지터를 섞어 동시에 실패한 요청들이 한꺼번에 재시도하지 않도록 합니다.
+            delay = backoff * (2 ** attempt) + random.uniform(0, backoff)
+            print(f"  -> RETRY: {url} ({attempt + 1}/{retries}) {delay:.1f}초 후 재시도 - {e}")
+            time.sleep(delay)
+
+
+def conditional_headers(etag=None, last_modified=None):
+    """이전 응답의 ETag/Last-Modified로 조건부 요청 헤더를 만듭니다."""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def fetch_pages(urls, max_workers=6, per_host=4, timeout=30, retries=3, backoff=1.0, session=None, headers_by_url=None):
+    """
+    {topic: url} 딕셔너리의 페이지들을 병렬로 가져와, 도착하는 순서대로 yield 합니다.
+
+    같은 URL을 가리키는 주제들은 한 번만 요청하며, 결과의 'topics'에 함께 담깁니다.
+    headers_by_url로 URL별 추가 헤더(조건부 요청 등)를 넘길 수 있고, 이 경우 304 응답도 그대로 전달됩니다.
+    각 결과는 {"url", "topics", "response", "error"} 딕셔너리입니다.
+    """
+    headers_by_url = headers_by_url or {}
+    topics_by_url = {}
+    for topic, url in urls.items():
+        topics_by_url.setdefault(url, []).append(topic)
+
+    own_session = session is None
+    if own_session:
+        session = create_session(pool_size=max_workers)
+    limiter = HostLimiter(per_host=per_host)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                executor.submit(fetch_with_retry, session, url, limiter, timeout, retries, backoff, headers_by_url.get(url)): url
+                for url in topics_by_url
+            }
+            for future in as_completed(futures):
+                url = futures[future]
+                result = {"url": url, "topics": topics_by_url[url], "response": None, "error": None}
+                try:
+                    result["response"] = future.result()
+                except Exception as e:
+                    result["error"] = e
+                yield result
+    finally:
+        if own_session:
+            session.close()
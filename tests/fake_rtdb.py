@@ -0,0 +1,102 @@
+import json
+from urllib.parse import urlsplit
+
+import requests
+
+from firebase_client import FirebaseClient
+
+DB_URL = "https://example.firebaseio.com"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, data=None):
+        self.status_code = status_code
+        self._data = data
+        self.text = json.dumps(data)
+
+    def json(self):
+        return self._data
+
+
+class FakeRTDB:
+    """
+    Realtime Database REST API를 흉내 낸 가짜 session. (get/put/patch, get은 shallow / orderBy="$key" 구간 / limitToLast 지원)
+    failures에 넣은 동작을 PATCH마다 하나씩 꺼내 씁니다.
+      "drop": 반영하지 않고 연결 오류, "timeout": 반영한 뒤 응답 없이 ReadTimeout, 정수: 반영하지 않고 그 상태 코드
+    """
+
+    def __init__(self, failures=(), get_failures=()):
+        self.data = {}
+        self.failures = list(failures)
+        self.get_failures = list(get_failures)
+        self.patches = []
+        self.puts = []
+        self.gets = 0
+        self.get_params = []
+
+    @staticmethod
+    def _path(url):
+        return urlsplit(url).path.strip('/').removesuffix('.json')
+
+    def node(self, path):
+        node = self.data
+        for part in [p for p in path.split('/') if p]:
+            if not isinstance(node, dict) or part not in node: return None
+            node = node[part]
+        return node
+
+    def _apply(self, body):
+        for path, value in body.items():
+            parts = path.split('/')
+            node = self.data
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            if isinstance(value, dict) and ".sv" in value:
+                node[parts[-1]] = node.get(parts[-1], 0) + value[".sv"]["increment"]
+            else:
+                node[parts[-1]] = value
+
+    def request(self, method, url, **kwargs):
+        # FirebaseClient.request()가 session.request()로 보냅니다.
+        return getattr(self, method.lower())(url, **kwargs)
+
+    def put(self, url, json=None, timeout=None):
+        self.puts.append(json)
+        self._apply({self._path(url): json})
+        return FakeResponse(200, json)
+
+    def patch(self, url, json=None, timeout=None):
+        self.patches.append(json)
+        failure = self.failures.pop(0) if self.failures else None
+        if failure == "drop":
+            raise requests.ConnectionError("dropped")
+        if isinstance(failure, int):
+            return FakeResponse(failure, {"error": "fail"})
+        self._apply(json)
+        if failure == "timeout":
+            raise requests.ReadTimeout("applied but no response")
+        return FakeResponse(200, json)
+
+    def get(self, url, params=None, timeout=None, **kwargs):
+        self.gets += 1
+        self.get_params.append(dict(params or {}))
+        if self.get_failures and self.get_failures.pop(0):
+            raise requests.ConnectionError("dropped")
+        node = self.node(self._path(url)) or {}
+        params = params or {}
+        if params.get("shallow") == "true" and isinstance(node, dict):
+            node = {k: True for k in node}
+        if params.get("orderBy") == '"$key"' and isinstance(node, dict):
+            start = json.loads(params["startAt"]) if "startAt" in params else None
+            end = json.loads(params["endAt"]) if "endAt" in params else None
+            node = {k: v for k, v in node.items() if (start is None or k >= start) and (end is None or k <= end)}
+            if "limitToLast" in params:
+                node = {k: node[k] for k in sorted(node)[-int(params["limitToLast"]):]}
+        return FakeResponse(200, node or None)
+
+
+def fake_client(db):
+    """세션만 가짜 RTDB로 바꾼 FirebaseClient."""
+    client = FirebaseClient(DB_URL, timeout=1, backoff=0.0)
+    client.session = db
+    return client
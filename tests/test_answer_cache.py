@@ -0,0 +1,68 @@
+import pytest
+
+import answer_cache
+from answer_cache import DEFAULT_TTL, TOPIC_TTLS, SemanticAnswerCache, ttl_for_topics
+
+DOCS = ["[셔틀버스] 망우역 1번 출구에서 탑니다."]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(answer_cache.time, "time", lambda: now[0])
+    return now
+
+
+def test_hit_only_above_threshold():
+    cache = SemanticAnswerCache(threshold=0.95)
+    cache.store([1.0, 0.0], DOCS, "망우역 1번 출구예요.")
+    assert cache.lookup([1.0, 0.1], DOCS) == "망우역 1번 출구예요."   # cos ~ 0.995
+    assert cache.lookup([1.0, 1.0], DOCS) is None                      # cos ~ 0.707
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_different_documents_or_prompt_do_not_share_answers():
+    cache = SemanticAnswerCache()
+    cache.store([1.0, 0.0], DOCS, "답변", prompt="[이전 대화]\n")
+    assert cache.lookup([1.0, 0.0], ["[학생식당] 동아리관 2F"], prompt="[이전 대화]\n") is None
+    assert cache.lookup([1.0, 0.0], DOCS, prompt="[이전 대화]\n사용자: 도서관 어디야?") is None
+    assert cache.lookup([1.0, 0.0], DOCS, prompt="[이전 대화]\n") == "답변"
+
+
+def test_ttl_uses_shortest_topic():
+    assert ttl_for_topics(["셔틀버스", "학사공지"]) == TOPIC_TTLS["학사공지"]
+    assert ttl_for_topics(["없는 주제"]) == DEFAULT_TTL
+    assert ttl_for_topics([]) == DEFAULT_TTL
+
+
+def test_entries_expire_after_topic_ttl(clock):
+    cache = SemanticAnswerCache()
+    cache.store([1.0, 0.0], DOCS, "공지 답변", topics=["학사공지"])
+    clock[0] += TOPIC_TTLS["학사공지"] - 1
+    assert cache.lookup([1.0, 0.0], DOCS) == "공지 답변"
+    clock[0] += 2
+    assert cache.lookup([1.0, 0.0], DOCS) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_index_version_bump_clears_entries():
+    version = ["v1"]
+    cache = SemanticAnswerCache(index_version_fn=lambda: version[0])
+    cache.store([1.0, 0.0], DOCS, "예전 답변")
+    assert cache.lookup([1.0, 0.0], DOCS) == "예전 답변"
+    version[0] = "v2"
+    assert cache.lookup([1.0, 0.0], DOCS) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_evicts_least_recently_used(clock):
+    cache = SemanticAnswerCache(max_entries=2)
+    for i, doc in enumerate(["a", "b"]):
+        cache.store([1.0, 0.0], [doc], f"답변 {doc}")
+        clock[0] += 1
+    assert cache.lookup([1.0, 0.0], ["a"]) == "답변 a"   # a를 최근 사용으로
+    clock[0] += 1
+    cache.store([1.0, 0.0], ["c"], "답변 c")
+    assert cache.lookup([1.0, 0.0], ["b"]) is None
+    assert cache.lookup([1.0, 0.0], ["a"]) == "답변 a"
+    assert cache.stats()["size"] == 2
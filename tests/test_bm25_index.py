@@ -0,0 +1,101 @@
+import pytest
+
+from bm25_index import BM25Index, Hit, analyze, hybrid_search, is_decisive, reciprocal_rank_fusion
+
+IDS = ["bus", "food", "lib", "store"]
+DOCS = [
+    "[셔틀버스] 2013번 버스는 망우역에서 출발합니다.",
+    "[학생식당] 학생식당은 11시부터 14시까지 운영합니다.",
+    "[도서관] 도서관 열람실은 9시부터 22시까지 엽니다.",
+    "[편의점, 카페] 편의점은 학생회관 1층에 있습니다.",
+]
+METAS = [{"topic": "셔틀버스"}, {"topic": "학생식당"}, {"topic": "도서관"}, {"topic": "편의점, 카페"}]
+
+
+@pytest.fixture
+def index():
+    return BM25Index(IDS, DOCS, metadatas=METAS)
+
+
+def test_analyze_strips_particles_and_keeps_short_words():
+    assert analyze("셔틀버스는 책") == ["셔틀", "틀버", "버스", "셔틀버", "틀버스", "책"]
+    assert "013" in analyze("2013번")
+
+
+def test_search_ranks_matching_chunk_first(index):
+    hits = index.search("2013번 버스 어디서 타?")
+    assert hits[0].id == "bus" and hits[0].coverage > 0.5
+    assert index.search("도서관 열람실")[0].id == "lib"
+    assert len(index.search("운영 시간", top_k=1)) == 1
+    assert index.search("알려줘") == [] and BM25Index([], []).search("버스") == []
+
+
+def test_where_filters_before_scoring(index):
+    hits = index.search("학생식당 학생회관", where={"topic": {"$in": ["편의점, 카페", "도서관"]}})
+    assert [hit.id for hit in hits] == ["store"]
+
+
+def test_save_and_load_round_trip(index, tmp_path):
+    path = str(tmp_path / "bm25_index.json")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.ids == IDS and loaded.metadata("lib") == {"topic": "도서관"}
+    assert loaded.search("열람실") == index.search("열람실")
+    assert BM25Index.load(str(tmp_path / "없음.json")) is None
+
+
+def test_is_decisive():
+    assert not is_decisive([])
+    assert is_decisive([Hit("a", 5.0, 0.9)])
+    assert is_decisive([Hit("a", 5.0, 0.9), Hit("b", 3.0, 0.9)])
+    assert not is_decisive([Hit("a", 5.0, 0.9), Hit("b", 4.0, 0.9)])     # 2위와 차이가 작음
+    assert not is_decisive([Hit("a", 5.0, 0.5), Hit("b", 1.0, 0.5)])     # 질문 토큰을 덜 포함함
+
+
+def test_reciprocal_rank_fusion():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["b", "c", "d"]], k=60, with_scores=True)
+    assert [cid for cid, _ in fused] == ["b", "c", "a", "d"]
+    assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+    assert reciprocal_rank_fusion([["a", "b"], ["b"]], top_k=1) == ["b"]
+
+
+class RecordingVectorSearch:
+    def __init__(self, ids, fail=False):
+        self.ids = ids
+        self.fail = fail
+        self.calls = []
+
+    def __call__(self, query, n, where):
+        self.calls.append((query, n, where))
+        if self.fail: raise RuntimeError("embedding failed")
+        return self.ids[:n], [f"vector:{cid}" for cid in self.ids[:n]]
+
+
+def test_hybrid_skips_vector_search_when_lexical_is_decisive(index):
+    vector = RecordingVectorSearch(["food"])
+    result = hybrid_search("2013번 셔틀버스", index, vector, top_k=1)
+    assert result["decisive"] and result["ids"] == ["bus"] and vector.calls == []
+    assert result["documents"] == [DOCS[0]] and result["metadatas"] == [METAS[0]]
+
+
+def test_hybrid_fuses_both_rankings_with_candidates_depth(index):
+    vector = RecordingVectorSearch(["store", "lib", "food", "bus"])
+    result = hybrid_search("운영 시간", index, vector, top_k=3, candidates=4, where={"topic": {"$ne": "x"}})
+    assert vector.calls == [("운영 시간", 4, {"topic": {"$ne": "x"}})]
+    assert not result["decisive"] and len(result["ids"]) == 3
+    assert result["scores"] == sorted(result["scores"], reverse=True)
+    # 벡터 검색이 돌려준 본문을 우선 씁니다.
+    assert all(doc.startswith("vector:") for doc in result["documents"])
+
+
+def test_hybrid_falls_back_to_lexical_when_vector_search_fails(index):
+    result = hybrid_search("운영 시간", index, RecordingVectorSearch([], fail=True), top_k=2)
+    assert result["ids"] and result["documents"][0] in DOCS
+    with pytest.raises(RuntimeError):
+        hybrid_search("알려줘", index, RecordingVectorSearch([], fail=True))
+
+
+def test_hybrid_without_lexical_index():
+    result = hybrid_search("버스", None, RecordingVectorSearch(["bus", "food"]), top_k=2)
+    assert result["ids"] == ["bus", "food"] and result["documents"] == ["vector:bus", "vector:food"]
+    assert result["metadatas"] == [{}, {}]
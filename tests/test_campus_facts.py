@@ -0,0 +1,33 @@
+import pytest
+
+from campus_facts import FactMatcher
+
+
+@pytest.fixture(scope="module")
+def matcher():
+    return FactMatcher()
+
+
+@pytest.mark.parametrize("question", ["2013번 버스 몇 시에 와?", "지하철 몇 시까지 다녀?", "학식 메뉴 뭐야?", "카페 주말에 열어?"])
+def test_unanswerable_slot_is_not_confident(matcher, question):
+    result = matcher.match(question)
+    assert not result.confident and result.answer is None
+
+
+def test_specific_bus_does_not_expand_group(matcher):
+    assert matcher.match("2013번 버스 어디서 타?").facts == ["bus_green"]
+    assert matcher.match("셔틀버스 정류장 어디야?").facts == ["shuttle"]
+
+
+def test_group_alias_expands_when_no_bus_named(matcher):
+    result = matcher.match("버스 몇 번 타?")
+    assert result.facts == ["bus_blue", "bus_green", "bus_yellow", "shuttle"] and result.confident
+
+
+def test_group_expands_next_to_other_facts(matcher):
+    assert matcher.match("지하철이랑 버스 어디서 타?").facts == ["subway", "bus_blue", "bus_green", "bus_yellow", "shuttle"]
+
+
+def test_confident_answers(matcher):
+    assert "11:00 ~ 13:30" in matcher.match("학식 몇 시까지 해?").answer
+    assert "배양관 B2" in matcher.match("편의점 어디 있어?").answer
@@ -0,0 +1,48 @@
+import pandas as pd
+
+from bench_chat_frame import make_history
+from chat_frame import build_chat_frame, legacy_flatten
+
+
+def test_columns_and_dtypes():
+    frame = build_chat_frame({
+        "u1": {"1700000000000": {"role": "user", "content": "셔틀버스 시간"},
+               "1700000000001": {"role": "model", "content": "8시부터입니다."}},
+        "u2": {"1700000100000": {"role": "user", "content": "도서관 위치"}},
+    })
+    assert list(frame.columns) == ["uid", "timestamp", "datetime", "date", "role", "content"]
+    assert frame["uid"].dtype == "category" and list(frame["uid"].cat.categories) == ["u1", "u2"]
+    assert frame["timestamp"].dtype == "int64" and frame["timestamp"].tolist()[0] == 1700000000000
+    assert list(frame["role"].cat.categories) == ["user", "model"]
+    assert frame["role"].tolist() == ["user", "model", "user"]
+    assert frame["content"].tolist() == ["셔틀버스 시간", "8시부터입니다.", "도서관 위치"]
+    assert (frame["date"] == frame["datetime"].dt.normalize()).all()
+
+
+def test_unknown_roles_become_nan():
+    frame = build_chat_frame({"u1": {"1": {"role": "system", "content": "x"}, "2": {"content": "y"}}})
+    assert frame["role"].isna().all() and len(frame) == 2
+
+
+def test_malformed_keys_and_messages_do_not_raise():
+    frame = build_chat_frame({"u1": {"1700000000000": {"role": "user", "content": "학식"},
+                                     "draft": {"role": "user", "content": "임시"},
+                                     "1700000000002": "깨진 항목"}})
+    assert frame["timestamp"].tolist() == [1700000000000, 0, 1700000000002]
+    assert frame["content"].tolist() == ["학식", "임시", None]
+    assert frame["role"].tolist()[:2] == ["user", "user"] and pd.isna(frame["role"].iloc[2])
+
+
+def test_empty_history():
+    for data in (None, {}, {"u1": {}, "u2": None}):
+        frame = build_chat_frame(data)
+        assert frame.empty and "date" in frame.columns
+
+
+def test_matches_legacy_flatten():
+    chats = make_history(2000, 30, seed=1)
+    frame, legacy = build_chat_frame(chats), legacy_flatten(chats)
+    assert len(frame) == len(legacy) == 2000
+    assert frame["date"].dt.strftime("%Y-%m-%d").tolist() == legacy["date"].tolist()
+    assert frame["role"].astype(object).tolist() == legacy["role"].tolist()
+    assert frame["content"].tolist() == legacy["content"].tolist()
@@ -0,0 +1,170 @@
+import json
+import time
+
+import pytest
+
+from analytics import message_increments
+from chat_logger import ChatLogWriter
+from fake_rtdb import FakeRTDB, fake_client
+
+
+def make_writer(session, tmp_path, **kwargs):
+    kwargs.setdefault("extra_updates_fn", message_increments)
+    writer = ChatLogWriter(fake_client(session), journal_path=str(tmp_path / "journal.jsonl"),
+                           batch_window=0.01, retries=2, backoff=0.0, replay_interval=0.0, start=False, **kwargs)
+    writer._tokens["u1"] = "token"
+    return writer
+
+
+def records(*keys):
+    return [{"uid": "u1", "key": key, "data": {"role": "user", "content": "장학금 신청", "timestamp": int(key)}}
+            for key in keys]
+
+
+def test_timeout_after_apply_is_not_counted_twice(tmp_path):
+    db = FakeRTDB(failures=["timeout"])
+    writer = make_writer(db, tmp_path)
+    writer._send(records("1700000000000", "1700000000001"))
+    assert db.node("stats/totals/messages") == 2
+    assert set(db.node("chat_history/u1")) == {"1700000000000", "1700000000001"}
+    assert len(db.patches) == 1 and writer.sent == 2 and writer.journaled == 0
+
+
+def test_dropped_request_is_retried_with_increments(tmp_path):
+    db = FakeRTDB(failures=["drop"])
+    writer = make_writer(db, tmp_path)
+    writer._send(records("1700000000000"))
+    assert db.node("stats/totals/messages") == 1 and len(db.patches) == 2
+
+
+def test_server_error_after_retries_goes_to_journal_and_replays_once(tmp_path):
+    db = FakeRTDB(failures=[500, 500, 500])
+    writer = make_writer(db, tmp_path)
+    writer._send(records("1700000000000"))
+    assert writer.journaled == 1 and writer.failed == 1 and db.node("stats/totals/messages") is None
+    with open(tmp_path / "journal.jsonl", encoding="utf-8") as f:
+        assert [json.loads(line)["key"] for line in f] == ["1700000000000"]
+
+    writer._maybe_replay()
+    assert db.node("stats/totals/messages") == 1 and writer.journaled == 0
+    assert not (tmp_path / "journal.jsonl").exists()
+
+
+def test_replay_skips_messages_that_were_already_saved(tmp_path):
+    db = FakeRTDB(failures=["timeout", "drop", "drop"], get_failures=[True, True])
+    writer = make_writer(db, tmp_path)
+    writer._send(records("1700000000000"))
+    # 응답을 받지 못했고 저장 여부도 확인하지 못했으므로 저널에 남습니다.
+    assert writer.journaled == 1 and db.node("stats/totals/messages") == 1
+
+    writer._maybe_replay()
+    assert db.node("stats/totals/messages") == 1 and writer.journaled == 0
+    assert writer.sent == 1
+
+
+def test_auth_error_is_journaled_without_retry(tmp_path):
+    db = FakeRTDB(failures=[401])
+    writer = make_writer(db, tmp_path)
+    writer._send(records("1700000000000"))
+    assert len(db.patches) == 1 and writer.journaled == 1
+
+
+def test_journal_count_survives_restart(tmp_path):
+    db = FakeRTDB(failures=[403])
+    make_writer(db, tmp_path)._send(records("1700000000000", "1700000000001"))
+    assert make_writer(FakeRTDB(), tmp_path).journaled == 2
+
+
+@pytest.mark.parametrize("failures", [["timeout"], ["drop"], [503]])
+def test_chat_history_matches_counters(tmp_path, failures):
+    db = FakeRTDB(failures=failures)
+    writer = make_writer(db, tmp_path)
+    writer._send(records("1700000000000", "1700000000001", "1700000000002"))
+    writer._maybe_replay()
+    assert db.node("stats/totals/messages") == len(db.node("chat_history/u1"))
+
+
+def journal_keys(tmp_path):
+    with open(tmp_path / "journal.jsonl", encoding="utf-8") as f:
+        return [json.loads(line)["key"] for line in f]
+
+
+class CrashingRTDB(FakeRTDB):
+    """PATCH를 받으면 프로세스가 죽은 것처럼 멈춥니다. (그 시점의 저널 내용을 기록해 둡니다)"""
+
+    def __init__(self, journal):
+        super().__init__()
+        self.journal = journal
+        self.journal_at_patch = None
+
+    def patch(self, url, json=None, timeout=None):
+        with open(self.journal, encoding="utf-8") as f:
+            self.journal_at_patch = f.read()
+        raise KeyboardInterrupt
+
+
+def test_journal_is_kept_until_replay_is_confirmed(tmp_path):
+    make_writer(FakeRTDB(failures=[403]), tmp_path)._send(records("1700000000000", "1700000000001"))
+    db = CrashingRTDB(tmp_path / "journal.jsonl")
+    with pytest.raises(KeyboardInterrupt):
+        make_writer(db, tmp_path)._maybe_replay()
+    assert db.journal_at_patch.count("\n") == 2
+    assert journal_keys(tmp_path) == ["1700000000000", "1700000000001"]
+
+    # 다음 실행에서 다시 보내고 나서야 저널이 비워집니다.
+    writer = make_writer(FakeRTDB(), tmp_path)
+    writer._maybe_replay()
+    assert not (tmp_path / "journal.jsonl").exists() and writer.journaled == 0
+
+
+def test_replay_rewrites_journal_with_only_the_unsent_records(tmp_path):
+    writer = make_writer(FakeRTDB(failures=[403]), tmp_path)
+    writer._send(records("1700000000000"))
+    writer._append_journal([{"uid": "u2", "key": "1700000000005", "data": {"role": "user", "content": "학식"}}])
+    db = FakeRTDB()
+    writer = make_writer(db, tmp_path)   # u2는 아직 로그인하지 않아 토큰이 없습니다.
+    writer._maybe_replay()
+    assert set(db.node("chat_history/u1")) == {"1700000000000"}
+    assert journal_keys(tmp_path) == ["1700000000005"] and writer.journaled == 1
+    assert not (tmp_path / "journal.jsonl.tmp").exists()
+
+
+def test_records_that_fail_again_stay_in_the_journal(tmp_path):
+    make_writer(FakeRTDB(failures=[403]), tmp_path)._send(records("1700000000000"))
+    writer = make_writer(FakeRTDB(failures=[401]), tmp_path)
+    writer._maybe_replay()
+    assert journal_keys(tmp_path) == ["1700000000000"] and writer.journaled == 1
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_background_writer_batches_per_user(tmp_path):
+    db = FakeRTDB()
+    writer = ChatLogWriter(fake_client(db), journal_path=str(tmp_path / "journal.jsonl"),
+                           batch_window=0.2, backoff=0.0, extra_updates_fn=message_increments)
+    writer.log("u1", "t1", "user", "장학금 신청 언제야?")
+    writer.log("u1", "t1", "model", "다음 주까지입니다.")
+    writer.log("u2", "t2", "user", "셔틀버스 시간")
+    writer.flush()
+    writer.close()
+    # 같은 밀리초에 남긴 메시지도 키가 겹치지 않고, 사용자별로 한 번씩 PATCH 합니다.
+    assert len(db.node("chat_history/u1")) == 2 and len(db.node("chat_history/u2")) == 1
+    assert db.node("stats/totals/messages") == 3 and db.node("stats/keywords/장학금") == 1
+    assert len(db.patches) == 2 and writer.stats()["sent"] == 3
+
+
+def test_background_writer_journals_outage_and_replays(tmp_path):
+    db = FakeRTDB(failures=["drop"] * 3)
+    writer = ChatLogWriter(fake_client(db), journal_path=str(tmp_path / "journal.jsonl"),
+                           batch_window=0.01, retries=2, backoff=0.0, replay_interval=0.05,
+                           extra_updates_fn=message_increments)
+    writer.log("u1", "t1", "user", "도서관 몇 시까지 해?")
+    assert wait_for(lambda: writer.stats()["sent"] == 1)
+    writer.close()
+    assert writer.stats()["failed"] == 1 and writer.stats()["journaled"] == 0
+    assert db.node("stats/totals/messages") == 1 and len(db.node("chat_history/u1")) == 1
@@ -0,0 +1,30 @@
+import random
+
+import pytest
+
+from chunker import pack_blocks
+from tokens import estimate_tokens
+
+
+def blocks(seed, count=60):
+    rng = random.Random(seed)
+    words = ["수강신청", "기간", "안내", "학생", "등록금", "납부", "셔틀버스", "운행", "시간표", "도서관", "열람실", "이용"]
+    return [("학사 안내", " ".join(rng.choice(words) for _ in range(rng.randint(3, 40)))) for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(20))
+@pytest.mark.parametrize("max_tokens,overlap_tokens", [(120, 40), (200, 80), (80, 60)])
+def test_chunks_stay_within_budget_after_overlap(seed, max_tokens, overlap_tokens):
+    chunks = pack_blocks(blocks(seed), "학사공지", "https://example.com", max_tokens=max_tokens, overlap_tokens=overlap_tokens)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        header, _, body = chunk["content"].partition("\n")
+        body_tokens = sum(estimate_tokens(line) for line in body.split("\n"))
+        assert body_tokens <= max_tokens - estimate_tokens(header)
+
+
+def test_overlap_repeats_tail_of_previous_chunk():
+    parts = [("섹션", f"문장 {i} " + "가나다라" * 10) for i in range(10)]
+    chunks = pack_blocks(parts, "주제", "u", max_tokens=100, overlap_tokens=40)
+    first_lines = chunks[0]["content"].split("\n")
+    assert first_lines[-1] in chunks[1]["content"].split("\n")
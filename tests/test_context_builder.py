@@ -0,0 +1,76 @@
+from context_builder import build_context, overlap, shingles, split_header
+from tokens import estimate_tokens
+
+SHUTTLE = "셔틀버스는 학기 중 평일 오전 8시 30분부터 10시 30분까지 망우역 1번 출구에서 20분 간격으로 운행합니다."
+LIBRARY = "도서관 열람실은 평일 오전 9시부터 오후 10시까지 이용할 수 있으며 시험 기간에는 자정까지 연장합니다."
+CAFETERIA = "학생식당은 동아리관 2층에 있으며 점심 11시부터 13시 30분까지 운영하고 메뉴는 매주 공지합니다."
+
+
+def candidate(cid, body, score, topic="학사공지", section="안내"):
+    return {"id": cid, "document": f"[{topic}] {section}\n{body}", "score": score, "metadata": {}}
+
+
+def test_overlap_is_containment_ratio():
+    long, short = shingles(SHUTTLE + " " + LIBRARY), shingles(LIBRARY)
+    assert overlap(long, short) == 1.0
+    assert overlap(shingles(SHUTTLE), shingles(LIBRARY)) < 0.2
+    assert overlap(set(), short) == 0.0
+
+
+def test_split_header_reads_topic_and_section():
+    assert split_header("[셔틀버스] 운행 시간\n본문") == ("셔틀버스", "운행 시간", "본문")
+    assert split_header("머리말 없는 본문") == ("", "", "머리말 없는 본문")
+    assert split_header("[셔틀버스] 운행\n본문", {"topic": "교통"})[0] == "교통"
+
+
+def test_drops_chunk_contained_in_a_selected_one():
+    context = build_context([
+        candidate("full", SHUTTLE + " " + LIBRARY, 1.0),
+        candidate("part", LIBRARY, 0.9),
+        candidate("other", CAFETERIA, 0.5),
+    ])
+    assert context["ids"] == ["full", "other"]
+
+
+def test_mmr_prefers_new_information_over_a_near_duplicate():
+    near_duplicate = SHUTTLE[:40] + " 방학 중에는 운행하지 않습니다. 자세한 시간표는 학교 홈페이지를 참고하세요."
+    assert 0.3 < overlap(shingles(SHUTTLE), shingles(near_duplicate)) < 0.8
+    candidates = [candidate("a", SHUTTLE, 1.0), candidate("a2", near_duplicate, 0.9), candidate("b", CAFETERIA, 0.8)]
+    assert build_context(candidates)["ids"] == ["a", "b", "a2"]
+    assert build_context(candidates, mmr_lambda=1.0)["ids"] == ["a", "a2", "b"]
+
+
+def test_rank_order_used_when_scores_missing():
+    candidates = [candidate(c, body, None) for c, body in [("x", CAFETERIA), ("y", LIBRARY)]]
+    assert build_context(candidates)["ids"] == ["x", "y"]
+
+
+def test_blocks_are_tagged_with_source_topic_and_section():
+    text = build_context([candidate("a", SHUTTLE, 1.0, topic="셔틀버스", section="운행 시간")])["text"]
+    assert text.startswith("[출처 1] 셔틀버스 > 운행 시간\n셔틀버스는")
+
+
+def test_packs_whole_chunks_within_budget_and_stops_when_too_little_is_left():
+    candidates = [candidate(str(i), body, 1.0 - i / 10) for i, body in enumerate([SHUTTLE, LIBRARY, CAFETERIA])]
+    full = build_context(candidates, token_budget=10_000)
+    first_two = sum(estimate_tokens(block) for block in full["text"].split("\n\n")[:2])
+    context = build_context(candidates, token_budget=first_two + 10, min_chunk_tokens=30)
+    assert context["ids"] == ["0", "1"]
+    assert context["tokens"] == first_two
+
+
+def test_truncates_last_chunk_to_fill_the_budget():
+    candidates = [candidate(str(i), body, 1.0 - i / 10) for i, body in enumerate([SHUTTLE, LIBRARY])]
+    first = estimate_tokens(build_context(candidates[:1])["text"])
+    budget = first + 30
+    context = build_context(candidates, token_budget=budget, min_chunk_tokens=20)
+    assert context["ids"] == ["0", "1"]
+    assert context["tokens"] <= budget
+    last = context["text"].split("\n\n")[-1]
+    assert last.startswith("[출처 2]") and len(last) < len(f"[출처 2] 학사공지 > 안내\n{LIBRARY}")
+
+
+def test_respects_max_chunks_and_empty_input():
+    candidates = [candidate(str(i), body, 1.0) for i, body in enumerate([SHUTTLE, LIBRARY, CAFETERIA])]
+    assert len(build_context(candidates, max_chunks=2)["ids"]) == 2
+    assert build_context([]) == {"text": "", "ids": [], "documents": [], "tokens": 0}
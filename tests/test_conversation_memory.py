@@ -0,0 +1,82 @@
+import random
+import threading
+
+import pytest
+
+from conversation_memory import ConversationMemory
+from tokens import estimate_tokens
+
+
+def conversation(turns):
+    return [{"role": role, "content": f"{role} {i}"} for i in range(turns) for role in ("user", "model")]
+
+
+def test_background_summary_does_not_block_and_applies_next_turn():
+    release, done = threading.Event(), threading.Event()
+
+    def summarizer(previous, messages, max_tokens=300):
+        release.wait(5)
+        done.set()
+        return "LLM 요약"
+
+    memory = ConversationMemory(keep_turns=1, fold_batch=2, summarizer=summarizer, background=True)
+    first = memory.build(conversation(4))
+    # LLM 요약이 끝나지 않았어도 로컬 요약으로 바로 돌려줍니다.
+    assert first.startswith("(요약) 사용자가 물어본 것")
+    release.set()
+    assert done.wait(5)
+    for _ in range(100):
+        if memory._ready: break
+        threading.Event().wait(0.01)
+    assert memory.build(conversation(4)).startswith("(요약) LLM 요약")
+
+
+def test_stale_background_summary_is_dropped_after_reset():
+    release = threading.Event()
+    memory = ConversationMemory(keep_turns=1, fold_batch=2, background=True,
+                                summarizer=lambda previous, messages, max_tokens=300: release.wait(5) and "늦은 요약")
+    memory.build(conversation(4))
+    assert memory.build([]) == ""
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == "memory-summary": thread.join(5)
+    assert "늦은 요약" not in memory.build(conversation(1))
+
+
+def test_keeps_recent_turns_verbatim_and_folds_older_ones():
+    memory = ConversationMemory(keep_turns=2, fold_batch=2)
+    text = memory.build(conversation(5))
+    lines = text.split("\n")
+    assert lines[0] == "(요약) 사용자가 물어본 것: user 0 / user 1 / user 2"
+    assert lines[1:] == ["user: user 3", "model: model 3", "user: user 4", "model: model 4"]
+    assert memory.summarized_count == 6
+
+
+def test_waits_for_a_full_batch_before_folding():
+    memory = ConversationMemory(keep_turns=2, fold_batch=4)
+    text = memory.build(conversation(3))
+    assert "(요약)" not in text and text.split("\n")[0] == "user: user 0"
+    assert memory.summarized_count == 0
+    # 밀려난 메시지가 네 개가 되면 한꺼번에 요약합니다.
+    assert memory.build(conversation(4)).startswith("(요약) 사용자가 물어본 것: user 0 / user 1\nuser: user 2")
+    assert memory.summarized_count == 4
+    # 그다음 밀려난 두 메시지는 다음 묶음이 찰 때까지 원문으로 남습니다.
+    lines = memory.build(conversation(5)).split("\n")
+    assert lines[0] == "(요약) 사용자가 물어본 것: user 0 / user 1"
+    assert lines[1:3] == ["user: user 2", "model: model 2"] and len(lines) == 7
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("max_tokens", [4, 7, 20, 60, 200])
+def test_rendered_memory_stays_within_budget(seed, max_tokens):
+    rng = random.Random(seed)
+    words = ["수강신청", "기간", "셔틀버스", "도서관", "ok", "(요약)", "2024-03-02", "학생식당", "메뉴"]
+    messages = [{"role": role, "content": " ".join(rng.choice(words) for _ in range(rng.randint(1, 30)))}
+                for _ in range(rng.randint(1, 12)) for role in ("user", "model")]
+    memory = ConversationMemory(keep_turns=rng.randint(1, 4), max_tokens=max_tokens, fold_batch=2)
+    for end in range(1, len(messages) + 1):
+        text = memory.build(messages[:end])
+        assert estimate_tokens(text) <= max_tokens
+        if max_tokens >= 20:
+            # 가장 최근 메시지는 (잘리더라도) 항상 마지막 줄에 남습니다.
+            assert text.split("\n")[-1].startswith(messages[end - 1]["role"])
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+
+from embedding_pipeline import EmbeddingCheckpoint, StubEmbedder, embed_in_batches
+
+
+class CountingEmbedder:
+    """StubEmbedder를 감싸 보낸 텍스트를 기록하고, fail_texts가 든 배치는 실패시킵니다."""
+
+    def __init__(self, fail_texts=()):
+        self.stub = StubEmbedder(dim=8)
+        self.fail_texts = set(fail_texts)
+        self.seen = []
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.seen.extend(texts)
+        if self.fail_texts & set(texts):
+            raise RuntimeError("embedding API unavailable")
+        return self.stub(texts)
+
+
+def items(n):
+    return [(f"id{i:03d}", f"청크 본문 {i}") for i in range(n)]
+
+
+def run(embedder, path, n=25, **kwargs):
+    return embed_in_batches(items(n), embedder=embedder, batch_size=5, max_workers=2, requests_per_sec=None,
+                            checkpoint_path=str(path), retries=kwargs.pop("retries", 1), backoff=0.0,
+                            progress=False, **kwargs)
+
+
+def test_embeds_every_item_in_order(tmp_path):
+    embedder = CountingEmbedder()
+    embeddings, stats = run(embedder, tmp_path / "ckpt.jsonl")
+    assert list(embeddings) == [cid for cid, _ in items(25)]
+    assert embeddings["id007"] == StubEmbedder(dim=8)(["청크 본문 7"])[0]
+    assert stats.embedded == 25 and stats.batches == 5 and stats.resumed == 0
+
+
+def test_resumes_from_checkpoint_after_failure(tmp_path):
+    path = tmp_path / "ckpt.jsonl"
+    failing = CountingEmbedder(fail_texts={"청크 본문 12"})
+    with pytest.raises(RuntimeError):
+        run(failing, path)
+    # 실패한 배치(10~14)만 빼고 나머지는 체크포인트에 남습니다.
+    saved = EmbeddingCheckpoint(str(path)).load()
+    assert set(saved) == {cid for cid, _ in items(25)} - {f"id{i:03d}" for i in range(10, 15)}
+
+    retry = CountingEmbedder()
+    embeddings, stats = run(retry, path)
+    assert sorted(retry.seen) == sorted(f"청크 본문 {i}" for i in range(10, 15))
+    assert stats.resumed == 20 and len(embeddings) == 25
+
+
+def test_retries_transient_errors(tmp_path):
+    calls = {"n": 0}
+    stub = StubEmbedder(dim=8)
+
+    def flaky(texts):
+        calls["n"] += 1
+        if calls["n"] == 1:
+            raise RuntimeError("429")
+        return stub(texts)
+
+    embeddings, stats = embed_in_batches(items(3), embedder=flaky, batch_size=5, max_workers=1, requests_per_sec=None,
+                                         checkpoint_path=str(tmp_path / "ckpt.jsonl"), retries=2, backoff=0.0,
+                                         progress=False)
+    assert len(embeddings) == 3 and stats.retries == 1
+
+
+def test_truncated_checkpoint_line_is_ignored(tmp_path):
+    path = tmp_path / "ckpt.jsonl"
+    checkpoint = EmbeddingCheckpoint(str(path))
+    checkpoint.append(["id000"], [[0.1, 0.2]])
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"id": "id001", "embedd')
+    assert checkpoint.load() == {"id000": [0.1, 0.2]}
+
+
+def test_resumes_twice_after_truncated_write(tmp_path):
+    path = tmp_path / "ckpt.jsonl"
+    with pytest.raises(RuntimeError):
+        run(CountingEmbedder(fail_texts={"청크 본문 12", "청크 본문 22"}), path)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"id": "id099", "embedd')          # 쓰는 도중 종료된 줄
+    assert len(EmbeddingCheckpoint(str(path)).load()) == 15
+
+    # 첫 재개: 잘린 줄을 잘라낸 뒤 10~14를 덧붙이고, 20~24는 다시 실패합니다.
+    with pytest.raises(RuntimeError):
+        run(CountingEmbedder(fail_texts={"청크 본문 22"}), path)
+    assert len(EmbeddingCheckpoint(str(path)).load()) == 20
+
+    # 두 번째 재개: 첫 재개에서 저장한 10~14는 다시 보내지 않습니다.
+    embedder = CountingEmbedder()
+    embeddings, stats = run(embedder, path)
+    assert sorted(embedder.seen) == sorted(f"청크 본문 {i}" for i in range(20, 25))
+    assert stats.resumed == 20 and len(embeddings) == 25
+    with open(path, encoding="utf-8") as f:
+        assert all(line.endswith("\n") for line in f)
@@ -0,0 +1,64 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from firebase_client import FirebaseClient
+from metrics import MetricsRegistry
+
+
+class AlwaysUnavailable(BaseHTTPRequestHandler):
+    """모든 요청에 503을 돌려주고 메서드별 요청 수를 셉니다."""
+    counts = {}
+
+    def _reply(self):
+        type(self).counts[self.command] = type(self).counts.get(self.command, 0) + 1
+        length = int(self.headers.get("Content-Length") or 0)
+        if length: self.rfile.read(length)
+        self.send_response(503)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    do_GET = do_PUT = do_PATCH = _reply
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    AlwaysUnavailable.counts = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), AlwaysUnavailable)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_port}/"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_patch_is_not_retried_on_server_error(server):
+    client = FirebaseClient(server, retries=2, backoff=0.0, registry=MetricsRegistry())
+    response = client.db_patch("", "token", {"stats/totals/messages": {".sv": {"increment": 1}}})
+    assert response.status_code == 503
+    assert AlwaysUnavailable.counts == {"PATCH": 1}
+
+
+def test_idempotent_methods_are_retried_on_server_error(server):
+    client = FirebaseClient(server, retries=2, backoff=0.0, registry=MetricsRegistry())
+    assert client.db_get("chat_history/u1", "token").status_code == 503
+    assert client.db_put("users/u1/dynamic_keywords", "token", ["학식"]).status_code == 503
+    assert AlwaysUnavailable.counts == {"GET": 3, "PUT": 3}
+
+
+def test_requests_record_latency_and_errors_per_endpoint(server):
+    registry = MetricsRegistry()
+    client = FirebaseClient(server, retries=0, registry=registry)
+    client.db_get("users/u1", "token")
+    assert registry.counters("firebase.")["firebase.db.get.users.errors"] == 1
+    assert registry.histograms("firebase.")["firebase.db.get.users_ms"]["count"] == 1
+
+
+def test_url_helpers_put_auth_in_query_string():
+    client = FirebaseClient("https://example.firebaseio.com")
+    assert client.url("chat_history/u1", "tok") == "https://example.firebaseio.com/chat_history/u1.json?auth=tok"
+    assert client.url("", None) == "https://example.firebaseio.com/.json"
@@ -0,0 +1,73 @@
+import pytest
+
+import firebase_db
+from fake_rtdb import FakeRTDB, fake_client
+from firebase_db import DAY_MS, FirebaseDB, window_start_ms
+
+NOW = 1_700_000_000_000
+
+
+@pytest.fixture(autouse=True)
+def no_ijson(monkeypatch):
+    # 가짜 session은 스트리밍 응답(raw)을 흉내 내지 않으므로 전체 파싱 경로로 읽습니다.
+    monkeypatch.setattr(firebase_db, "ijson", None)
+
+
+def make_db(data):
+    session = FakeRTDB()
+    session.data = data
+    return FirebaseDB(fake_client(session)), session
+
+
+def history(*days_ago):
+    return {str(NOW - d * DAY_MS): {"role": "user", "content": f"{d}일 전"} for d in days_ago}
+
+
+def test_window_start_ms():
+    assert window_start_ms(None) is None
+    assert window_start_ms(7, now_ms=NOW) == NOW - 7 * DAY_MS
+
+
+def test_count_uses_shallow_keys():
+    db, session = make_db({"users": {"a": {"name": "가"}, "b": {"name": "나"}}})
+    assert db.count("users") == 2
+    assert session.get_params[-1]["shallow"] == "true"
+    assert db.count("없는경로") == 0
+
+
+def test_read_window_keeps_only_recent_records_per_user():
+    db, _ = make_db({"chat_history": {"u1": history(1, 10, 40), "u2": history(50), "u3": history(0)}})
+    data = db.read_window("chat_history", "token", start_ms=window_start_ms(30, now_ms=NOW))
+    assert set(data) == {"u1", "u3"}                     # 기간 안에 기록이 없는 사용자는 빠집니다.
+    assert sorted(data["u1"]) == sorted(history(1, 10))
+
+
+def test_read_user_window_bounds_are_inclusive():
+    db, session = make_db({"chat_history": {"u1": history(1, 2, 3)}})
+    start, end = NOW - 3 * DAY_MS, NOW - 2 * DAY_MS
+    assert sorted(db.read_user_window("chat_history/u1", start_ms=start, end_ms=end)) == [str(start), str(end)]
+    assert session.get_params[-1]["orderBy"] == '"$key"'
+
+
+def test_page_history_walks_every_record_once_newest_first():
+    records = history(*range(23))
+    db, _ = make_db({"chat_history": {"u1": records}})
+    pages, cursor = [], None
+    while True:
+        page, cursor = db.page_history("chat_history/u1", before=cursor, page_size=5)
+        pages.append(sorted(page))
+        if cursor is None: break
+    assert [len(p) for p in pages] == [5, 5, 5, 5, 3]
+    seen = [k for p in pages for k in p]
+    assert sorted(seen) == sorted(records) and len(seen) == len(set(seen))
+    assert pages[0][-1] == max(records)                  # 첫 페이지가 가장 최근 기록
+    assert all(a[-1] < b[0] for a, b in zip(pages[1:], pages))
+
+
+def test_page_history_ends_with_empty_page_when_last_page_is_full():
+    db, _ = make_db({"chat_history": {"u1": history(*range(4))}})
+    page, cursor = db.page_history("chat_history/u1", page_size=2)
+    page, cursor = db.page_history("chat_history/u1", before=cursor, page_size=2)
+    assert len(page) == 2 and cursor is not None
+    page, cursor = db.page_history("chat_history/u1", before=cursor, page_size=2)
+    assert page == {} and cursor is None
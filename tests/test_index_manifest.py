@@ -0,0 +1,108 @@
+import os
+
+import requests
+
+from index_manifest import ManifestWatcher, chunk_id, diff_page, plan_changes, save_manifest
+
+URL = "https://www.seoil.ac.kr/seoil/520/subview.do"
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, text="", headers=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+def page(text=None, status=200, error=None, etag='"v1"'):
+    response = None if error else FakeResponse(status, text or "", {"ETag": etag})
+    return {"url": URL, "topics": ["셔틀버스"], "response": response, "error": error}
+
+
+def line_chunks(response):
+    return [{"content": f"[셔틀버스] {line}", "topic": "셔틀버스", "url": URL}
+            for line in response.text.split("\n") if line.strip()]
+
+
+def fail_if_called(response):
+    raise AssertionError("chunk_fn should not be called")
+
+
+def index(topics, chunks, existing):
+    """plan_changes 결과를 DB(existing)에 반영한 ID 집합."""
+    plan = plan_changes(topics, chunks, existing)
+    return (set(existing) | set(plan.add)) - set(plan.delete), plan
+
+
+def test_chunk_id_depends_on_topic_and_content_only():
+    assert chunk_id("셔틀버스", "망우역") == chunk_id("셔틀버스", "망우역")
+    assert chunk_id("셔틀버스", "망우역") != chunk_id("찾아오시는길", "망우역")
+
+
+def test_first_run_adds_every_chunk():
+    status, entry, chunks = diff_page("셔틀버스", page("망우역\n면목역"), None, line_chunks, now=100)
+    assert status == "changed" and entry["etag"] == '"v1"' and entry["updated_at"] == 100
+    assert entry["chunk_ids"] == list(chunks) and len(chunks) == 2
+    db, plan = index({"셔틀버스": entry}, chunks, [])
+    assert plan.add == entry["chunk_ids"] and plan.delete == [] and db == set(entry["chunk_ids"])
+
+
+def test_not_modified_and_unchanged_pages_embed_nothing():
+    _, old, chunks = diff_page("셔틀버스", page("망우역\n면목역"), None, line_chunks, now=100)
+    db = set(chunks)
+
+    status, entry, new = diff_page("셔틀버스", page(status=304), old, fail_if_called)
+    assert status == "not_modified" and entry is old and new == {}
+
+    status, entry, new = diff_page("셔틀버스", page("망우역\n면목역", etag='"v2"'), old, line_chunks, now=200)
+    assert status == "unchanged" and new == {}
+    assert entry["chunk_ids"] == old["chunk_ids"] and entry["updated_at"] == 100 and entry["etag"] == '"v2"'
+    after, plan = index({"셔틀버스": entry}, new, db)
+    assert plan.add == [] and plan.delete == [] and after == db
+
+
+def test_changed_page_upserts_new_chunks_and_deletes_stale_ones():
+    _, old, chunks = diff_page("셔틀버스", page("망우역\n면목역"), None, line_chunks)
+    status, entry, new = diff_page("셔틀버스", page("망우역\n상봉역"), old, line_chunks)
+    assert status == "changed"
+    after, plan = index({"셔틀버스": entry}, new, set(chunks))
+    kept = chunk_id("셔틀버스", "[셔틀버스] 망우역")
+    assert plan.add == [chunk_id("셔틀버스", "[셔틀버스] 상봉역")]
+    assert plan.delete == [chunk_id("셔틀버스", "[셔틀버스] 면목역")]
+    assert kept in after and kept not in plan.add
+
+
+def test_fetch_error_keeps_previous_chunks():
+    _, old, chunks = diff_page("셔틀버스", page("망우역"), None, line_chunks)
+    status, entry, new = diff_page("셔틀버스", page(error=requests.ConnectionError("down")), old, fail_if_called)
+    assert status == "error" and entry is old
+    assert plan_changes({"셔틀버스": entry}, new, set(chunks)).delete == []
+
+
+def test_empty_page_drops_its_chunks():
+    _, old, chunks = diff_page("셔틀버스", page("망우역"), None, line_chunks)
+    status, entry, new = diff_page("셔틀버스", page("   "), old, line_chunks)
+    assert status == "empty" and entry is None
+    assert plan_changes({}, new, set(chunks)).delete == sorted(chunks)
+
+
+def test_duplicate_chunks_in_a_page_are_stored_once():
+    _, entry, chunks = diff_page("셔틀버스", page("망우역\n망우역"), None, line_chunks)
+    assert len(entry["chunk_ids"]) == len(chunks) == 1
+
+
+def test_missing_ids_are_reported():
+    _, entry, _ = diff_page("셔틀버스", page("망우역"), None, line_chunks)
+    plan = plan_changes({"셔틀버스": entry}, {}, [])
+    assert plan.missing == set(entry["chunk_ids"]) and plan.add == []
+
+
+def test_watcher_reloads_when_manifest_changes(tmp_path):
+    path = str(tmp_path / "index_manifest.json")
+    watcher = ManifestWatcher(path)
+    assert watcher.index_version() == "" and watcher.topic_of("c1") is None
+    save_manifest({"topics": {"셔틀버스": {"chunk_ids": ["c1"]}}, "index_version": "v1"}, path)
+    assert watcher.index_version() == "v1" and watcher.topic_of("c1") == "셔틀버스"
+    save_manifest({"topics": {"도서관": {"chunk_ids": ["c1"]}}, "index_version": "v2"}, path)
+    os.utime(path, (1, 1))   # 같은 시각에 두 번 저장해도 mtime이 바뀌도록
+    assert watcher.index_version() == "v2" and watcher.topic_of("c1") == "도서관"
@@ -0,0 +1,93 @@
+import threading
+import time
+
+from fake_rtdb import FakeRTDB, fake_client
+from keyword_worker import KeywordAnalyzer
+
+
+class RecordingExtractor:
+    def __init__(self, results=None):
+        self.texts = []
+        self.results = list(results or [])
+        self.called = threading.Event()
+
+    def __call__(self, text):
+        self.texts.append(text)
+        self.called.set()
+        return self.results.pop(0) if self.results else ["학식", "셔틀버스", "도서관"]
+
+
+def make_analyzer(db, extractor, **kwargs):
+    kwargs.setdefault("debounce_seconds", 0.3)
+    return KeywordAnalyzer(fake_client(db), extract_fn=extractor, max_workers=1, **kwargs)
+
+
+def drain(analyzer):
+    # 작업자가 하나뿐이므로, 빈 작업이 끝나면 앞서 넣은 작업도 끝난 것입니다.
+    analyzer._executor.submit(lambda: None).result(5)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_seed_merges_saved_history_without_repeating_the_new_question():
+    db = FakeRTDB()
+    db.data = {"chat_history": {"u1": {
+        "1700000000000": {"role": "user", "content": "장학금 신청 기간"},
+        "1700000000001": {"role": "model", "content": "3월까지입니다."},
+        "1700000000002": {"role": "user", "content": "학식 메뉴"},
+    }}}
+    analyzer = make_analyzer(db, RecordingExtractor(), min_new_messages=5)
+    analyzer.observe("u1", "token", "학식 메뉴")   # 방금 저장된 질문과 같은 질문
+    drain(analyzer)
+    assert list(analyzer._recent["u1"]) == ["장학금 신청 기간", "학식 메뉴"]
+    assert db.get_params[0]["orderBy"] == '"$key"' and db.get_params[0]["limitToLast"] == 20
+
+
+def test_waits_for_min_new_messages_and_saves_changed_keywords():
+    db, extractor = FakeRTDB(), RecordingExtractor()
+    analyzer = make_analyzer(db, extractor, min_new_messages=2)
+    analyzer.observe("u1", "token", "셔틀버스 시간표")
+    drain(analyzer)
+    assert extractor.texts == []
+    analyzer.observe("u1", "token", "도서관 열람실")
+    assert wait_for(lambda: analyzer._results.get("u1"))
+    assert analyzer.poll("u1") == ["학식", "셔틀버스", "도서관"]
+    assert extractor.texts == ["셔틀버스 시간표\n도서관 열람실"]
+    assert db.node("users/u1/dynamic_keywords") == ["학식", "셔틀버스", "도서관"]
+    assert analyzer.poll("u1") is None
+
+
+def test_questions_inside_the_debounce_window_are_merged_into_one_run():
+    db, extractor = FakeRTDB(), RecordingExtractor(results=[["a"], ["b"]])
+    analyzer = make_analyzer(db, extractor, min_new_messages=1, window=10)
+    analyzer.observe("u1", "token", "첫 질문입니다")
+    assert wait_for(lambda: len(extractor.texts) == 1)
+    for question in ["둘째 질문입니다", "셋째 질문입니다", "넷째 질문입니다"]:
+        analyzer.observe("u1", "token", question)
+    time.sleep(0.1)
+    assert len(extractor.texts) == 1           # debounce_seconds가 지나기 전에는 다시 분석하지 않습니다.
+    assert wait_for(lambda: len(extractor.texts) == 2)
+    time.sleep(0.4)
+    assert len(extractor.texts) == 2
+    assert extractor.texts[1].endswith("둘째 질문입니다\n셋째 질문입니다\n넷째 질문입니다")
+
+
+def test_same_keywords_are_not_saved_again():
+    db, extractor = FakeRTDB(), RecordingExtractor(results=[["학식"]])
+    analyzer = make_analyzer(db, extractor, min_new_messages=1)
+    analyzer.observe("u1", "token", "학식 메뉴 알려줘", current_keywords=["학식"])
+    assert wait_for(lambda: extractor.called.is_set())
+    drain(analyzer)
+    assert db.puts == [] and analyzer.poll("u1") is None
+
+
+def test_ignores_anonymous_users():
+    analyzer = make_analyzer(FakeRTDB(), RecordingExtractor())
+    analyzer.observe(None, "token", "질문")
+    analyzer.observe("u1", None, "질문")
+    assert analyzer._recent == {}
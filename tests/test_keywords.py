@@ -0,0 +1,21 @@
+import pytest
+
+from keywords import KeywordIndex, KeywordTokenizer, strip_particle
+
+
+@pytest.mark.parametrize("word,expected", [
+    ("와이파이", "와이파이"), ("와이파이가", "와이파이"), ("학점인정제도", "학점인정제도"), ("강의평가", "강의평가"),
+    ("도서관에서", "도서관"), ("장학금을", "장학금"), ("셔틀버스는", "셔틀버스"), ("학과가", "학과"), ("학식", "학식"),
+])
+def test_strip_particle(word, expected):
+    assert strip_particle(word) == expected
+
+
+def test_index_query_by_keyword_and_period():
+    index = KeywordIndex(KeywordTokenizer(use_morphology=False))
+    index.add("a/1", 1000, "와이파이 비밀번호 알려줘", "a")
+    index.add("b/2", 2000, "와이파이가 안돼요", "b")
+    index.add("b/3", 3000, "도서관에서 와이파이 돼?", "b")
+    assert index.query(["와이파이"]) == (3, ["b/3", "b/2", "a/1"])
+    assert index.query(["와이파이", "도서관"], mode="and") == (1, ["b/3"])
+    assert index.query(["와이파이"], start_ms=1500, end_ms=2500) == (1, ["b/2"])
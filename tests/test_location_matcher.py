@@ -0,0 +1,67 @@
+import random
+
+from location_matcher import AhoCorasick, LocationMatcher
+
+LOCATIONS = {
+    "본관": {"keywords": ["행정실", "학생지원센터"]},
+    "도서관": {"keywords": ["열람실", "도서관"]},
+    "학생회관": {"keywords": ["학생식당", "편의점"]},
+}
+
+
+def naive(patterns, text):
+    return sorted((i, i + len(p), pid) for pid, p in enumerate(patterns) if p
+                  for i in range(len(text)) if text.startswith(p, i))
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    assert sorted(automaton.iter("ushers")) == [(1, 4, 1), (2, 4, 0), (2, 6, 3)]
+
+
+def test_aho_corasick_matches_naive_search():
+    rng = random.Random(0)
+    for _ in range(200):
+        patterns = ["".join(rng.choice("가나다") for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 6))]
+        patterns = list(dict.fromkeys(patterns))
+        text = "".join(rng.choice("가나다라") for _ in range(rng.randint(0, 30)))
+        assert sorted(AhoCorasick(patterns).iter(text)) == naive(patterns, text)
+
+
+def test_find_all_reports_kind_and_location_in_order():
+    matcher = LocationMatcher(LOCATIONS)
+    matches = matcher.find_all("학생식당은 학생회관 어디에 있어?")
+    assert [(m.word, m.kind, m.location) for m in matches] == [
+        ("학생식당", "keyword", "학생회관"), ("학생회관", "name", "학생회관"),
+        ("어디에", "intent", None), ("어디", "intent", None)]
+    assert matcher.find_all("") == [] and matcher.find_all(None) == []
+
+
+def test_name_listed_as_keyword_counts_as_name_once():
+    matches = LocationMatcher(LOCATIONS).find_all("도서관")
+    assert [(m.kind, m.location) for m in matches] == [("name", "도서관")]
+
+
+def test_locations_in_keeps_first_mention_order():
+    matcher = LocationMatcher(LOCATIONS)
+    assert matcher.locations_in("편의점 옆 열람실, 그리고 다시 학생회관") == ["학생회관", "도서관"]
+    assert matcher.locations_in("편의점 옆 도서관", kinds=("name",)) == ["도서관"]
+
+
+def test_detect_prefers_building_named_in_answer():
+    matcher = LocationMatcher(LOCATIONS)
+    assert matcher.detect("본관 1층에 있습니다.", "편의점 어디야?") == "본관"
+
+
+def test_detect_uses_question_keywords_only_with_location_intent():
+    matcher = LocationMatcher(LOCATIONS)
+    assert matcher.detect("1층에 있습니다.", "편의점 어디야?") == "학생회관"
+    assert matcher.detect("9시에 닫습니다.", "편의점 몇 시까지 해?") is None
+    # 답변의 키워드만으로는 지도를 띄우지 않습니다.
+    assert matcher.detect("행정실에 문의하세요.", "휴학 신청은?") is None
+
+
+def test_detect_without_question_looks_at_names_and_keywords():
+    matcher = LocationMatcher(LOCATIONS)
+    assert matcher.detect("행정실에 문의하세요.") == "본관"
+    assert matcher.detect("잘 모르겠습니다.") is None
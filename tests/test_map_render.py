@@ -0,0 +1,53 @@
+import io
+
+from PIL import Image
+
+from map_render import MapRenderer
+
+LOCATIONS = {"본관": {"x": 40, "y": 40}, "도서관": {"x": 120, "y": 80}, "체육관": {"x": 60, "y": 150}}
+
+
+def make_renderer(tmp_path, **kwargs):
+    path = tmp_path / "map.png"
+    Image.new("RGB", (200, 200), "white").save(path)
+    return MapRenderer(str(path), LOCATIONS, radius=10, width=2, **kwargs)
+
+
+def test_key_ignores_order_and_duplicates():
+    assert MapRenderer.key_of(["도서관", "본관", "도서관"]) == MapRenderer.key_of(["본관", "도서관"])
+
+
+def test_same_combination_is_drawn_once(tmp_path):
+    renderer = make_renderer(tmp_path)
+    png = renderer.render(["도서관", "본관"])
+    assert renderer.render(["본관", "도서관", "도서관"]) is png
+    assert list(renderer._cache) == [("도서관", "본관")]
+    image = Image.open(io.BytesIO(png))
+    assert image.format == "PNG" and image.getpixel((40 + 10, 40)) == (255, 0, 0)
+
+
+def test_single_name_and_unknown_names(tmp_path):
+    renderer = make_renderer(tmp_path)
+    assert renderer.render("본관") is renderer.render(["본관", "없는 건물"])
+    assert renderer.render("없는 건물") is None and renderer.render([]) is None
+    assert list(renderer._cache) == [("본관",)]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    renderer = make_renderer(tmp_path, max_entries=2)
+    renderer.render("본관")
+    renderer.render("도서관")
+    renderer.render("본관")          # 본관을 최근 항목으로
+    renderer.render("체육관")
+    assert list(renderer._cache) == [("본관",), ("체육관",)]
+
+
+def test_missing_map_returns_none_without_caching(tmp_path):
+    renderer = MapRenderer(str(tmp_path / "없음.png"), LOCATIONS)
+    assert renderer.render("본관") is None and renderer._cache == {}
+
+
+def test_prerender_fills_one_entry_per_building(tmp_path):
+    renderer = make_renderer(tmp_path)
+    renderer.prerender()
+    assert set(renderer._cache) == {(name,) for name in LOCATIONS}
@@ -0,0 +1,58 @@
+import unicodedata
+
+from query_cache import QueryEmbeddingCache, normalize_query
+
+
+def test_normalization_merges_spacing_case_and_unicode_forms():
+    decomposed = unicodedata.normalize("NFD", "학식")
+    assert normalize_query(f"  {decomposed}   MENU ") == "학식 menu"
+    cache = QueryEmbeddingCache()
+    cache.put("셔틀버스  시간", [0.1])
+    assert cache.get(" 셔틀버스 시간 ") == [0.1]
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = QueryEmbeddingCache(max_size=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    assert cache.get("a") == [1]
+    cache.put("c", [3])
+    assert cache.get("b") is None
+    assert cache.get("a") == [1] and cache.get("c") == [3]
+
+
+def test_peek_does_not_count_or_reorder():
+    cache = QueryEmbeddingCache(max_size=2)
+    cache.put("a", [1])
+    cache.put("b", [2])
+    assert cache.peek("a") == [1] and cache.peek("없음") is None
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
+    cache.put("c", [3])
+    assert cache.peek("a") is None
+
+
+def test_get_or_compute_calls_compute_once():
+    calls = []
+    cache = QueryEmbeddingCache()
+    compute = lambda q: calls.append(q) or [len(q)]
+    assert cache.get_or_compute("도서관", compute) == [3]
+    assert cache.get_or_compute("도서관 ", compute) == [3]
+    assert calls == ["도서관"]
+    assert cache.stats()["hit_rate"] == 0.5
+
+
+def test_persists_across_instances(tmp_path):
+    path = str(tmp_path / "cache" / "query_embeddings.json")
+    cache = QueryEmbeddingCache(max_size=2, persist_path=path, flush_interval=3600)
+    for q in ["a", "b", "c"]:
+        cache.put(q, [ord(q)])
+    cache.flush()
+    reloaded = QueryEmbeddingCache(max_size=2, persist_path=path)
+    assert reloaded.peek("a") is None
+    assert reloaded.peek("b") == [98] and reloaded.peek("c") == [99]
+
+
+def test_corrupt_file_starts_empty(tmp_path):
+    path = tmp_path / "query_embeddings.json"
+    path.write_text("{not json", encoding="utf-8")
+    assert QueryEmbeddingCache(persist_path=str(path)).stats()["size"] == 0
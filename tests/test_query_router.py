@@ -0,0 +1,41 @@
+import pytest
+
+from campus_facts import FactMatcher
+from location_matcher import LOCATION_INTENTS, LocationMatcher
+from query_router import CHITCHAT, FACT, LOCATION, RAG, QueryRouter, default_classifier
+
+LOCATIONS = {
+    "흥학관": {"desc": "1번 건물: 카페", "keywords": ["흥학관", "카페", "커피"]},
+    "서일관": {"desc": "4번 건물: 대학본부", "keywords": ["서일관", "본부", "총장실"]},
+    "배양관": {"desc": "8번 건물: 실습강의실", "keywords": ["배양관", "편의점"]},
+}
+
+
+@pytest.fixture(params=[False, True], ids=["rules", "classifier"])
+def router(request):
+    classifier = default_classifier() if request.param else None
+    return QueryRouter(LOCATIONS, LocationMatcher(LOCATIONS, LOCATION_INTENTS), FactMatcher(), classifier=classifier)
+
+
+@pytest.mark.parametrize("question", [
+    "교수님 연구실 번호", "등록금 납부 마감일", "컴공과 사무실 전화번호", "오늘 휴강이야?", "주차 가능해?",
+    "동아리 가입하고 싶어", "안녕하세요 장학금 언제 나와?", "심심해", "네이버 알려줘",
+])
+def test_campus_questions_go_to_rag(router, question):
+    assert router.route(question).kind == RAG
+
+
+@pytest.mark.parametrize("question", ["안녕하세요!", "고맙습니다", "감사합니다", "너 누구야?", "네 알겠어요", "ㅋㅋㅋ"])
+def test_chitchat(router, question):
+    route = router.route(question)
+    assert route.kind == CHITCHAT and route.answer
+
+
+def test_location_only(router):
+    route = router.route("배양관 어디야?")
+    assert route.kind == LOCATION and route.location == "배양관" and "배양관" in route.answer
+
+
+def test_fixed_fact(router):
+    route = router.route("학식 몇 시까지야?")
+    assert route.kind == FACT and "11:00 ~ 13:30" in route.answer
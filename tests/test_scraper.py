@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from scraper import HostLimiter, conditional_headers, fetch_pages, fetch_with_retry
+
+
+def response(status, url="https://www.seoil.ac.kr/"):
+    r = requests.Response()
+    r.status_code = status
+    r.url = url
+    return r
+
+
+class ScriptedSession:
+    """URL별로 정해 둔 응답(상태 코드 또는 예외)을 차례로 돌려주는 가짜 session."""
+
+    def __init__(self, script=None, delay=0.0):
+        self.script = {url: list(steps) for url, steps in (script or {}).items()}
+        self.delay = delay
+        self.calls = []
+        self.active = {}
+        self.peak = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        host = url.split("/")[2]
+        with self._lock:
+            self.calls.append((url, headers))
+            self.active[host] = self.active.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.active[host])
+            steps = self.script.get(url)
+            step = steps.pop(0) if steps else 200
+        try:
+            time.sleep(self.delay)
+            if isinstance(step, Exception): raise step
+            return response(step, url)
+        finally:
+            with self._lock:
+                self.active[host] -= 1
+
+
+def test_host_limiter_shares_one_semaphore_per_host():
+    limiter = HostLimiter(per_host=2)
+    assert limiter.get("https://a.com/x") is limiter.get("https://a.com/y")
+    assert limiter.get("https://a.com/x") is not limiter.get("https://b.com/x")
+
+
+def test_retries_retryable_status_then_succeeds():
+    session = ScriptedSession({"https://a.com/": [503, 429, 200]})
+    assert fetch_with_retry(session, "https://a.com/", retries=3, backoff=0.0).status_code == 200
+    assert len(session.calls) == 3
+
+
+def test_retries_connection_errors():
+    session = ScriptedSession({"https://a.com/": [requests.ConnectionError("reset"), 200]})
+    assert fetch_with_retry(session, "https://a.com/", backoff=0.0).status_code == 200
+    assert len(session.calls) == 2
+
+
+def test_client_errors_are_not_retried():
+    session = ScriptedSession({"https://a.com/": [404, 200]})
+    with pytest.raises(requests.HTTPError):
+        fetch_with_retry(session, "https://a.com/", backoff=0.0)
+    assert len(session.calls) == 1
+
+
+def test_gives_up_after_retries():
+    session = ScriptedSession({"https://a.com/": [503] * 5})
+    with pytest.raises(requests.HTTPError):
+        fetch_with_retry(session, "https://a.com/", retries=2, backoff=0.0)
+    assert len(session.calls) == 3
+
+
+def test_conditional_headers():
+    assert conditional_headers() == {}
+    assert conditional_headers('"v1"', "Mon, 01 Jan 2024 00:00:00 GMT") == {
+        "If-None-Match": '"v1"', "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"}
+
+
+def test_fetch_pages_limits_concurrency_per_host():
+    urls = {f"a{i}": f"https://a.com/{i}" for i in range(6)} | {f"b{i}": f"https://b.com/{i}" for i in range(3)}
+    session = ScriptedSession(delay=0.05)
+    results = list(fetch_pages(urls, max_workers=8, per_host=2, session=session, backoff=0.0))
+    assert len(results) == 9 and all(r["error"] is None for r in results)
+    assert session.peak["a.com"] <= 2 and session.peak["b.com"] <= 2
+    assert max(session.peak.values()) == 2   # 호스트가 달라도 같이 기다리지는 않습니다.
+
+
+def test_fetch_pages_requests_shared_urls_once_and_reports_errors():
+    urls = {"학사공지": "https://a.com/notice", "공지사항": "https://a.com/notice", "도서관": "https://a.com/lib",
+            "셔틀버스": "https://a.com/bus"}
+    session = ScriptedSession({"https://a.com/lib": [404], "https://a.com/bus": [304]})
+    headers = {"https://a.com/bus": conditional_headers(etag='"v1"')}
+    results = {r["url"]: r for r in fetch_pages(urls, session=session, backoff=0.0, headers_by_url=headers)}
+    assert sorted(results["https://a.com/notice"]["topics"]) == ["공지사항", "학사공지"]
+    assert [url for url, _ in session.calls].count("https://a.com/notice") == 1
+    assert isinstance(results["https://a.com/lib"]["error"], requests.HTTPError)
+    assert results["https://a.com/bus"]["response"].status_code == 304
+    assert ("https://a.com/bus", {"If-None-Match": '"v1"'}) in session.calls
@@ -0,0 +1,43 @@
+from topic_router import TOPIC_CUES, TopicRouter
+
+
+def test_classifies_by_cue_words():
+    router = TopicRouter()
+    assert router.classify("셔틀버스 몇 시에 와?") == ["셔틀버스"]
+    assert router.classify("학식 메뉴 알려줘") == ["학생식당"]
+    assert router.classify("PC실 이용 시간") == ["PC이용, VR실"]     # 대소문자 무시
+    assert router.classify("안녕하세요") == [] and router.classify(None) == []
+
+
+def test_ranks_topics_by_matched_length_and_caps_them():
+    router = TopicRouter(max_topics=2)
+    # '도서관'+'열람실'(6자)이 '카페'(2자)보다 앞섭니다.
+    assert router.classify("도서관 열람실 옆 카페") == ["도서관", "편의점, 카페"]
+    assert len(router.classify("도서관 열람실 옆 카페에서 학식 메뉴 보고 셔틀 타기")) == 2
+    assert len(TopicRouter(max_topics=1).classify("도서관 옆 카페")) == 1
+
+
+def test_interest_overrides_question():
+    router = TopicRouter()
+    assert router.topics_for("아무 질문", interest="장학금") == ["공지사항", "학사공지"]
+    assert router.topics_for("셔틀버스 시간", interest="없는 관심사") == ["셔틀버스"]
+
+
+def test_where_for():
+    router = TopicRouter()
+    assert router.where_for("안녕") is None
+    assert router.where_for("학식 메뉴") == {"topic": "학생식당"}
+    assert router.where_for("", interest="도서관") == {"topic": {"$in": ["도서관", "스터디공간"]}}
+
+
+def test_shared_cue_counts_for_every_topic():
+    router = TopicRouter({"가": ["공통", "가만"], "나": ["공통"]}, {}, max_topics=3)
+    assert router.classify("공통") == ["가", "나"]
+    assert router.classify("가만히 공통") == ["가", "나"]
+
+
+def test_every_cue_routes_to_its_topic():
+    router = TopicRouter(max_topics=len(TOPIC_CUES))
+    for topic, cues in TOPIC_CUES.items():
+        for cue in cues:
+            assert topic in router.classify(cue), (topic, cue)
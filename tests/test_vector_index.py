@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+from vector_index import NumpyVectorIndex, _scores, export_vectors, load_vector_index, matches_where
+
+
+def brute_force(embeddings, query, n):
+    matrix = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    scores = matrix @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores, kind="stable")[:n]), scores
+
+
+def build(tmp_path, n=200, dim=16, dtype="float32", seed=0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.normal(size=(n, dim)).astype(np.float32)
+    ids = [f"c{i}" for i in range(n)]
+    metadatas = [{"topic": "셔틀버스" if i % 3 == 0 else "도서관", "url": f"u{i % 5}"} for i in range(n)]
+    vectors_path, table_path = str(tmp_path / "vectors.npy"), str(tmp_path / "vectors.json")
+    export_vectors(ids, [f"문서 {i}" for i in ids], embeddings, dtype=dtype,
+                   vectors_path=vectors_path, table_path=table_path, metadatas=metadatas)
+    return NumpyVectorIndex(vectors_path, table_path), embeddings, metadatas, rng
+
+
+def test_matches_where():
+    meta = {"topic": "셔틀버스", "url": "a"}
+    assert matches_where(meta, None) and matches_where(meta, {"topic": "셔틀버스"})
+    assert matches_where(meta, {"topic": {"$in": ["도서관", "셔틀버스"]}})
+    assert not matches_where(meta, {"topic": {"$nin": ["셔틀버스"]}})
+    assert not matches_where(meta, {"$and": [{"topic": "셔틀버스"}, {"url": {"$ne": "a"}}]})
+    assert matches_where(meta, {"$or": [{"topic": "도서관"}, {"url": {"$eq": "a"}}]})
+    assert not matches_where(None, {"topic": "셔틀버스"})
+
+
+@pytest.mark.parametrize("n_results", [1, 5, 200, 500])
+def test_top_k_matches_brute_force(tmp_path, n_results):
+    index, embeddings, _, rng = build(tmp_path)
+    query = rng.normal(size=16).astype(np.float32)
+    expected, scores = brute_force(embeddings, query, n_results)
+    result = index.query([query], n_results=n_results)
+    assert result["ids"][0] == [f"c{i}" for i in expected]
+    assert result["distances"][0] == pytest.approx([1.0 - scores[i] for i in expected], abs=1e-5)
+    assert result["documents"][0][0] == f"문서 c{expected[0]}"
+
+
+def test_where_restricts_rows_and_is_cached(tmp_path):
+    index, embeddings, metadatas, rng = build(tmp_path)
+    where = {"$and": [{"topic": "셔틀버스"}, {"url": {"$in": ["u0", "u1"]}}]}
+    rows = [i for i, meta in enumerate(metadatas) if matches_where(meta, where)]
+    query = rng.normal(size=16).astype(np.float32)
+    expected, _ = brute_force(embeddings[rows], query, 4)
+    result = index.query([query], n_results=4, where=where)
+    assert result["ids"][0] == [f"c{rows[i]}" for i in expected]
+    assert all(matches_where(meta, where) for meta in result["metadatas"][0])
+    assert index.rows_for(where) is index.rows_for(where)
+
+
+def test_where_without_matches_returns_empty(tmp_path):
+    index, _, _, rng = build(tmp_path, n=10)
+    result = index.query([rng.normal(size=16)], n_results=3, where={"topic": "없는 주제"})
+    assert result == {"ids": [[]], "documents": [[]], "metadatas": [[]], "distances": [[]]}
+
+
+def test_float16_scores_are_computed_in_chunks():
+    rng = np.random.default_rng(1)
+    matrix = rng.normal(size=(1000, 8)).astype(np.float16)
+    q = rng.normal(size=8).astype(np.float32)
+    scores = _scores(matrix, q, chunk_rows=64)
+    assert scores.dtype == np.float32
+    assert scores == pytest.approx(matrix.astype(np.float32) @ q, abs=1e-4)
+
+
+def test_float16_index_keeps_ranking(tmp_path):
+    index, embeddings, _, rng = build(tmp_path, dtype="float16")
+    assert index.matrix.dtype == np.float16
+    query = rng.normal(size=16).astype(np.float32)
+    expected, _ = brute_force(embeddings, query, 3)
+    assert index.query([query], n_results=3)["ids"][0][0] == f"c{expected[0]}"
+
+
+def test_load_vector_index(tmp_path):
+    assert load_vector_index(str(tmp_path / "vectors.npy"), str(tmp_path / "vectors.json")) is None
+    build(tmp_path, n=5)
+    index = load_vector_index(str(tmp_path / "vectors.npy"), str(tmp_path / "vectors.json"))
+    assert index.count() == 5
+
+
+def test_size_mismatch_is_rejected(tmp_path):
+    build(tmp_path, n=5)
+    np.save(str(tmp_path / "vectors.npy"), np.zeros((4, 16), dtype=np.float32))
+    with pytest.raises(ValueError):
+        NumpyVectorIndex(str(tmp_path / "vectors.npy"), str(tmp_path / "vectors.json"))
@@ -0,0 +1,31 @@
+import math
+
+
+def estimate_tokens(text):
+    """
+    토크나이저 없이 쓰는 대략적인 토큰 수 추정.
+    영문/숫자는 약 4글자당 1토큰, 한글 등 비ASCII 문자는 약 1.5글자당 1토큰으로 계산합니다.
+    """
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128 and not ch.isspace())
+    other_chars = sum(1 for ch in text if ord(ch) >= 128)
+    return math.ceil(ascii_chars / 4 + other_chars / 1.5)
+
+
+def truncate_to_tokens(text, max_tokens):
+    """text를 max_tokens 이내로 자릅니다. 가능하면 공백(단어 경계)에서 자릅니다."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if estimate_tokens(text[:mid]) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    cut = text[:lo]
+    space = cut.rfind(' ')
+    if space > len(cut) // 2:
+        cut = cut[:space]
+    return cut.rstrip()
@@ -0,0 +1,68 @@
+from location_matcher import AhoCorasick
+
+# 주제(prepare_data.URLS의 키)별 단서 단어. 질문에 나오면 해당 주제 청크만 검색합니다.
+# (셔틀버스/찾아오시는길은 같은 페이지라 '셔틀버스' 주제로 저장됩니다)
+TOPIC_CUES = {
+    "셔틀버스": ["셔틀", "버스", "통학", "지하철", "오시는 길", "오는 길", "찾아가는", "정류장", "노선", "상봉역", "사가정역", "용마산역"],
+    "학생식당": ["학생식당", "학식", "식당", "메뉴", "식단", "밥"],
+    "편의점, 카페": ["편의점", "카페", "커피", "매점"],
+    "도서관": ["도서관", "열람실", "대출", "반납", "도서"],
+    "스터디공간": ["스터디", "스터디룸", "스터디카페", "그룹스터디"],
+    "PC이용, VR실": ["pc", "컴퓨터", "vr", "피씨"],
+    "휴게공간": ["휴게", "쉴 곳", "쉬는 곳", "라운지"],
+    "편의시설": ["편의시설", "복사", "프린트", "인쇄", "atm", "우체국"],
+    "체육시설": ["체육", "헬스", "운동장", "농구", "풋살", "체력단련"],
+    "학사공지": ["학사", "수강", "성적", "휴학", "복학", "졸업", "시험", "등록금", "계절학기"],
+    "공지사항": ["공지", "장학", "모집", "채용"],
+    "행사안내": ["행사", "축제", "특강", "설명회", "박람회"],
+    "홍보사항": ["홍보"],
+    "학교소식": ["소식", "뉴스", "보도"],
+    "대학생활메뉴얼": ["학생증", "메뉴얼", "매뉴얼", "생활 안내"],
+}
+
+# 가입 시 고르는 관심사(INTEREST_OPTIONS) -> 검색할 주제
+INTEREST_TOPICS = {
+    "학사공지": ["학사공지"],
+    "장학금": ["공지사항", "학사공지"],
+    "셔틀버스": ["셔틀버스"],
+    "도서관": ["도서관", "스터디공간"],
+    "학생식당": ["학생식당"],
+    "카페": ["편의점, 카페"],
+    "편의점": ["편의점, 카페"],
+}
+
+
+class TopicRouter:
+    """
+    질문의 단서 단어로 검색할 주제를 고르는 가벼운 로컬 분류기.
+    단서 단어를 하나의 Aho-Corasick 오토마톤으로 묶어 한 번에 찾고, 가장 많이 걸린 주제들을 돌려줍니다.
+    """
+
+    def __init__(self, topic_cues=TOPIC_CUES, interest_topics=INTEREST_TOPICS, max_topics=2):
+        self._cue_topics = {}
+        for topic, cues in topic_cues.items():
+            for cue in cues:
+                self._cue_topics.setdefault(cue.lower(), []).append(topic)
+        self._automaton = AhoCorasick(self._cue_topics)
+        self.interest_topics = interest_topics
+        self.max_topics = max_topics
+
+    def classify(self, question):
+        """질문에 걸린 주제를 점수(단서 글자 수 합) 순으로 돌려줍니다. 단서가 없으면 []."""
+        scores = {}
+        for start, end, pid in self._automaton.iter(str(question or "").lower()):
+            for topic in self._cue_topics[self._automaton.patterns[pid]]:
+                scores[topic] = scores.get(topic, 0) + (end - start)
+        return sorted(scores, key=lambda t: -scores[t])[:self.max_topics]
+
+    def topics_for(self, question, interest=None):
+        """추천 질문(관심사 버튼)이면 관심사의 주제를, 아니면 질문에서 분류한 주제를 씁니다."""
+        if interest and interest in self.interest_topics:
+            return list(self.interest_topics[interest])
+        return self.classify(question)
+
+    def where_for(self, question, interest=None):
+        """Chroma where 절. 주제를 고르지 못하면 None(전체 검색)."""
+        topics = self.topics_for(question, interest)
+        if not topics: return None
+        return {"topic": topics[0]} if len(topics) == 1 else {"topic": {"$in": topics}}
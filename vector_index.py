@@ -0,0 +1,131 @@
+import json
+import os
+
+import numpy as np
+
+from index_manifest import DB_PATH
+
+# prepare_data.py가 내보내는 임베딩 행렬(.npy)과 문서 표(행 순서와 같은 ids/documents)
+VECTORS_PATH = os.path.join(DB_PATH, "vectors.npy")
+VECTOR_TABLE_PATH = os.path.join(DB_PATH, "vectors.json")
+
+
+def matches_where(metadata, where):
+    """
+    Chroma where 절의 일부를 메타데이터 하나에 적용합니다.
+    지원: {"필드": 값}, {"필드": {"$eq"/"$ne"/"$in"/"$nin": ...}}, {"$and": [...]}, {"$or": [...]}
+    """
+    if not where: return True
+    metadata = metadata or {}
+    for key, cond in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, c) for c in cond): return False
+        elif key == "$or":
+            if not any(matches_where(metadata, c) for c in cond): return False
+        elif isinstance(cond, dict):
+            value = metadata.get(key)
+            for op, operand in cond.items():
+                if op == "$eq" and value != operand: return False
+                if op == "$ne" and value == operand: return False
+                if op == "$in" and value not in operand: return False
+                if op == "$nin" and value in operand: return False
+        elif metadata.get(key) != cond:
+            return False
+    return True
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def export_vectors(ids, documents, embeddings, dtype="float32",
+                   vectors_path=VECTORS_PATH, table_path=VECTOR_TABLE_PATH, metadatas=None):
+    """
+    임베딩을 단위 벡터로 정규화한 연속 행렬(.npy)과 문서 표(JSON, 메타데이터 포함)로 저장합니다.
+    행렬은 앱에서 memory-map으로 열기 때문에 프로세스 간에 페이지 캐시를 공유합니다.
+    """
+    matrix = _normalize(np.asarray(embeddings, dtype=np.float32)).astype(dtype)
+    os.makedirs(os.path.dirname(vectors_path), exist_ok=True)
+    tmp_vectors = vectors_path + ".tmp.npy"
+    np.save(tmp_vectors, np.ascontiguousarray(matrix))
+    tmp_table = table_path + ".tmp"
+    with open(tmp_table, 'w', encoding='utf-8') as f:
+        json.dump({"ids": list(ids), "documents": list(documents), "metadatas": list(metadatas) if metadatas else None,
+                   "dim": int(matrix.shape[1]) if matrix.ndim == 2 else 0, "dtype": str(matrix.dtype)},
+                  f, ensure_ascii=False)
+    os.replace(tmp_vectors, vectors_path)
+    os.replace(tmp_table, table_path)
+
+
+def _scores(matrix, q, chunk_rows=4096):
+    """matrix @ q. float16 행렬은 chunk_rows행씩만 float32로 올려 계산합니다. (전체 복사본을 만들지 않도록)"""
+    if matrix.dtype == np.float32:
+        return matrix @ q
+    scores = np.empty(len(matrix), dtype=np.float32)
+    for start in range(0, len(matrix), chunk_rows):
+        scores[start:start + chunk_rows] = matrix[start:start + chunk_rows].astype(np.float32) @ q
+    return scores
+
+
+class NumpyVectorIndex:
+    """
+    memory-map한 임베딩 행렬 위에서 정확한(exact) top-k 코사인 검색을 합니다.
+    query()는 chromadb Collection.query와 같은 모양의 결과를 돌려주므로 retrieve()에서 그대로 바꿔 쓸 수 있습니다.
+    """
+
+    def __init__(self, vectors_path=VECTORS_PATH, table_path=VECTOR_TABLE_PATH):
+        with open(table_path, 'r', encoding='utf-8') as f:
+            table = json.load(f)
+        self.ids = table["ids"]
+        self.documents = table["documents"]
+        self.metadatas = table.get("metadatas") or [{} for _ in self.ids]
+        self._where_rows = {}
+        self.matrix = np.load(vectors_path, mmap_mode='r')
+        if len(self.matrix) != len(self.ids):
+            raise ValueError(f"벡터 행렬({len(self.matrix)}행)과 문서 표({len(self.ids)}개)의 크기가 다릅니다.")
+
+    def count(self):
+        return len(self.ids)
+
+    def rows_for(self, where):
+        """where 조건에 맞는 행 번호 배열. 같은 조건은 한 번만 계산합니다."""
+        key = json.dumps(where, sort_keys=True, ensure_ascii=False)
+        rows = self._where_rows.get(key)
+        if rows is None:
+            rows = np.array([i for i, meta in enumerate(self.metadatas) if matches_where(meta, where)], dtype=np.int64)
+            self._where_rows[key] = rows
+        return rows
+
+    def _top_k(self, query, n_results, where=None):
+        q = _normalize(np.asarray(query, dtype=np.float32))
+        # where가 있으면 해당 행만 골라 계산합니다. (후보가 줄어드는 만큼 행렬곱도 작아집니다)
+        rows = self.rows_for(where) if where else None
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        # float16 행렬은 조각별로 float32로 올려서 계산합니다. (NumPy의 float16 행렬곱은 느립니다)
+        scores = _scores(matrix, q)
+        n = min(n_results, len(scores))
+        if n <= 0: return np.empty(0, dtype=np.int64), scores[:0]
+        # 전체 정렬 대신 argpartition으로 상위 n개만 고른 뒤 그 안에서만 정렬합니다.
+        top = np.argpartition(-scores, n - 1)[:n] if n < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return (top if rows is None else rows[top]), scores[top]
+
+    def query(self, query_embeddings, n_results=10, where=None):
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query in query_embeddings:
+            rows, scores = self._top_k(query, n_results, where)
+            result["ids"].append([self.ids[i] for i in rows])
+            result["documents"].append([self.documents[i] for i in rows])
+            result["metadatas"].append([self.metadatas[i] for i in rows])
+            # 코사인 거리 (Chroma의 cosine 공간과 같은 의미)
+            result["distances"].append([float(1.0 - s) for s in scores])
+        return result
+
+
+def load_vector_index(vectors_path=VECTORS_PATH, table_path=VECTOR_TABLE_PATH):
+    """내보낸 행렬이 없으면 None."""
+    if not (os.path.exists(vectors_path) and os.path.exists(table_path)):
+        return None
+    return NumpyVectorIndex(vectors_path, table_path)